@@ -8,6 +8,9 @@
 3. 生成文本块的Embedding
 4. 将Embedding存储到向量数据库中（使用 Chroma）
 
+以上步骤以流水线方式执行，各阶段通过有界队列衔接，文本块内容和向量的内存占用与语料规模无关
+（索引清单只保存每个文本块的ID）。
+
 使用方法：
 python scripts/build_index.py
 
@@ -16,7 +19,26 @@ python scripts/build_index.py
 --collection-name: 指定向量数据库集合名称
 --chunk-size: 指定文档分块大小
 --chunk-overlap: 指定文档分块重叠大小
+--chunk-unit: 分块大小的计量单位（char / token）
+--no-dedup: 关闭文本块近似去重
 --rebuild: 是否重建索引（删除现有集合）
+--resume: 从上次中断的检查点继续构建，跳过已完成 Embedding 的文本块
+--parallel: 使用多进程并行解析文档
+--workers: 并行解析的进程数
+--import: 导入预计算的文本块和向量（Parquet / JSONL / 成对的 NPY+JSONL 文件或目录），
+          不加载文档、不调用 Embedding 接口
+--import-format: 导入文件格式（parquet / jsonl / npy），默认按扩展名判断
+--export-snapshot: 构建完成后把索引导出为自包含的快照目录（向量、BM25 倒排表、文档存储、
+                   索引清单、Embedding 指纹及校验和），服务节点可直接内存映射使用
+
+默认以增量方式运行：根据索引清单（文件大小、修改时间、内容哈希及生成的文本块ID）
+只处理新增或变更的文件，并删除已移除文件对应的文本块。
+
+Embedding 结果逐批写入检查点目录，全部完成后才统一写入索引并保存清单；
+构建中途失败时索引保持原样，使用 --resume 重新运行即可从检查点继续。
+
+导入模式下文本块直接写入向量数据库和文档存储（BM25 检索从文档存储建索引），
+不记录到索引清单；之后的增量构建不会删除导入的文本块，--rebuild 会一并清空。
 """
 
 import os
@@ -30,7 +52,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.config.settings import get_settings
 from src.ingestion.document_loader import SimpleDocumentLoader
-from src.ingestion.text_splitter import RecursiveCharacterTextSplitter
+from src.ingestion.text_splitter import create_text_splitter
+from src.ingestion.tokenizer import get_token_counter
+from src.ingestion.pipeline import IngestionPipeline
+from src.document_store import create_document_store, default_document_store_path
+from src.ingestion.checkpoint import IngestionCheckpoint, default_checkpoint_dir
+from src.ingestion.dedup import ChunkDeduplicator
+from src.ingestion.importer import EmbeddingImporter
+from src.snapshot import export_snapshot
+from src.ingestion.manifest import IndexManifest, default_manifest_path, index_config
 from src.embeddings.openai_embeddings import create_embedding_client
 from src.vector_store.chroma_vector_store import create_vector_store
 
@@ -70,11 +100,59 @@ def parse_arguments():
         default=None,
         help="指定文档分块重叠大小"
     )
+    parser.add_argument(
+        "--chunk-unit",
+        type=str,
+        choices=["char", "token"],
+        default=None,
+        help="分块大小的计量单位：char 按字符，token 按 token"
+    )
+    parser.add_argument(
+        "--no-dedup",
+        action="store_true",
+        help="关闭文本块近似去重"
+    )
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="使用多进程并行解析文档"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="并行解析的进程数（默认使用 CPU 核数）"
+    )
     parser.add_argument(
         "--rebuild",
         action="store_true",
         help="是否重建索引（删除现有集合）"
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="从上次中断的检查点继续构建"
+    )
+    parser.add_argument(
+        "--import",
+        dest="import_path",
+        type=str,
+        default=None,
+        help="导入预计算 Embedding 的文件或目录（Parquet / JSONL / NPY+JSONL）"
+    )
+    parser.add_argument(
+        "--import-format",
+        type=str,
+        choices=["parquet", "jsonl", "npy"],
+        default=None,
+        help="导入文件格式，默认按扩展名判断"
+    )
+    parser.add_argument(
+        "--export-snapshot",
+        type=str,
+        default=None,
+        help="构建完成后把索引导出为快照目录"
+    )
     
     return parser.parse_args()
 
@@ -92,9 +170,15 @@ def build_index(args):
     collection_name = args.collection_name or settings.vector_store_collection_name
     chunk_size = args.chunk_size or settings.rag_chunk_size
     chunk_overlap = args.chunk_overlap or settings.rag_chunk_overlap
+    chunk_unit = args.chunk_unit or settings.rag_chunk_unit
+    use_dedup = settings.ingestion_dedup_enabled and not args.no_dedup
     
-    # 验证文档目录
-    if not os.path.exists(document_dir):
+    # 验证文档目录（导入模式下验证导入路径）
+    if args.import_path:
+        if not os.path.exists(args.import_path):
+            logger.error(f"导入路径不存在: {args.import_path}")
+            return False
+    elif not os.path.exists(document_dir):
         logger.error(f"文档目录不存在: {document_dir}")
         return False
     
@@ -103,43 +187,33 @@ def build_index(args):
     logger.info(f"  集合名称: {collection_name}")
     logger.info(f"  分块大小: {chunk_size}")
     logger.info(f"  分块重叠: {chunk_overlap}")
+    logger.info(f"  分块单位: {chunk_unit}")
+    logger.info(f"  近似去重: {use_dedup}")
     logger.info(f"  向量数据库路径: {settings.vector_store_path}")
     logger.info(f"  Embedding模型: {settings.embedding_model}")
     logger.info(f"  是否重建索引: {args.rebuild}")
+    logger.info(f"  从检查点恢复: {args.resume}")
+    if args.import_path:
+        logger.info(f"  导入路径: {args.import_path}")
+    if args.export_snapshot:
+        logger.info(f"  导出快照: {args.export_snapshot}")
     
     try:
-        # 1. 初始化文档加载器
-        document_loader = SimpleDocumentLoader()
-        
-        # 2. 加载文档
-        logger.info(f"正在从 {document_dir} 加载文档...")
-        documents = document_loader.load_directory(document_dir)
-        logger.info(f"成功加载 {len(documents)} 个文档")
-        
-        if not documents:
-            logger.warning("未找到任何文档")
-            return True
-        
-        # 3. 初始化文本分块器
-        text_splitter = RecursiveCharacterTextSplitter(
+        # 1. 初始化文档加载器和文本分块器
+        # 按字符分块时，表格行组不超过分块大小，使每个行组恰好成为一个带表头的文本块
+        document_loader = SimpleDocumentLoader(
+            pdf_page_workers=settings.document_pdf_page_workers,
+            table_rows_per_part=settings.document_table_rows_per_part,
+            table_part_max_chars=chunk_size if chunk_unit == "char" else 0
+        )
+        text_splitter = create_text_splitter(
             chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
+            chunk_overlap=chunk_overlap,
+            chunk_unit=chunk_unit,
+            token_counter=get_token_counter()
         )
         
-        # 4. 分块处理
-        logger.info(f"正在对文档进行分块处理...")
-        all_chunks = []
-        for doc in tqdm(documents, desc="分块处理"):
-            chunk_result = text_splitter.split_document(doc)
-            all_chunks.extend(chunk_result.chunks)
-        
-        logger.info(f"分块完成，共生成 {len(all_chunks)} 个文本块")
-        
-        if not all_chunks:
-            logger.warning("未生成任何文本块")
-            return True
-        
-        # 5. 初始化Embedding客户端
+        # 2. 初始化Embedding客户端
         logger.info("正在初始化Embedding客户端...")
         embedding_client = create_embedding_client(
             api_key=settings.openai_api_key,
@@ -148,7 +222,7 @@ def build_index(args):
             base_url=settings.openai_api_base
         )
         
-        # 6. 初始化向量数据库（Chroma）
+        # 3. 初始化向量数据库（Chroma）
         logger.info("正在初始化 Chroma 向量数据库...")
         
         # 如果需要重建索引，先删除现有集合
@@ -165,6 +239,38 @@ def build_index(args):
             temp_vector_store.delete_collection()
             temp_vector_store.close()
         
+        # 加载索引清单；分块参数或 Embedding 模型变化时清单会将所有文件视为已修改
+        config = index_config(
+            chunk_size,
+            chunk_overlap,
+            chunk_unit,
+            settings.embedding_model,
+            dedup_max_distance=settings.ingestion_dedup_max_distance if use_dedup else None
+        )
+        manifest = IndexManifest(
+            default_manifest_path(settings.vector_store_path, collection_name),
+            config=config
+        )
+        # 检查点：配置不一致或未指定 --resume 时会被清空
+        checkpoint = IngestionCheckpoint(
+            default_checkpoint_dir(settings.vector_store_path, collection_name),
+            config=config
+        )
+        if checkpoint.exists() and not args.resume and not args.import_path:
+            logger.warning("发现上次未完成的构建检查点，未指定 --resume，将丢弃检查点重新构建")
+        # 文档存储：按文本块ID保存文本和元数据，供 BM25 建索引和检索结果取回
+        document_store = create_document_store(
+            store_type="sqlite",
+            db_path=default_document_store_path(settings.vector_store_path, collection_name)
+        )
+        if args.rebuild:
+            # 立即落盘清空后的清单并丢弃检查点：导入模式不会再保存清单，
+            # 否则下次增量构建会把已被删除的文件视为未变更，--resume 也可能发布旧批次
+            manifest.clear()
+            manifest.save()
+            checkpoint.clear()
+            document_store.clear()
+        
         # 创建向量数据库实例
         vector_store = create_vector_store(
             store_type="chroma",
@@ -174,32 +280,81 @@ def build_index(args):
             embedding_function=embedding_client.embed_text
         )
         
-        # 7. 生成所有文本块的Embedding
-        logger.info("正在生成文本块的Embedding...")
-        chunk_texts = [chunk.text for chunk in all_chunks]
-        embeddings = []
+        if args.import_path:
+            # 导入模式：跳过加载、分块和 Embedding，直接写入向量数据库和文档存储
+            importer = EmbeddingImporter(
+                vector_store=vector_store,
+                document_store=document_store,
+                batch_size=settings.ingestion_import_batch_size,
+                dimensions=settings.embedding_dimensions
+            )
+            logger.info(f"正在从 {args.import_path} 导入预计算的 Embedding...")
+            with tqdm(desc="导入文本块", unit="块") as progress_bar:
+                import_stats = importer.run(
+                    args.import_path,
+                    file_format=args.import_format,
+                    progress=progress_bar.update
+                )
+            logger.info(
+                f"导入 {import_stats.file_count} 个文件，写入文本块 {import_stats.chunk_count} 个，"
+                f"失败 {len(import_stats.failed_files)} 个文件"
+            )
+            logger.info(f"  文档块数量: {vector_store.get_collection_size()}")
+            if args.export_snapshot and not import_stats.failed_files:
+                _export_snapshot(args.export_snapshot, vector_store, document_store, manifest, config, settings)
+            vector_store.close()
+            document_store.close()
+            return not import_stats.failed_files
         
-        batch_size = settings.embedding_batch_size
-        for i in tqdm(range(0, len(chunk_texts), batch_size), desc="生成Embedding"):
-            batch_texts = chunk_texts[i:i+batch_size]
-            batch_embeddings = embedding_client.embed_documents(batch_texts)
-            embeddings.extend(batch_embeddings)
+        # 4. 流式处理：加载 → 分块 → Embedding → 写入，各阶段通过有界队列并行
+        pipeline = IngestionPipeline(
+            document_loader=document_loader,
+            text_splitter=text_splitter,
+            embedding_client=embedding_client,
+            vector_store=vector_store,
+            batch_size=settings.embedding_batch_size,
+            queue_size=settings.ingestion_queue_size,
+            parallel_loading=args.parallel or settings.document_load_parallel,
+            load_workers=args.workers or settings.document_load_workers or None,
+            load_timeout=settings.document_load_timeout,
+            document_store=document_store,
+            deduplicator=ChunkDeduplicator(settings.ingestion_dedup_max_distance) if use_dedup else None
+        )
         
-        logger.info(f"Embedding生成完成，共 {len(embeddings)} 个向量")
+        logger.info(f"正在从 {document_dir} 增量构建索引（清单中已有 {len(manifest)} 个文件）...")
+        with tqdm(desc="写入文本块", unit="块") as progress_bar:
+            stats = pipeline.sync(
+                document_loader.iter_file_paths(document_dir),
+                manifest,
+                progress=progress_bar.update,
+                checkpoint=checkpoint,
+                resume=args.resume
+            )
         
-        # 8. 向向量数据库添加文本块和向量
-        logger.info("正在向向量数据库添加文本块...")
-        vector_store.add_documents(all_chunks, embeddings)
+        logger.info(
+            f"新增 {stats.added_count} 个文件，修改 {stats.modified_count} 个，"
+            f"删除 {stats.removed_count} 个，未变更 {stats.unchanged_count} 个"
+        )
+        logger.info(
+            f"处理失败 {len(stats.failed_files)} 个文件，写入文本块 {stats.chunk_count} 个，"
+            f"清理旧文本块 {stats.deleted_chunk_count} 个，跳过近似重复文本块 {stats.duplicate_chunk_count} 个，"
+            f"从检查点恢复 {stats.resumed_chunk_count} 个"
+        )
         
-        # 9. 获取统计信息
+        # 5. 获取统计信息
         collection_size = vector_store.get_collection_size()
         logger.info(f"索引构建完成")
         logger.info(f"  集合名称: {collection_name}")
         logger.info(f"  文档块数量: {collection_size}")
         logger.info(f"  向量维度: {settings.embedding_dimensions}")
         
+        # 6. 导出索引快照
+        if args.export_snapshot:
+            _export_snapshot(args.export_snapshot, vector_store, document_store, manifest, config, settings)
+        
         # 关闭向量数据库连接
         vector_store.close()
+        document_store.close()
         
         return True
         
@@ -208,6 +363,24 @@ def build_index(args):
         return False
 
 
+def _export_snapshot(output_dir, vector_store, document_store, manifest, config, settings):
+    """
+    导出索引快照
+    """
+    logger.info(f"正在导出索引快照到 {output_dir}...")
+    meta = export_snapshot(
+        output_dir,
+        vector_store=vector_store,
+        document_store=document_store,
+        embedding_model=settings.embedding_model,
+        embedding_dimensions=settings.embedding_dimensions,
+        manifest_path=manifest.manifest_path,
+        config=config
+    )
+    total_size = sum(info["size"] for info in meta["files"].values())
+    logger.info(f"索引快照已导出：{meta['chunk_count']} 个文本块，共 {total_size / 1024 / 1024:.1f} MB")
+
+
 def main():
     """
     主函数
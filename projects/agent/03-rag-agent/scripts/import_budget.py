@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+导入耗时预算报告
+
+在全新的子进程中以 `python -X importtime` 导入指定模块（默认 src.main，即 API 服务的入口），
+统计总导入耗时和按顶层包汇总的耗时，并检查：
+1. 总耗时是否超过预算（--budget-ms）
+2. 是否导入了应当延迟加载的重量级依赖（pandas、PyPDF2、openpyxl、openai、jieba、pyarrow）
+
+任一检查不通过时返回非零退出码，可以放进 CI 跟踪启动耗时的回退。
+
+使用方法：
+python scripts/import_budget.py
+
+可选参数：
+--module: 要导入的模块，默认 src.main
+--budget-ms: 总导入耗时预算（毫秒），0 表示不检查
+--repeat: 重复测量次数，取中位数
+--top: 报告耗时最多的前 N 个顶层包
+--forbid: 不允许在导入时加载的模块（逗号分隔）
+"""
+
+import os
+import sys
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在对应代码路径上才需要的重量级依赖，服务启动时不应导入
+DEFAULT_FORBIDDEN = "pandas,PyPDF2,openpyxl,openai,jieba,pyarrow"
+
+
+def parse_arguments():
+    """
+    解析命令行参数
+    """
+    parser = argparse.ArgumentParser(description="导入耗时预算报告")
+    parser.add_argument(
+        "--module",
+        type=str,
+        default="src.main",
+        help="要导入的模块"
+    )
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=0,
+        help="总导入耗时预算（毫秒），0 表示不检查"
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="重复测量次数，取中位数"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=15,
+        help="报告耗时最多的前 N 个顶层包"
+    )
+    parser.add_argument(
+        "--forbid",
+        type=str,
+        default=DEFAULT_FORBIDDEN,
+        help="不允许在导入时加载的模块（逗号分隔），为空表示不检查"
+    )
+    return parser.parse_args()
+
+
+def measure_imports(module: str) -> List[Tuple[str, int, int]]:
+    """
+    在子进程中导入模块，解析 -X importtime 的输出
+
+    Args:
+        module: 模块名
+
+    Returns:
+        List[Tuple[str, int, int]]: 每个被导入模块的 (模块名, 自身耗时微秒, 累计耗时微秒)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [PROJECT_ROOT, env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        error = result.stderr.strip().splitlines()
+        raise RuntimeError(f"导入 {module} 失败: {error[-1] if error else result.returncode}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def summarize(entries: List[Tuple[str, int, int]]) -> Tuple[int, Dict[str, int]]:
+    """
+    汇总导入耗时
+
+    Args:
+        entries: measure_imports 的结果
+
+    Returns:
+        Tuple[int, Dict[str, int]]: (总耗时微秒, 顶层包 -> 自身耗时之和微秒)
+    """
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in entries:
+        by_package[name.split(".")[0]] += self_us
+    return sum(by_package.values()), dict(by_package)
+
+
+def main():
+    """
+    主函数
+    """
+    args = parse_arguments()
+    forbidden = [name.strip() for name in args.forbid.split(",") if name.strip()]
+
+    runs = []
+    try:
+        # 第一次运行可能需要编译 .pyc，不计入结果
+        measure_imports(args.module)
+        for _ in range(max(1, args.repeat)):
+            runs.append(measure_imports(args.module))
+    except RuntimeError as e:
+        print(e)
+        return 1
+
+    totals = [summarize(entries)[0] for entries in runs]
+    median_index = totals.index(sorted(totals)[len(totals) // 2])
+    total_us, by_package = summarize(runs[median_index])
+
+    print(f"import {args.module}: {total_us / 1000:.1f} ms "
+          f"(中位数，{len(runs)} 次测量: {', '.join(f'{t / 1000:.0f}' for t in totals)} ms)")
+    print(f"\n耗时最多的顶层包（自身耗时之和）：")
+    for package, package_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"  {package:<30} {package_us / 1000:8.1f} ms  {package_us / total_us:6.1%}")
+
+    failed = False
+    imported = {name for name, _, _ in runs[median_index]}
+    loaded = [name for name in forbidden if name in imported]
+    if loaded:
+        print(f"\n失败：导入时加载了应当延迟加载的模块: {', '.join(loaded)}")
+        failed = True
+
+    if args.budget_ms and total_us / 1000 > args.budget_ms:
+        print(f"\n失败：导入耗时 {total_us / 1000:.1f} ms 超出预算 {args.budget_ms:.0f} ms")
+        failed = True
+
+    if not failed:
+        print("\n导入耗时检查通过")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -1,4 +1,4 @@
 from src.agent.rag_agent import RAGAgentService
+from src.agent.single_flight import SingleFlight
 
-__all__ = ["RAGAgentService"]
-
+__all__ = ["RAGAgentService", "SingleFlight"]
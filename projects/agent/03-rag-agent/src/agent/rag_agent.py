@@ -1,4 +1,6 @@
-from typing import Dict, Any, Optional
+from contextlib import aclosing
+from typing import AsyncIterator, Dict, Any, Optional, Tuple
+from src.agent.single_flight import SingleFlight
 from src.clients.llm_client import LLMClient
 from src.rag_pipeline.base import RAGPipeline
 from src.tools.calculator import CalculatorTool
@@ -25,25 +27,45 @@ class RAGAgentService:
     集成 RAG 能力的对话 Agent 服务
     """
     
-    def __init__(self, rag_pipeline: Optional[RAGPipeline] = None):
+    def __init__(
+        self,
+        rag_pipeline: Optional[RAGPipeline] = None,
+        llm_client: Optional[LLMClient] = None,
+        coalesce_requests: bool = True
+    ):
         """
         初始化 RAG Agent
         
         Args:
             rag_pipeline: RAG Pipeline 实例，默认使用 BasicRAGPipeline
+            llm_client: 共享的 LLM 客户端（由创建者负责关闭），默认创建自有客户端
+            coalesce_requests: 是否合并同时到达的相同请求（只检索和调用 LLM 一次）
         """
-        self._llm = LLMClient()
+        self._owns_llm = llm_client is None
+        self._llm = llm_client or LLMClient()
         self._calculator = CalculatorTool()
         self._rag_pipeline = rag_pipeline
         self._agent_calls = 0
         self._rag_used_count = 0
         self._direct_llm_count = 0
         self._tool_used_count = 0
+        self._single_flight = SingleFlight() if coalesce_requests else None
+    
+    @staticmethod
+    def _coalesce_key(text: str, use_rag: bool) -> Optional[Tuple[str, bool]]:
+        """
+        请求合并的键：规范化的消息（合并空白、忽略大小写）和选项；计算器调用开销很小，不合并
+        """
+        if text.lower().startswith("calc:"):
+            return None
+        return " ".join(text.split()).casefold(), use_rag
     
     async def handle_message(self, message: str, use_rag: bool = True) -> Dict[str, Any]:
         """
         处理用户消息，根据消息类型选择不同的处理方式
         
+        同时到达的相同请求（规范化后的消息和选项相同）只处理一次，所有请求得到同一个结果。
+        
         Args:
             message: 用户消息
             use_rag: 是否使用 RAG Pipeline，默认为 True
@@ -51,6 +73,17 @@ class RAGAgentService:
         Returns:
             包含响应和处理信息的字典
         """
+        key = self._coalesce_key(message.strip(), use_rag)
+        if self._single_flight is None or key is None:
+            return await self._handle_message(message, use_rag)
+        result = await self._single_flight.do(key, lambda: self._handle_message(message, use_rag))
+        # 每个请求得到独立的字典，调用方修改时互不影响
+        return dict(result)
+    
+    async def _handle_message(self, message: str, use_rag: bool) -> Dict[str, Any]:
+        """
+        实际处理用户消息（不合并请求）
+        """
         self._agent_calls += 1
         text = message.strip()
         
@@ -123,6 +156,89 @@ class RAGAgentService:
             "details": None
         }
     
+    async def handle_message_stream(self, message: str, use_rag: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式处理用户消息，处理方式与 handle_message 相同
+        
+        事件依次为：sources（仅 RAG，检索到的上下文来源）、reasoning / token（LLM 增量输出）、
+        error（LLM 调用失败），最后是 done（包含响应类型等信息，与 handle_message 的返回值对应；
+        RAG 的 details 为 Pipeline 的 done 事件内容，如 cache_hit、retrieved_count，上下文文档见 sources）。
+        同时到达的相同请求共享同一个事件流（只调用一次 LLM），后加入的请求先收到已产生的事件。
+        
+        Args:
+            message: 用户消息
+            use_rag: 是否使用 RAG Pipeline，默认为 True
+            
+        Yields:
+            流式事件字典，键 "event" 为事件类型
+        """
+        key = self._coalesce_key(message.strip(), use_rag)
+        if self._single_flight is None or key is None:
+            source = self._handle_message_stream(message, use_rag)
+        else:
+            source = self._single_flight.stream(key, lambda: self._handle_message_stream(message, use_rag))
+        async for event in source:
+            yield event
+    
+    async def _handle_message_stream(self, message: str, use_rag: bool) -> AsyncIterator[Dict[str, Any]]:
+        """
+        实际流式处理用户消息（不合并请求）
+        """
+        text = message.strip()
+        
+        # 计算器工具和 RAG 处理前的错误没有增量输出，直接复用非流式处理
+        if text.lower().startswith("calc:"):
+            result = await self.handle_message(message, use_rag)
+            yield {"event": "token", "text": result["response"]}
+            yield {"event": "done", "type": result["type"], "tool_name": result["tool_name"], "details": result["details"]}
+            return
+        
+        self._agent_calls += 1
+        
+        if use_rag and self._rag_pipeline:
+            self._rag_used_count += 1
+            started = False
+            details = None
+            try:
+                # 提前退出循环时也要关闭 Pipeline 的生成器，释放其中的 LLM 流式连接
+                async with aclosing(self._rag_pipeline.run_stream(text)) as events:
+                    async for event in events:
+                        if event["event"] == "done":
+                            details = {key: value for key, value in event.items() if key != "event"}
+                            break
+                        started = True
+                        yield event
+                yield {"event": "done", "type": "rag", "tool_name": None, "details": details}
+                return
+            except Exception as e:
+                if started:
+                    # 已经输出了部分内容，无法再回退
+                    yield {"event": "error", "message": f"RAG 处理失败: {str(e)}"}
+                    yield {"event": "done", "type": "error", "tool_name": None, "details": {"error": str(e)}}
+                    return
+                # 如果 RAG 处理失败，回退到直接调用 LLM
+                fallback_details = {
+                    "error": str(e),
+                    "message": "RAG 处理失败，已回退到直接 LLM 调用"
+                }
+        else:
+            fallback_details = None
+        
+        self._direct_llm_count += 1
+        async for kind, chunk in self._llm.chat_stream(SYSTEM_PROMPT, text):
+            if kind == "content":
+                yield {"event": "token", "text": chunk}
+            elif kind == "reasoning":
+                yield {"event": "reasoning", "text": chunk}
+            elif kind == "error":
+                yield {"event": "error", "message": chunk}
+        yield {
+            "event": "done",
+            "type": "fallback" if fallback_details else "direct",
+            "tool_name": None,
+            "details": fallback_details
+        }
+    
     def set_rag_pipeline(self, rag_pipeline: RAGPipeline):
         """
         设置 RAG Pipeline 实例
@@ -144,7 +260,8 @@ class RAGAgentService:
             "total_calls": self._agent_calls,
             "rag_used_count": self._rag_used_count,
             "direct_llm_count": self._direct_llm_count,
-            "tool_used_count": self._tool_used_count
+            "tool_used_count": self._tool_used_count,
+            "coalesced_count": self._single_flight.shared_count if self._single_flight else 0
         }
         
         # 如果有 RAG Pipeline，添加其统计信息
@@ -157,6 +274,6 @@ class RAGAgentService:
         """
         关闭资源
         """
-        if hasattr(self, "_llm"):
+        if hasattr(self, "_llm") and self._owns_llm:
             await self._llm.aclose()
 
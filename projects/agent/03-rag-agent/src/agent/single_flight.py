@@ -0,0 +1,112 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Set, TypeVar
+
+T = TypeVar("T")
+
+
+class _Broadcast:
+    """一个正在进行的流：已产出的事件对所有订阅者可见"""
+
+    def __init__(self) -> None:
+        self.events: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.condition = asyncio.Condition()
+
+
+class SingleFlight:
+    """
+    合并相同的并发请求
+
+    键相同的并发调用只执行一次：第一个调用者启动任务，其余调用者等待同一个任务的结果。
+    任务在独立的 asyncio.Task 中运行，某个调用者被取消（如客户端断开）不会影响其他调用者。
+    流式调用的事件依次广播给所有订阅者，中途加入的订阅者先收到已产出的全部事件。
+    任务完成后立即移除，之后的调用重新执行（结果缓存由答案缓存负责）。
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, "asyncio.Task[Any]"] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        # 事件循环只弱引用任务，广播任务在这里保持强引用直到完成，避免流中途被垃圾回收
+        self._producers: Set["asyncio.Task[None]"] = set()
+        self._shared_count = 0
+
+    @property
+    def shared_count(self) -> int:
+        """合并到已有任务上的调用次数"""
+        return self._shared_count
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        执行 fn，键相同的并发调用共享同一次执行的结果（或异常）
+
+        Args:
+            key: 请求键
+            fn: 实际执行的协程函数
+
+        Returns:
+            fn 的返回值
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._discard(self._calls, key, task))
+        else:
+            self._shared_count += 1
+        return await asyncio.shield(task)
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator[T]]) -> AsyncIterator[T]:
+        """
+        订阅 fn 产出的流，键相同的并发订阅共享同一个源
+
+        Args:
+            key: 请求键
+            fn: 返回异步迭代器的函数
+
+        Yields:
+            源产出的事件（每个订阅者都收到完整的事件序列）
+        """
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            broadcast = _Broadcast()
+            self._streams[key] = broadcast
+            producer = asyncio.ensure_future(self._produce(key, broadcast, fn()))
+            self._producers.add(producer)
+            producer.add_done_callback(self._producers.discard)
+        else:
+            self._shared_count += 1
+
+        position = 0
+        while True:
+            async with broadcast.condition:
+                await broadcast.condition.wait_for(lambda: position < len(broadcast.events) or broadcast.done)
+                pending = broadcast.events[position:]
+                finished, error = broadcast.done, broadcast.error
+            for event in pending:
+                yield event
+            position += len(pending)
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+    async def _produce(self, key: Hashable, broadcast: _Broadcast, source: AsyncIterator[Any]) -> None:
+        """读取源并广播；订阅者全部离开也会读完，保证结果能写入缓存"""
+        try:
+            async for event in source:
+                async with broadcast.condition:
+                    broadcast.events.append(event)
+                    broadcast.condition.notify_all()
+        except Exception as e:
+            broadcast.error = e
+        finally:
+            self._discard(self._streams, key, broadcast)
+            async with broadcast.condition:
+                broadcast.done = True
+                broadcast.condition.notify_all()
+
+    @staticmethod
+    def _discard(calls: Dict[Hashable, Any], key: Hashable, value: Any) -> None:
+        if calls.get(key) is value:
+            del calls[key]
@@ -1,6 +1,8 @@
+import json
 import logging
 from fastapi import APIRouter, HTTPException, Depends
-from typing import Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Dict, Any
 from src.schemas.chat import ChatRequest, ChatResponse, ChatResponseDetails, ContextDocument
 from src.agent.rag_agent import RAGAgentService
 from src.dependencies import get_rag_agent
@@ -56,6 +58,7 @@ async def chat(
                 used_context_count=details.get("used_context_count"),
                 error=details.get("error"),
                 message=details.get("message"),
+                cache_hit=details.get("cache_hit"),
                 expression=details.get("expression"),
                 result=details.get("result")
             )
@@ -73,6 +76,43 @@ async def chat(
         )
 
 
+def _sse_event(event: str, data: Dict[str, Any]) -> str:
+    """编码一条 Server-Sent Events 事件"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream(
+    request: ChatRequest,
+    agent_service: RAGAgentService = Depends(get_rag_agent)
+) -> StreamingResponse:
+    """
+    流式处理用户消息（Server-Sent Events）。
+    使用 RAG 时先发送 sources 事件（检索到的上下文文档），随后 LLM 每生成一段内容发送一个
+    token 事件（推理模型的思考过程为 reasoning 事件），最后发送 done 事件；
+    出错时发送 error 事件，不中断连接。
+    """
+    async def event_stream() -> AsyncIterator[str]:
+        try:
+            async for event in agent_service.handle_message_stream(
+                message=request.message,
+                use_rag=request.use_rag
+            ):
+                data = {key: value for key, value in event.items() if key != "event"}
+                yield _sse_event(event["event"], data)
+        except Exception as e:
+            logger.error(f"流式处理消息时发生错误: {e}", exc_info=True)
+            yield _sse_event("error", {"message": f"处理消息时发生错误: {str(e)}。请稍后重试或联系管理员。"})
+            yield _sse_event("done", {"type": "error", "tool_name": None, "details": {"error": str(e)}})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # 禁止代理（如 Nginx）缓冲，保证每个事件立即送达客户端
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/stats", response_model=Dict[str, Any])
 async def get_stats(
     agent_service: RAGAgentService = Depends(get_rag_agent)
@@ -1,4 +1,4 @@
+from src.clients.http_pool import close_http_clients, get_http_client, get_sync_http_client
 from src.clients.llm_client import LLMClient
 
-__all__ = ["LLMClient"]
-
+__all__ = ["LLMClient", "get_http_client", "get_sync_http_client", "close_http_clients"]
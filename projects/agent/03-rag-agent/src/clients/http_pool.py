@@ -0,0 +1,105 @@
+import asyncio
+import importlib.util
+import logging
+import threading
+from typing import Optional
+
+import httpx
+
+from src.config.settings import Settings, get_settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_client: Optional[httpx.Client] = None
+
+
+def http2_available() -> bool:
+    """是否安装了 HTTP/2 支持（h2 包，即 httpx[http2]）"""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _client_options(settings: Settings) -> dict:
+    """连接池参数：连接数上限、空闲连接保活时间、超时和 HTTP/2"""
+    http2 = settings.http2_enabled and http2_available()
+    if settings.http2_enabled and not http2:
+        logger.info("未安装 h2，LLM 连接池使用 HTTP/1.1（pip install 'httpx[http2]' 启用 HTTP/2）")
+    return {
+        "http2": http2,
+        "limits": httpx.Limits(
+            max_connections=settings.http_pool_max_connections,
+            max_keepalive_connections=settings.http_pool_max_keepalive,
+            keepalive_expiry=settings.http_keepalive_expiry,
+        ),
+        "timeout": httpx.Timeout(settings.http_timeout, connect=settings.http_connect_timeout),
+    }
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    获取进程内共享的异步 HTTP 客户端（LLM 调用使用）
+
+    所有 LLMClient 复用同一个连接池，请求之间保持长连接（启用 HTTP/2 时多个并发请求复用同一连接），
+    只有第一次请求需要建立 TCP 和 TLS 连接。连接池绑定在事件循环上，
+    在另一个事件循环中调用时（如脚本多次 asyncio.run）会创建新的连接池，并关闭旧的连接池。
+
+    Returns:
+        httpx.AsyncClient: 共享的异步客户端
+    """
+    global _async_client, _async_client_loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+
+    stale = None
+    with _lock:
+        if _async_client is None or _async_client.is_closed or (loop is not None and loop is not _async_client_loop):
+            if _async_client is not None and not _async_client.is_closed:
+                stale = (_async_client, _async_client_loop)
+            _async_client = httpx.AsyncClient(**_client_options(get_settings()))
+            _async_client_loop = loop
+        elif _async_client_loop is None:
+            _async_client_loop = loop
+        client = _async_client
+
+    if stale is not None:
+        _close_stale_client(*stale)
+    return client
+
+
+def _close_stale_client(client: httpx.AsyncClient, loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """关闭被替换的连接池：其事件循环仍在运行时在该循环上关闭，否则连接只能随对象回收释放"""
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        return
+    logger.warning("事件循环已变化，旧的 LLM 连接池所在的事件循环已结束，无法关闭其连接（将随对象回收释放）")
+
+
+def get_sync_http_client() -> httpx.Client:
+    """
+    获取进程内共享的同步 HTTP 客户端（Embedding 调用使用，线程安全）
+
+    Returns:
+        httpx.Client: 共享的同步客户端
+    """
+    global _sync_client
+    with _lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options(get_settings()))
+        return _sync_client
+
+
+async def close_http_clients() -> None:
+    """关闭共享的连接池（应用关闭时调用）"""
+    global _async_client, _async_client_loop, _sync_client
+    with _lock:
+        async_client, sync_client = _async_client, _sync_client
+        _async_client = _async_client_loop = _sync_client = None
+
+    if async_client is not None:
+        await async_client.aclose()
+    if sync_client is not None:
+        sync_client.close()
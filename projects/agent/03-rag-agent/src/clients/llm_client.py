@@ -1,7 +1,11 @@
+import hashlib
+import json
 import logging
+from typing import AsyncIterator, Optional, Tuple
 
 import httpx
 
+from src.clients.http_pool import get_http_client
 from src.config.settings import get_settings
 
 logger = logging.getLogger(__name__)
@@ -13,20 +17,24 @@ class LLMClient:
     说明：
     - 接口路径和字段设计参照 OpenAI 官方 Chat Completions HTTP API。
     - 如官方有更新，请对照文档调整 base_url、路径和请求体结构。
+    - 默认使用进程内共享的连接池（见 src/clients/http_pool.py），请求之间复用长连接。
     """
 
-    def __init__(self) -> None:
+    def __init__(self, http_client: Optional[httpx.AsyncClient] = None) -> None:
+        """
+        Args:
+            http_client: 专用的 HTTP 客户端（由 LLMClient 负责关闭），默认使用共享连接池
+        """
         self._settings = get_settings()
-        self._client = httpx.AsyncClient(
-            base_url=self._settings.openai_api_base,
-            timeout=30.0,
-        )
+        self._http_client = http_client
+        self._url = self._settings.openai_api_base.rstrip("/") + "/chat/completions"
 
-    async def chat(self, system_prompt: str, user_message: str) -> str:
-        if not self._settings.openai_api_key:
-            # 未配置 API Key 时，返回一个说明性的占位文本，避免直接报错崩溃
-            return "LLM 未配置（缺少 OPENAI_API_KEY 环境变量），当前为占位回复。"
+    @property
+    def _client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_client()
 
+    def _build_request(self, system_prompt: str, user_message: str, stream: bool = False) -> Tuple[dict, dict]:
+        """构造请求头和请求体"""
         headers = {
             "Authorization": f"Bearer {self._settings.openai_api_key}",
             "Content-Type": "application/json",
@@ -41,11 +49,41 @@ class LLMClient:
             "temperature": self._settings.openai_temperature,
             "max_tokens": self._settings.openai_max_tokens,
         }
+        if stream:
+            payload["stream"] = True
+        return headers, payload
+
+    def request_key(self, system_prompt: str, user_message: str) -> str:
+        """接口地址和请求体（提示词、模型、温度、最大 token 数）的哈希，用作补全缓存的键"""
+        _, payload = self._build_request(system_prompt, user_message)
+        encoded = json.dumps([self._url, payload], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    async def chat(self, system_prompt: str, user_message: str) -> str:
+        reply, _ = await self.chat_with_status(system_prompt, user_message)
+        return reply
+
+    async def chat_with_status(self, system_prompt: str, user_message: str) -> Tuple[str, bool]:
+        """
+        调用 Chat Completions，同时返回是否成功
+
+        与 chat 相同，失败时不抛出异常而是返回说明文本；调用方据此区分真实回复和错误说明
+        （例如只缓存真实回复）。
+
+        Returns:
+            Tuple[str, bool]: (回复或错误说明, 是否为模型的完整回复)；因 max_tokens 被截断
+                （finish_reason 为 "length"）的回复照常返回，但标记为 False
+        """
+        if not self._settings.openai_api_key:
+            # 未配置 API Key 时，返回一个说明性的占位文本，避免直接报错崩溃
+            return "LLM 未配置（缺少 OPENAI_API_KEY 环境变量），当前为占位回复。", False
+
+        headers, payload = self._build_request(system_prompt, user_message)
 
         try:
             # 参考：OpenAI Chat Completions HTTP API
             # https://platform.openai.com/docs/api-reference/chat
-            response = await self._client.post("/chat/completions", headers=headers, json=payload)
+            response = await self._client.post(self._url, headers=headers, json=payload)
             
             # 检查 HTTP 状态码
             if response.status_code != 200:
@@ -55,32 +93,101 @@ class LLMClient:
                     f"model={self._settings.openai_model}, "
                     f"error={error_detail}"
                 )
-                return f"LLM API 调用失败（状态码: {response.status_code}）。请检查 API Key 和模型名称是否正确。错误详情: {error_detail[:200]}"
+                return f"LLM API 调用失败（状态码: {response.status_code}）。请检查 API Key 和模型名称是否正确。错误详情: {error_detail[:200]}", False
             
             data = response.json()
             
             # 检查返回数据格式
             if "choices" not in data or not data["choices"]:
                 logger.error(f"LLM API 返回格式异常: {data}")
-                return "LLM API 返回数据格式异常，请检查 API 响应。"
+                return "LLM API 返回数据格式异常，请检查 API 响应。", False
             
             # 按照官方返回格式，从 choices[0].message.content 中读取回复
-            content = data["choices"][0]["message"]["content"]
-            return content
+            choice = data["choices"][0]
+            content = choice["message"]["content"]
+            if choice.get("finish_reason") == "length":
+                logger.warning("LLM 回复达到 max_tokens 上限被截断")
+                return content, False
+            return content, True
             
         except httpx.TimeoutException:
             logger.error("LLM API 调用超时")
-            return "LLM API 调用超时，请稍后重试。"
+            return "LLM API 调用超时，请稍后重试。", False
         except httpx.RequestError as e:
             logger.error(f"LLM API 网络请求错误: {e}")
-            return f"LLM API 网络请求失败: {str(e)}。请检查网络连接和 API 地址。"
+            return f"LLM API 网络请求失败: {str(e)}。请检查网络连接和 API 地址。", False
         except KeyError as e:
             logger.error(f"LLM API 返回数据缺少必要字段: {e}, data={data if 'data' in locals() else 'N/A'}")
-            return "LLM API 返回数据格式不正确，缺少必要字段。"
+            return "LLM API 返回数据格式不正确，缺少必要字段。", False
         except Exception as e:
             logger.error(f"LLM API 调用发生未知错误: {e}", exc_info=True)
-            return f"LLM API 调用发生错误: {str(e)}。请查看日志获取详细信息。"
+            return f"LLM API 调用发生错误: {str(e)}。请查看日志获取详细信息。", False
+
+    async def chat_stream(self, system_prompt: str, user_message: str) -> AsyncIterator[Tuple[str, str]]:
+        """
+        流式调用 Chat Completions（stream=True），增量内容到达即产出
+
+        与 chat 一样不抛出异常：调用失败（包括未配置 API Key）时产出一条 ("error", 说明文本) 后结束。
+        生成结束时产出一条 ("finish", finish_reason)，为 "length" 表示回复因 max_tokens 被截断。
+
+        Args:
+            system_prompt: 系统提示词
+            user_message: 用户消息
+
+        Yields:
+            Tuple[str, str]: (类型, 文本)。类型为 "content"（回复内容）、
+                "reasoning"（推理模型的思考过程，如 deepseek-r1 的 reasoning_content）、
+                "finish"（结束原因）或 "error"
+        """
+        if not self._settings.openai_api_key:
+            yield "error", "LLM 未配置（缺少 OPENAI_API_KEY 环境变量），当前为占位回复。"
+            return
+
+        headers, payload = self._build_request(system_prompt, user_message, stream=True)
+
+        try:
+            async with self._client.stream("POST", self._url, headers=headers, json=payload) as response:
+                if response.status_code != 200:
+                    error_detail = (await response.aread()).decode("utf-8", errors="replace")
+                    logger.error(
+                        f"LLM API 流式调用失败: status={response.status_code}, "
+                        f"model={self._settings.openai_model}, "
+                        f"error={error_detail}"
+                    )
+                    yield "error", f"LLM API 调用失败（状态码: {response.status_code}）。错误详情: {error_detail[:200]}"
+                    return
+
+                # Server-Sent Events：每个事件一行 "data: {...}"，以 "data: [DONE]" 结束
+                async for line in response.aiter_lines():
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    chunk = json.loads(data)
+                    if not chunk.get("choices"):
+                        # 开启 include_usage 时最后一个事件只包含 token 用量
+                        continue
+                    delta = chunk["choices"][0].get("delta") or {}
+                    if delta.get("reasoning_content"):
+                        yield "reasoning", delta["reasoning_content"]
+                    if delta.get("content"):
+                        yield "content", delta["content"]
+                    if chunk["choices"][0].get("finish_reason"):
+                        yield "finish", chunk["choices"][0]["finish_reason"]
+
+        except httpx.TimeoutException:
+            logger.error("LLM API 流式调用超时")
+            yield "error", "LLM API 调用超时，请稍后重试。"
+        except httpx.RequestError as e:
+            logger.error(f"LLM API 网络请求错误: {e}")
+            yield "error", f"LLM API 网络请求失败: {str(e)}。请检查网络连接和 API 地址。"
+        except (json.JSONDecodeError, KeyError, IndexError) as e:
+            logger.error(f"LLM API 流式返回数据格式异常: {e}")
+            yield "error", "LLM API 返回数据格式不正确。"
 
     async def aclose(self) -> None:
-        await self._client.aclose()
+        """关闭专用的 HTTP 客户端；共享连接池由应用关闭时统一释放"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
 
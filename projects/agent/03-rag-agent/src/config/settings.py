@@ -18,6 +18,16 @@ class Settings(BaseSettings):
     openai_temperature: float = Field(default=0.7, env="OPENAI_TEMPERATURE")
     openai_max_tokens: int = Field(default=2000, env="OPENAI_MAX_TOKENS")
 
+    # LLM / Embedding 接口共享的 HTTP 连接池
+    http_pool_max_connections: int = Field(default=100, env="HTTP_POOL_MAX_CONNECTIONS")
+    http_pool_max_keepalive: int = Field(default=20, env="HTTP_POOL_MAX_KEEPALIVE")
+    # 空闲连接保活时间（秒），应略短于服务端的空闲超时
+    http_keepalive_expiry: float = Field(default=60.0, env="HTTP_KEEPALIVE_EXPIRY")
+    http_timeout: float = Field(default=30.0, env="HTTP_TIMEOUT")
+    http_connect_timeout: float = Field(default=5.0, env="HTTP_CONNECT_TIMEOUT")
+    # 启用 HTTP/2（需要安装 h2，未安装时使用 HTTP/1.1）
+    http2_enabled: bool = Field(default=True, env="HTTP2_ENABLED")
+
     # Embedding 模型配置
     # 注意：如果使用阿里云百炼 API，需要使用支持的 Embedding 模型
     # 常见选项：text-embedding-v1, text-embedding-v2, text-embedding-v3
@@ -27,6 +37,10 @@ class Settings(BaseSettings):
     )
     embedding_dimensions: int = Field(default=1536, env="EMBEDDING_DIMENSIONS")
     embedding_batch_size: int = Field(default=64, env="EMBEDDING_BATCH_SIZE")
+    # Embedding 请求的超时时间（秒）：大批量请求远慢于对话请求，不使用连接池的 HTTP_TIMEOUT
+    embedding_timeout: float = Field(default=600.0, env="EMBEDDING_TIMEOUT")
+    # 向量传输格式：base64 直接解码为 float32 数组；服务端不支持时自动回退为 float
+    embedding_encoding_format: str = Field(default="base64", env="EMBEDDING_ENCODING_FORMAT")
 
     # 向量数据库配置（使用 Chroma）
     vector_store_path: str = Field(
@@ -37,12 +51,49 @@ class Settings(BaseSettings):
         default="rag_agent",
         env="VECTOR_STORE_COLLECTION_NAME"
     )
+    # 索引快照目录（build_index.py --export-snapshot 生成）；设置后服务直接内存映射快照，
+    # 不再使用 Chroma 和本地文档存储
+    index_snapshot_path: str = Field(default="", env="INDEX_SNAPSHOT_PATH")
+    # 加载快照时校验每个文件的 SHA-256
+    index_snapshot_verify: bool = Field(default=True, env="INDEX_SNAPSHOT_VERIFY")
 
     # RAG 配置
     rag_top_k: int = Field(default=4, env="RAG_TOP_K")
     rag_chunk_size: int = Field(default=512, env="RAG_CHUNK_SIZE")
     rag_chunk_overlap: int = Field(default=128, env="RAG_CHUNK_OVERLAP")
+    # 提示词中上下文的 token 预算：合并重叠的文本块后按检索排名装填，超出时在句子边界截断；0 表示不限制
     rag_context_limit: int = Field(default=4096, env="RAG_CONTEXT_LIMIT")
+    # 分块大小的计量单位："char" 按字符，"token" 按 token
+    rag_chunk_unit: str = Field(default="char", env="RAG_CHUNK_UNIT")
+    # 补全缓存：完整请求体（提示词、模型、温度等）相同时直接返回之前的回复，索引版本变化时失效
+    rag_completion_cache_enabled: bool = Field(default=True, env="RAG_COMPLETION_CACHE_ENABLED")
+    rag_completion_cache_max_entries: int = Field(default=512, env="RAG_COMPLETION_CACHE_MAX_ENTRIES")
+    # 语义答案缓存：检索到相同上下文、查询向量余弦相似度不低于阈值时直接返回之前的答案
+    rag_semantic_cache_enabled: bool = Field(default=False, env="RAG_SEMANTIC_CACHE_ENABLED")
+    rag_semantic_cache_threshold: float = Field(default=0.95, env="RAG_SEMANTIC_CACHE_THRESHOLD")
+    rag_semantic_cache_max_entries: int = Field(default=1000, env="RAG_SEMANTIC_CACHE_MAX_ENTRIES")
+    rag_semantic_cache_ttl: float = Field(default=86400, env="RAG_SEMANTIC_CACHE_TTL")
+    # SQLite 持久化文件，为空时只缓存在内存中
+    rag_semantic_cache_path: str = Field(default="", env="RAG_SEMANTIC_CACHE_PATH")
+    # 抽取式上下文压缩：每个上下文只保留与查询最相关的若干句，减少提示词 token
+    # 打分方式："lexical" 按查询词重合度（无额外请求），"embedding" 按句子向量相似度（句子向量有缓存）
+    rag_compression_enabled: bool = Field(default=False, env="RAG_COMPRESSION_ENABLED")
+    rag_compression_scoring: str = Field(default="lexical", env="RAG_COMPRESSION_SCORING")
+    rag_compression_max_sentences: int = Field(default=3, env="RAG_COMPRESSION_MAX_SENTENCES")
+    # 请求合并：同时到达的相同问题（规范化后的消息和选项相同）只检索和调用 LLM 一次
+    agent_coalesce_requests: bool = Field(default=True, env="AGENT_COALESCE_REQUESTS")
+    # 本地 BPE 词表（tiktoken 编码名称），为空时使用离线估算器
+    tokenizer_encoding: str = Field(default="", env="TOKENIZER_ENCODING")
+    # jieba 词典缓存目录，为空时使用系统临时目录
+    jieba_cache_dir: str = Field(default="", env="JIEBA_CACHE_DIR")
+
+    # 索引构建流水线配置
+    ingestion_queue_size: int = Field(default=4, env="INGESTION_QUEUE_SIZE")
+    # 文本块近似去重（SimHash），汉明距离不超过阈值的文本块只保留第一个
+    ingestion_dedup_enabled: bool = Field(default=True, env="INGESTION_DEDUP_ENABLED")
+    ingestion_dedup_max_distance: int = Field(default=3, env="INGESTION_DEDUP_MAX_DISTANCE")
+    # 导入预计算 Embedding 时每批写入的文本块数量
+    ingestion_import_batch_size: int = Field(default=5000, env="INGESTION_IMPORT_BATCH_SIZE")
 
     # 文档处理配置
     document_dir: str = Field(default="./documents", env="DOCUMENT_DIR")
@@ -50,6 +101,18 @@ class Settings(BaseSettings):
         default=[".md", ".txt", ".pdf",".xlsx",".csv"],
         env="DOCUMENT_EXTENSIONS"
     )
+    # 并行解析文档（进程池），workers 为 0 时使用 CPU 核数
+    document_load_parallel: bool = Field(default=False, env="DOCUMENT_LOAD_PARALLEL")
+    document_load_workers: int = Field(default=0, env="DOCUMENT_LOAD_WORKERS")
+    document_load_timeout: float = Field(default=300.0, env="DOCUMENT_LOAD_TIMEOUT")
+    # 单个 PDF 按页并行解析的进程数，0 表示逐页顺序解析（与 document_load_parallel 同时开启时不生效）
+    document_pdf_page_workers: int = Field(default=0, env="DOCUMENT_PDF_PAGE_WORKERS")
+    # CSV/Excel 按行组分段加载，每组重复表头
+    document_table_rows_per_part: int = Field(default=50, env="DOCUMENT_TABLE_ROWS_PER_PART")
+    # 监听文档目录，文件变化时在线增量更新索引（未安装 watchdog 时使用轮询）
+    document_watch_enabled: bool = Field(default=False, env="DOCUMENT_WATCH_ENABLED")
+    document_watch_debounce: float = Field(default=2.0, env="DOCUMENT_WATCH_DEBOUNCE")
+    document_watch_poll_interval: float = Field(default=5.0, env="DOCUMENT_WATCH_POLL_INTERVAL")
 
     class Config:
         env_file = ".env"
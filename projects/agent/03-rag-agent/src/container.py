@@ -0,0 +1,319 @@
+import logging
+import threading
+import time
+from typing import Any, Dict, Hashable, Optional
+
+from src.agent.rag_agent import RAGAgentService
+from src.clients.http_pool import close_http_clients
+from src.clients.llm_client import LLMClient
+from src.config.settings import Settings, get_settings
+from src.document_store import DocumentStore, create_document_store, default_document_store_path
+from src.embeddings.cached_embeddings import CachedEmbeddingClient
+from src.embeddings.openai_embeddings import create_embedding_client
+from src.rag_pipeline.basic_rag import create_rag_pipeline
+from src.rag_pipeline.cache import CompletionCache, SemanticCache
+from src.rag_pipeline.compressor import ExtractiveCompressor, create_compressor
+from src.retriever.bm25_retriever import BM25Retriever, preload_tokenizer
+from src.retriever.factory import create_retriever
+from src.snapshot import IndexSnapshot, load_index_snapshot
+from src.vector_store.chroma_vector_store import create_vector_store
+
+logger = logging.getLogger(__name__)
+
+
+class NotReadyError(RuntimeError):
+    """索引尚未预热完成"""
+
+
+class _WarmUpCancelled(Exception):
+    """应用关闭时中止预热"""
+
+
+class AppContainer:
+    """
+    应用级对象容器
+
+    Embedding 客户端、向量数据库、文档存储、LLM 客户端（连接池）、检索器和 Agent
+    在进程内只创建一次，各请求只读共享，应用关闭时统一释放。
+
+    创建容器本身不做任何耗时操作：main.py 的 lifespan 在后台线程中调用 warm_up()
+    打开存储、加载分词词典并构建 BM25 索引，期间 /ready 返回进度，预热完成后才接收 RAG 请求。
+    文档存储变化后（如文件监听器更新索引），BM25 索引在后台按存储的变化记录增量更新
+    （无法增量时完整重建），更新完成前继续使用旧索引，但答案缓存不再命中旧版本的答案。
+    """
+
+    def __init__(self, settings: Optional[Settings] = None):
+        """
+        初始化容器（不创建任何客户端）
+
+        Args:
+            settings: 配置，默认使用全局配置
+        """
+        self.settings = settings or get_settings()
+        self._lock = threading.Lock()
+        self._closing = threading.Event()
+
+        # 预热状态：starting → warming → ready / failed / stopped
+        self.status = "starting"
+        self.stage = "pending"
+        self.error: Optional[str] = None
+        self.indexed_documents = 0
+        self.total_documents: Optional[int] = None
+        self._started_at = time.monotonic()
+        self._ready_after: Optional[float] = None
+
+        self.embedding_client = None
+        self.semantic_cache: Optional[SemanticCache] = None
+        self.completion_cache: Optional[CompletionCache] = None
+        self.compressor: Optional[ExtractiveCompressor] = None
+        self.snapshot: Optional[IndexSnapshot] = None
+        self._snapshot_ids = None
+        self.document_store: Optional[DocumentStore] = None
+        self.vector_store: Any = None
+        self.llm_client: Optional[LLMClient] = None
+        self.rag_agent: Optional[RAGAgentService] = None
+        self.llm_only_agent: Optional[RAGAgentService] = None
+
+        # 当前 RAG Pipeline 使用的 BM25 检索器及其对应的文档存储版本
+        self._bm25_retriever: Optional[BM25Retriever] = None
+        self._bm25_version: Optional[Hashable] = None
+        self._rag_pipeline = None
+        self._rebuilding = False
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def warm_up(self) -> None:
+        """
+        构建对象图并预热索引（阻塞，应在后台线程中调用）
+        """
+        self.status = "warming"
+        try:
+            # 1. Embedding 客户端和 LLM 客户端（所有 Agent 和 Pipeline 共享同一个连接池）；
+            #    查询向量在向量检索和语义答案缓存之间共享
+            self.stage = "clients"
+            self.embedding_client = CachedEmbeddingClient(create_embedding_client(
+                api_key=self.settings.openai_api_key,
+                model=self.settings.embedding_model,
+                dimensions=self.settings.embedding_dimensions,
+                base_url=self.settings.openai_api_base
+            ))
+            if self.settings.rag_completion_cache_enabled:
+                self.completion_cache = CompletionCache(max_entries=self.settings.rag_completion_cache_max_entries)
+            if self.settings.rag_semantic_cache_enabled:
+                self.semantic_cache = SemanticCache(
+                    similarity_threshold=self.settings.rag_semantic_cache_threshold,
+                    max_entries=self.settings.rag_semantic_cache_max_entries,
+                    ttl_seconds=self.settings.rag_semantic_cache_ttl,
+                    persist_path=self.settings.rag_semantic_cache_path or None
+                )
+            if self.settings.rag_compression_enabled:
+                self.compressor = create_compressor(
+                    scoring=self.settings.rag_compression_scoring,
+                    max_sentences=self.settings.rag_compression_max_sentences,
+                    embedding_client=self.embedding_client
+                )
+            self.llm_client = LLMClient()
+            coalesce = self.settings.agent_coalesce_requests
+            self.rag_agent = RAGAgentService(llm_client=self.llm_client, coalesce_requests=coalesce)
+            self.llm_only_agent = RAGAgentService(rag_pipeline=None, llm_client=self.llm_client, coalesce_requests=coalesce)
+
+            # 2. 文档存储和向量数据库（配置了索引快照时都从快照打开）
+            self.stage = "stores"
+            self._open_stores()
+            self._check_closing()
+
+            # 3. 分词词典（建 BM25 索引和处理第一个查询前加载）
+            self.stage = "tokenizer"
+            preload_tokenizer("zh", cache_dir=self.settings.jieba_cache_dir or None)
+            self._check_closing()
+
+            # 4. BM25 索引
+            self.stage = "bm25"
+            version = self.document_store.version
+            self._install_pipeline(version, self._build_bm25_retriever(track_progress=True))
+
+            self.stage = "done"
+            self._ready_after = time.monotonic() - self._started_at
+            self.status = "ready"
+            logger.info(f"索引预热完成，用时 {self._ready_after:.1f} 秒（{self.indexed_documents} 个文本块）")
+        except _WarmUpCancelled:
+            self.status = "stopped"
+        except Exception as e:
+            self.status = "failed"
+            self.error = str(e)
+            logger.exception(f"索引预热失败: {e}")
+
+    def get_rag_agent(self) -> RAGAgentService:
+        """获取共享的 RAG Agent；文档存储有变化时在后台重建 BM25 索引"""
+        if not self.ready:
+            raise NotReadyError(self.stage)
+        self._refresh_in_background()
+        return self.rag_agent
+
+    def get_llm_only_agent(self) -> RAGAgentService:
+        """获取共享的纯 LLM Agent"""
+        if self.llm_only_agent is None:
+            raise NotReadyError(self.stage)
+        return self.llm_only_agent
+
+    def readiness(self) -> Dict[str, Any]:
+        """预热进度，供 /ready 接口返回"""
+        return {
+            "status": self.status,
+            "stage": self.stage,
+            "indexed_documents": self.indexed_documents,
+            "total_documents": self.total_documents,
+            "elapsed_seconds": round(
+                self._ready_after if self._ready_after is not None else time.monotonic() - self._started_at, 3
+            ),
+            "error": self.error,
+        }
+
+    def _open_stores(self) -> None:
+        """打开文档存储和向量数据库"""
+        if self.settings.index_snapshot_path:
+            self.snapshot = load_index_snapshot(
+                self.settings.index_snapshot_path,
+                self.settings.embedding_model,
+                self.settings.embedding_dimensions,
+                verify=self.settings.index_snapshot_verify
+            )
+            self.document_store = self.snapshot.open_document_store()
+            self._snapshot_ids = self.snapshot.load_ids()
+            self.vector_store = self.snapshot.create_vector_store(self.document_store, ids=self._snapshot_ids)
+            return
+
+        self.document_store = create_document_store(
+            store_type="sqlite",
+            db_path=default_document_store_path(
+                self.settings.vector_store_path, self.settings.vector_store_collection_name
+            )
+        )
+        self.vector_store = create_vector_store(
+            store_type="chroma",
+            collection_name=self.settings.vector_store_collection_name,
+            embedding_dimensions=self.settings.embedding_dimensions,
+            vector_store_path=self.settings.vector_store_path,
+            embedding_function=self.embedding_client.embed_text  # 传递给 Chroma 的嵌入函数
+        )
+
+    def _build_bm25_retriever(self, track_progress: bool = False) -> BM25Retriever:
+        """构建 BM25 检索器；应用关闭时中止"""
+        if self.snapshot is not None:
+            retriever = self.snapshot.create_bm25_retriever(self.document_store, ids=self._snapshot_ids)
+            if track_progress:
+                self.total_documents = self.indexed_documents = len(retriever.doc_ids)
+            return retriever
+
+        if track_progress:
+            self.total_documents = self.document_store.count()
+
+        def on_progress(count: int) -> None:
+            self._check_closing()
+            if track_progress:
+                self.indexed_documents = count
+
+        retriever = BM25Retriever(language="zh", document_store=self.document_store, progress=on_progress)
+        if track_progress:
+            self.indexed_documents = len(retriever.doc_ids)
+        return retriever
+
+    def _install_pipeline(self, version: Hashable, bm25_retriever: BM25Retriever) -> None:
+        """用新的 BM25 检索器组装混合检索器和 RAG Pipeline，替换到共享的 Agent 上"""
+        retriever = create_retriever(
+            vector_store=self.vector_store,
+            embedding_client=self.embedding_client,
+            retriever_type="hybrid",
+            bm25_retriever=bm25_retriever,
+            vector_weight=0.7,
+            bm25_weight=0.3,
+            language="zh"
+        )
+        self._rag_pipeline = create_rag_pipeline(
+            retriever=retriever,
+            llm_client=self.llm_client,
+            semantic_cache=self.semantic_cache,
+            embedding_client=self.embedding_client,
+            index_version=self._cache_version(version),
+            completion_cache=self.completion_cache,
+            compressor=self.compressor
+        )
+        self.rag_agent.set_rag_pipeline(self._rag_pipeline)
+        self._bm25_retriever = bm25_retriever
+        self._bm25_version = version
+
+    def _cache_version(self, version: Hashable) -> Hashable:
+        """答案缓存使用的索引版本：带上文档存储的标识，存储删除重建后版本号重新计数也不会命中旧答案"""
+        store_id = self.document_store.store_id
+        return f"{store_id}:{version}" if store_id else version
+
+    def _refresh_in_background(self) -> None:
+        """文档存储版本变化时启动一次后台更新（同一时间最多一个）"""
+        version = self.document_store.version
+        with self._lock:
+            if version == self._bm25_version or self._rebuilding:
+                return
+            self._rebuilding = True
+            # 向量检索已经看到新内容：更新期间答案缓存既不命中旧版本的答案，
+            # 基于旧 BM25 索引生成的答案也只记在临时版本下，更新完成后随之失效
+            self._rag_pipeline.index_version = f"{self._cache_version(version)}:rebuilding"
+        threading.Thread(target=self._rebuild, args=(version,), name="bm25-rebuild", daemon=True).start()
+
+    def _rebuild(self, version: Hashable) -> None:
+        try:
+            changes = self.document_store.changes_since(self._bm25_version)
+            if changes is None:
+                self._install_pipeline(version, self._build_bm25_retriever())
+                logger.info("文档存储已变化，BM25 索引已重建")
+            else:
+                version, upserted_ids, deleted_ids = changes
+                retriever = self._bm25_retriever.apply_changes(
+                    upserted_ids, deleted_ids, progress=lambda count: self._check_closing()
+                )
+                self._install_pipeline(version, retriever)
+                logger.info(
+                    f"文档存储已变化，BM25 索引已增量更新（写入 {len(upserted_ids)} 个、删除 {len(deleted_ids)} 个文本块）"
+                )
+        except _WarmUpCancelled:
+            pass
+        except Exception as e:
+            logger.exception(f"重建 BM25 索引失败: {e}")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+
+    def _check_closing(self) -> None:
+        if self._closing.is_set():
+            raise _WarmUpCancelled()
+
+    def stop(self) -> None:
+        """通知预热和后台重建尽快结束"""
+        self._closing.set()
+
+    async def aclose(self) -> None:
+        """释放连接池、向量数据库和文档存储"""
+        self.stop()
+        if self.llm_client is not None:
+            await self.llm_client.aclose()
+        await close_http_clients()
+        if self.semantic_cache is not None:
+            self.semantic_cache.close()
+        if self.vector_store is not None and hasattr(self.vector_store, "close"):
+            self.vector_store.close()
+        if self.document_store is not None:
+            self.document_store.close()
+
+
+def create_app_container(settings: Optional[Settings] = None) -> AppContainer:
+    """
+    创建应用级对象容器（未预热）
+
+    Args:
+        settings: 配置，默认使用全局配置
+
+    Returns:
+        AppContainer: 对象容器
+    """
+    return AppContainer(settings)
@@ -0,0 +1,9 @@
+from src.document_store.base import DocumentStore, default_document_store_path
+from src.document_store.sqlite_document_store import SQLiteDocumentStore, create_document_store
+
+__all__ = [
+    "DocumentStore",
+    "SQLiteDocumentStore",
+    "create_document_store",
+    "default_document_store_path",
+]
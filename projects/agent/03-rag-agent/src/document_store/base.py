@@ -0,0 +1,97 @@
+import os
+from typing import Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from src.ingestion.base import Document
+
+
+def default_document_store_path(vector_store_path: str, collection_name: str) -> str:
+    """默认的文档存储路径：与向量数据库放在同一目录，按集合区分"""
+    return os.path.join(vector_store_path, f"{collection_name}_documents.sqlite3")
+
+
+class DocumentStore:
+    """文档存储基础接口
+
+    按文本块ID保存文本和元数据。检索索引只保存ID和分数，
+    最终的 top-k 结果再从文档存储中取回完整内容。
+    """
+    
+    def add_documents(self, documents: Sequence[Document]) -> None:
+        """写入（或覆盖）文档
+        
+        Args:
+            documents: 文档列表，每个文档都必须有ID
+        """
+        raise NotImplementedError
+    
+    def get_documents(self, ids: Sequence[str]) -> List[Optional[Document]]:
+        """按ID取回文档
+        
+        Args:
+            ids: 文档ID列表
+            
+        Returns:
+            List[Optional[Document]]: 与 ids 一一对应的文档，不存在的为 None
+        """
+        raise NotImplementedError
+    
+    def get_document(self, doc_id: str) -> Optional[Document]:
+        """按ID取回单个文档"""
+        return self.get_documents([doc_id])[0]
+    
+    def delete_documents(self, ids: Sequence[str]) -> None:
+        """按ID删除文档
+        
+        Args:
+            ids: 文档ID列表
+        """
+        raise NotImplementedError
+    
+    def iter_texts(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        """遍历全部文档的 (ID, 文本)，用于构建关键词索引
+        
+        Args:
+            batch_size: 每次从存储中读取的数量
+            
+        Yields:
+            Tuple[str, str]: 文档ID和文本
+        """
+        raise NotImplementedError
+    
+    def clear(self) -> None:
+        """删除全部文档"""
+        raise NotImplementedError
+    
+    def count(self) -> int:
+        """文档数量"""
+        raise NotImplementedError
+    
+    @property
+    def version(self) -> Hashable:
+        """内容版本，文档增删后会变化，用于判断基于存储构建的索引（以及答案缓存）是否过期"""
+        raise NotImplementedError
+
+    @property
+    def store_id(self) -> Optional[str]:
+        """存储实例的标识，删除后重新创建的存储得到新的标识；version 只在同一标识下可比较
+
+        Returns:
+            Optional[str]: 标识，不支持时为 None
+        """
+        return None
+
+    def changes_since(self, version: Hashable) -> Optional[Tuple[Hashable, List[str], List[str]]]:
+        """指定版本之后写入和删除的文档ID，用于增量更新基于存储构建的索引
+
+        Args:
+            version: 索引构建时的内容版本
+
+        Returns:
+            Optional[Tuple[Hashable, List[str], List[str]]]: (当前版本, 写入或覆盖的ID, 删除的ID)；
+                无法确定变化（不记录变化、或变化记录不完整）时返回 None，调用方应完整重建
+        """
+        return None
+
+    def close(self) -> None:
+        """释放资源"""
+        pass
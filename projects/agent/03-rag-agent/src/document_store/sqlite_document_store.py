@@ -0,0 +1,245 @@
+import json
+import os
+import secrets
+import sqlite3
+import threading
+from typing import Hashable, Iterator, List, Optional, Sequence, Tuple
+
+from src.document_store.base import DocumentStore
+from src.ingestion.base import Document
+
+# SQLite 单条语句的参数数量有上限，按批查询/删除
+_MAX_VARIABLES = 500
+
+
+class SQLiteDocumentStore(DocumentStore):
+    """
+    基于 SQLite 的文档存储
+
+    使用 WAL 模式，构建脚本写入时服务进程仍可读取。
+    连接在线程之间共享，所有操作由一把锁串行化。
+    内容版本保存在数据库头部的 user_version 中，每次写入在同一事务内递增，
+    因此对所有连接可见，并且在重启、备份（索引快照）后保持不变。
+    每个文档ID最近一次写入或删除时的版本记录在 document_changes 表中，
+    服务进程据此只为变化的文档增量更新 BM25 索引。
+    数据库新建时在 store_meta 中写入一个随机的存储标识：删除目录重建后 user_version 会从 0 重新计数，
+    持久化的答案缓存需要同时比较标识和版本。
+    """
+    
+    def __init__(self, db_path: str, read_only: bool = False):
+        """
+        初始化文档存储
+        
+        Args:
+            db_path: 数据库文件路径
+            read_only: 以只读、不可变方式打开（如索引快照中的文件），不写入任何日志文件
+        """
+        self.db_path = db_path
+        self.read_only = read_only
+        self._lock = threading.RLock()
+        
+        if read_only:
+            uri = f"file:{os.path.abspath(db_path)}?mode=ro&immutable=1"
+            self._conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            return
+        
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id TEXT PRIMARY KEY, text TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS document_changes ("
+            "id TEXT PRIMARY KEY, version INTEGER NOT NULL, deleted INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS document_changes_version ON document_changes (version)")
+        # 变化记录从哪个版本开始是完整的：新建的数据库从 0 开始，
+        # 没有变化记录的旧数据库从当前版本开始，更早的版本只能完整重建
+        self._conn.execute("CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self._conn.execute(
+            "INSERT OR IGNORE INTO store_meta (key, value) VALUES ('changes_start', ?)",
+            (self._conn.execute("PRAGMA user_version").fetchone()[0],)
+        )
+        self._conn.execute(
+            "INSERT OR IGNORE INTO store_meta (key, value) VALUES ('store_id', ?)",
+            (secrets.randbits(63),)
+        )
+        self._conn.commit()
+    
+    def add_documents(self, documents: Sequence[Document]) -> None:
+        rows = []
+        for document in documents:
+            if not document.id:
+                raise ValueError("写入文档存储的文档必须有ID")
+            rows.append((
+                document.id,
+                document.text,
+                json.dumps(document.metadata, ensure_ascii=False, default=str)
+            ))
+        
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (id, text, metadata) VALUES (?, ?, ?)",
+                rows
+            )
+            self._record_changes([row[0] for row in rows], deleted=False)
+            self._conn.commit()
+    
+    def get_documents(self, ids: Sequence[str]) -> List[Optional[Document]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(ids), _MAX_VARIABLES):
+                batch = list(ids[start:start + _MAX_VARIABLES])
+                placeholders = ",".join("?" * len(batch))
+                cursor = self._conn.execute(
+                    f"SELECT id, text, metadata FROM documents WHERE id IN ({placeholders})",
+                    batch
+                )
+                for doc_id, text, metadata in cursor:
+                    found[doc_id] = Document(text=text, metadata=json.loads(metadata), id=doc_id)
+        
+        return [found.get(doc_id) for doc_id in ids]
+    
+    def delete_documents(self, ids: Sequence[str]) -> None:
+        with self._lock:
+            for start in range(0, len(ids), _MAX_VARIABLES):
+                batch = list(ids[start:start + _MAX_VARIABLES])
+                placeholders = ",".join("?" * len(batch))
+                self._conn.execute(f"DELETE FROM documents WHERE id IN ({placeholders})", batch)
+            self._record_changes(ids, deleted=True)
+            self._conn.commit()
+    
+    def iter_texts(self, batch_size: int = 1000) -> Iterator[Tuple[str, str]]:
+        # 按主键分页读取，每页单独加锁，遍历期间不阻塞写入
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, text FROM documents WHERE id > ? ORDER BY id LIMIT ?",
+                    (last_id, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last_id = rows[-1][0]
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM documents")
+            version = self._bump_version()
+            # 清空后不再逐个记录删除的ID，更早的版本只能完整重建
+            self._conn.execute("DELETE FROM document_changes")
+            self._conn.execute("UPDATE store_meta SET value = ? WHERE key = 'changes_start'", (version,))
+            self._conn.commit()
+    
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+    
+    @property
+    def version(self) -> Hashable:
+        with self._lock:
+            return self._conn.execute("PRAGMA user_version").fetchone()[0]
+    
+    @property
+    def store_id(self) -> Optional[str]:
+        with self._lock:
+            try:
+                row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'store_id'").fetchone()
+            except sqlite3.OperationalError:
+                # 没有 store_meta 表（如旧版本导出的只读快照）
+                return None
+        return f"{row[0]:016x}" if row is not None else None
+    
+    def changes_since(self, version: Hashable) -> Optional[Tuple[Hashable, List[str], List[str]]]:
+        if not isinstance(version, int):
+            return None
+        with self._lock:
+            # 在同一个读事务中读取版本和变化记录，保证两者一致
+            self._conn.execute("BEGIN")
+            try:
+                current = self._conn.execute("PRAGMA user_version").fetchone()[0]
+                start = self._conn.execute("SELECT value FROM store_meta WHERE key = 'changes_start'").fetchone()
+                if start is None or version < start[0] or version > current:
+                    return None
+                rows = self._conn.execute(
+                    "SELECT id, deleted FROM document_changes WHERE version > ?", (version,)
+                ).fetchall()
+            except sqlite3.OperationalError:
+                # 没有变化记录表（如旧版本导出的只读快照）
+                return None
+            finally:
+                self._conn.commit()
+        upserted = [doc_id for doc_id, deleted in rows if not deleted]
+        deleted = [doc_id for doc_id, deleted in rows if deleted]
+        return current, upserted, deleted
+
+    def _bump_version(self) -> int:
+        """递增内容版本；在写入语句之后、提交之前调用，此时本连接持有写锁，其他连接不会同时递增
+
+        Returns:
+            int: 新的版本
+        """
+        current = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        self._conn.execute(f"PRAGMA user_version = {current + 1}")
+        return current + 1
+
+    def _record_changes(self, ids: Sequence[str], deleted: bool) -> None:
+        """递增内容版本，并把这些ID的最近变化记为新版本；调用方持有锁并负责提交"""
+        version = self._bump_version()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO document_changes (id, version, deleted) VALUES (?, ?, ?)",
+            [(doc_id, version, int(deleted)) for doc_id in ids]
+        )
+    
+    def backup(self, target_path: str) -> None:
+        """
+        把当前内容复制为一个独立的数据库文件（使用 SQLite 在线备份，复制期间不阻塞读取）
+        
+        Args:
+            target_path: 目标文件路径，已存在时被覆盖
+        """
+        if os.path.exists(target_path):
+            os.remove(target_path)
+        target = sqlite3.connect(target_path)
+        try:
+            with self._lock:
+                self._conn.backup(target)
+            # 目标文件单独分发，不使用 WAL，避免只读打开时依赖 -wal/-shm 文件
+            target.execute("PRAGMA journal_mode=DELETE")
+            target.commit()
+        finally:
+            target.close()
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_document_store(
+    store_type: str = "sqlite",
+    db_path: Optional[str] = None,
+    read_only: bool = False
+) -> DocumentStore:
+    """创建文档存储实例
+    
+    Args:
+        store_type: 存储类型，目前支持 "sqlite"
+        db_path: 数据库文件路径
+        read_only: 是否只读打开
+        
+    Returns:
+        DocumentStore: 文档存储实例
+    """
+    if store_type == "sqlite":
+        if not db_path:
+            raise ValueError("sqlite 文档存储需要指定 db_path")
+        return SQLiteDocumentStore(db_path, read_only=read_only)
+    
+    raise ValueError(f"Unsupported store_type: {store_type}")
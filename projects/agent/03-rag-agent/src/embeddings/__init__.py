@@ -1,9 +1,10 @@
 from src.embeddings.base import EmbeddingClient
+from src.embeddings.cached_embeddings import CachedEmbeddingClient
 from src.embeddings.openai_embeddings import OpenAIEmbeddingClient, create_embedding_client
 
 __all__ = [
     "EmbeddingClient",
+    "CachedEmbeddingClient",
     "OpenAIEmbeddingClient",
     "create_embedding_client",
 ]
-
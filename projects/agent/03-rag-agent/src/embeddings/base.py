@@ -1,5 +1,7 @@
 from typing import List, Optional
 
+import numpy as np
+
 
 class EmbeddingClient:
     """Embedding客户端基础接口"""
@@ -36,7 +38,24 @@ class EmbeddingClient:
             List[List[float]]: Embedding向量列表
         """
         raise NotImplementedError
-    
+
+    def embed_documents_array(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """为多个文本生成Embedding向量，以 float32 矩阵形式返回
+
+        默认实现基于 embed_documents 转换，子类可覆盖以避免中间的 Python 列表。
+
+        Args:
+            texts: 要生成Embedding的文本列表
+            batch_size: 批量处理大小
+
+        Returns:
+            np.ndarray: 形状为 (len(texts), dimensions) 的 float32 矩阵
+        """
+        embeddings = self.embed_documents(texts, batch_size=batch_size)
+        if not embeddings:
+            return np.empty((0, self.dimensions or 0), dtype=np.float32)
+        return np.asarray(embeddings, dtype=np.float32)
+
     def get_model_name(self) -> str:
         """获取当前使用的Embedding模型名称
         
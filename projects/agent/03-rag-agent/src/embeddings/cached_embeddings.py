@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.embeddings.base import EmbeddingClient
+
+
+class CachedEmbeddingClient(EmbeddingClient):
+    """
+    带查询向量缓存的 Embedding 客户端
+
+    包装另一个 Embedding 客户端，按 LRU 缓存最近的 embed_text 结果。同一次请求中向量检索和
+    语义答案缓存都需要查询向量，共享同一个实例时只请求一次 Embedding 接口；
+    重复的查询也不再请求。批量接口（建索引使用）直接转发，不缓存。
+    """
+
+    def __init__(self, client: EmbeddingClient, max_entries: int = 1024):
+        """
+        初始化缓存
+
+        Args:
+            client: 实际请求 Embedding 接口的客户端
+            max_entries: 缓存的查询数量上限
+        """
+        super().__init__(model=client.model, dimensions=client.dimensions)
+        self.client = client
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def embed_text(self, text: str) -> List[float]:
+        key = " ".join(text.strip().split())
+        with self._lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return embedding
+            self._misses += 1
+
+        embedding = self.client.embed_text(text)
+        with self._lock:
+            self._cache[key] = embedding
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return embedding
+
+    def embed_documents(self, texts: List[str], batch_size: Optional[int] = None) -> List[List[float]]:
+        return self.client.embed_documents(texts, batch_size=batch_size)
+
+    def embed_documents_array(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        return self.client.embed_documents_array(texts, batch_size=batch_size)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """查询向量缓存的命中统计"""
+        with self._lock:
+            return {"size": len(self._cache), "hits": self._hits, "misses": self._misses}
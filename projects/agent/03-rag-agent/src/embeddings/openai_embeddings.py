@@ -1,18 +1,27 @@
+import base64
 import logging
+from functools import lru_cache
+from types import ModuleType
 from typing import List, Optional
 
-try:
-    from openai import OpenAI
-    from openai import OpenAIError
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
-    print("Warning: openai package not installed. Install it with: pip install openai")
+import httpx
+import numpy as np
 
+from src.clients.http_pool import get_sync_http_client
 from src.config.settings import get_settings
 from src.embeddings.base import EmbeddingClient
 
 
+@lru_cache()
+def _import_openai() -> ModuleType:
+    """延迟导入 openai SDK（导入耗时约 1 秒），只在创建客户端时加载"""
+    try:
+        import openai
+    except ImportError:
+        raise ImportError("openai package not installed. Install it with: pip install openai")
+    return openai
+
+
 class OpenAIEmbeddingClient(EmbeddingClient):
     """OpenAI兼容的Embedding客户端"""
     
@@ -39,16 +48,17 @@ class OpenAIEmbeddingClient(EmbeddingClient):
             dimensions=dimensions or settings.embedding_dimensions
         )
         
-        if not OPENAI_AVAILABLE:
-            raise ImportError("openai package not installed. Install it with: pip install openai")
-        
-        # 初始化OpenAI客户端
-        self.client = OpenAI(
+        # 初始化OpenAI客户端（复用进程内共享的连接池，超时单独设置）
+        self._openai = _import_openai()
+        self.client = self._openai.OpenAI(
             api_key=api_key or settings.openai_api_key,
-            base_url=base_url or settings.openai_api_base
+            base_url=base_url or settings.openai_api_base,
+            http_client=get_sync_http_client(),
+            timeout=httpx.Timeout(settings.embedding_timeout, connect=settings.http_connect_timeout)
         )
         
         self.batch_size = settings.embedding_batch_size
+        self.encoding_format = settings.embedding_encoding_format
         self.logger = logging.getLogger(__name__)
     
     def embed_text(self, text: str) -> List[float]:
@@ -75,7 +85,7 @@ class OpenAIEmbeddingClient(EmbeddingClient):
             
             return response.data[0].embedding
         
-        except OpenAIError as e:
+        except self._openai.OpenAIError as e:
             self.logger.error(f"OpenAI API错误: {e}")
             raise RuntimeError(f"Embedding生成失败: {str(e)}")
         
@@ -121,7 +131,7 @@ class OpenAIEmbeddingClient(EmbeddingClient):
             
             return embeddings
         
-        except OpenAIError as e:
+        except self._openai.OpenAIError as e:
             self.logger.error(f"OpenAI API错误 (批量处理): {e}")
             raise RuntimeError(f"批量Embedding生成失败: {str(e)}")
         
@@ -129,6 +139,100 @@ class OpenAIEmbeddingClient(EmbeddingClient):
             self.logger.error(f"批量Embedding生成过程中发生未知错误: {e}")
             raise RuntimeError(f"批量Embedding生成失败: {str(e)}")
 
+    def embed_documents_array(self, texts: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+        """为多个文本生成Embedding向量，直接解码到预分配的 float32 矩阵
+
+        优先以 base64 格式请求向量，跳过 JSON 浮点数解析和中间的 Python 列表；
+        服务端不支持 base64 时自动回退为 float 格式。
+
+        Args:
+            texts: 要生成Embedding的文本列表
+            batch_size: 批量处理大小
+
+        Returns:
+            np.ndarray: 形状为 (len(texts), dimensions) 的 float32 矩阵
+        """
+        if not texts:
+            return np.empty((0, self.dimensions or 0), dtype=np.float32)
+
+        batch_size = batch_size or self.batch_size
+        matrix: Optional[np.ndarray] = None
+
+        try:
+            for i in range(0, len(texts), batch_size):
+                batch_texts = texts[i:i+batch_size]
+                cleaned_texts = [" ".join(text.strip().split()) or " " for text in batch_texts]
+
+                response = self._create_embeddings(cleaned_texts)
+                self._check_batch(response.data, len(cleaned_texts))
+
+                for item in response.data:
+                    vector = self._decode_embedding(item.embedding)
+                    if matrix is None:
+                        matrix = self._allocate_matrix(len(texts), vector.shape[0])
+                    matrix[i + item.index] = vector
+
+            return matrix
+
+        except self._openai.OpenAIError as e:
+            self.logger.error(f"OpenAI API错误 (批量处理): {e}")
+            raise RuntimeError(f"批量Embedding生成失败: {str(e)}")
+
+        except Exception as e:
+            self.logger.error(f"批量Embedding生成过程中发生未知错误: {e}")
+            raise RuntimeError(f"批量Embedding生成失败: {str(e)}")
+
+    def _create_embeddings(self, inputs: List[str]):
+        """按当前传输格式请求Embedding，base64 不被支持时回退为 float 并重试
+
+        只有错误信息指向 encoding_format 时才回退；其他请求错误（如输入超长、输入无效）直接抛出，
+        不改变传输格式。
+        """
+        if self.encoding_format == "base64":
+            try:
+                return self.client.embeddings.create(
+                    model=self.model,
+                    input=inputs,
+                    encoding_format="base64"
+                )
+            except self._openai.BadRequestError as e:
+                if not self._is_encoding_format_error(e):
+                    raise
+                self.logger.warning(f"Embedding服务不支持 base64 传输，回退为 float 格式: {e}")
+                self.encoding_format = "float"
+
+        return self.client.embeddings.create(
+            model=self.model,
+            input=inputs,
+            encoding_format="float"
+        )
+
+    @staticmethod
+    def _is_encoding_format_error(error: Exception) -> bool:
+        """请求错误是否由 encoding_format 参数引起"""
+        message = str(error).lower()
+        return "encoding_format" in message or "encoding format" in message or "base64" in message
+
+    @staticmethod
+    def _check_batch(data, expected: int) -> None:
+        """校验接口返回的向量数量和序号与输入一一对应，避免结果矩阵中留下未写入的行"""
+        indices = sorted(item.index for item in data)
+        if indices != list(range(expected)):
+            raise ValueError(f"Embedding接口返回 {len(indices)} 条结果，与输入的 {expected} 条不一致")
+
+    @staticmethod
+    def _decode_embedding(embedding) -> np.ndarray:
+        """将接口返回的 base64 字符串或浮点数列表转换为 float32 向量"""
+        if isinstance(embedding, str):
+            return np.frombuffer(base64.b64decode(embedding), dtype="<f4")
+        return np.asarray(embedding, dtype=np.float32)
+
+    def _allocate_matrix(self, rows: int, dimensions: int) -> np.ndarray:
+        """预分配结果矩阵；配置的维度与实际返回不一致时以实际维度为准"""
+        if self.dimensions and self.dimensions != dimensions:
+            self.logger.warning(f"配置的Embedding维度 {self.dimensions} 与实际返回维度 {dimensions} 不一致")
+        return np.empty((rows, dimensions), dtype=np.float32)
+
 
 # 工厂函数：创建Embedding客户端实例
 def create_embedding_client(
@@ -1,21 +1,45 @@
 from src.ingestion.base import Document, ChunkResult, DocumentLoader, TextSplitter
+from src.ingestion.chunk_table import ChunkTable
 from src.ingestion.document_loader import (
     SimpleDocumentLoader,
     TextDocumentLoader,
     PDFDocumentLoader,
     MarkdownDocumentLoader,
 )
-from src.ingestion.text_splitter import RecursiveCharacterTextSplitter
+from src.ingestion.text_splitter import (
+    RecursiveCharacterTextSplitter,
+    TokenTextSplitter,
+    create_text_splitter,
+)
+from src.ingestion.tokenizer import (
+    TokenCounter,
+    EstimatedTokenCounter,
+    TiktokenCounter,
+    create_token_counter,
+    get_token_counter,
+)
+from src.ingestion.pipeline import IngestionPipeline, IngestionStats, make_document_id
 
 __all__ = [
     "Document",
     "ChunkResult",
     "DocumentLoader",
     "TextSplitter",
+    "ChunkTable",
     "SimpleDocumentLoader",
     "TextDocumentLoader",
     "PDFDocumentLoader",
     "MarkdownDocumentLoader",
     "RecursiveCharacterTextSplitter",
+    "TokenTextSplitter",
+    "create_text_splitter",
+    "TokenCounter",
+    "EstimatedTokenCounter",
+    "TiktokenCounter",
+    "create_token_counter",
+    "get_token_counter",
+    "IngestionPipeline",
+    "IngestionStats",
+    "make_document_id",
 ]
 
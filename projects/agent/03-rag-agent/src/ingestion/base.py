@@ -1,10 +1,13 @@
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional
 
 
-@dataclass
+@dataclass(slots=True)
 class Document:
-    """文档类，表示一个完整的文档或文档块"""
+    """文档类，表示一个完整的文档或文档块
+
+    使用 __slots__，每个实例省去一个属性字典；大批量文本块优先使用 ChunkTable 按需生成。
+    """
     text: str
     metadata: Dict[str, any] = field(default_factory=dict)
     id: Optional[str] = None
@@ -44,6 +47,18 @@ class DocumentLoader:
             List[Document]: 加载的文档列表
         """
         raise NotImplementedError
+    
+    def iter_documents(self, file_paths: Iterable[str], **kwargs) -> Iterator[Document]:
+        """逐个加载一组文件，单个文件失败不影响其他文件
+        
+        Args:
+            file_paths: 文件路径
+            **kwargs: 额外参数
+            
+        Yields:
+            Document: 加载的文档
+        """
+        raise NotImplementedError
 
 
 class TextSplitter:
@@ -0,0 +1,125 @@
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.ingestion.base import Document
+
+
+def default_checkpoint_dir(vector_store_path: str, collection_name: str) -> str:
+    """默认的检查点目录：与向量数据库放在同一目录，按集合区分"""
+    return os.path.join(vector_store_path, f"{collection_name}_checkpoint")
+
+
+class IngestionCheckpoint:
+    """
+    索引构建检查点
+
+    已完成 Embedding 的批次逐个写入检查点目录（每批一个 .npz 文件，先写临时文件再重命名），
+    构建中断后可以跳过检查点中已有的文本块继续运行；全部完成后由流水线统一发布到索引，再删除检查点。
+    """
+
+    META_FILE = "checkpoint.json"
+
+    def __init__(self, directory: str, config: Optional[Dict[str, Any]] = None):
+        """
+        初始化检查点
+
+        Args:
+            directory: 检查点目录
+            config: 构建配置，恢复时与检查点记录的配置不一致则检查点作废
+        """
+        self.directory = directory
+        self.config = config or {}
+        self._next_batch = 0
+
+    def exists(self) -> bool:
+        """检查点目录中是否有已完成的批次"""
+        return bool(self._batch_files())
+
+    def is_compatible(self) -> bool:
+        """检查点是否由相同配置的构建生成"""
+        meta_path = os.path.join(self.directory, self.META_FILE)
+        if not os.path.exists(meta_path):
+            return False
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("config") == self.config
+
+    def start(self, resume: bool = False) -> Set[str]:
+        """
+        开始一次构建
+
+        Args:
+            resume: 是否沿用已有检查点；否则（或配置不一致时）清空后重新开始
+
+        Returns:
+            Set[str]: 已完成 Embedding、可以跳过的文本块ID
+        """
+        if not resume or not self.is_compatible():
+            self.clear()
+
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, self.META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"config": self.config}, f, ensure_ascii=False)
+
+        completed: Set[str] = set()
+        files = self._batch_files()
+        for file_name in files:
+            with np.load(os.path.join(self.directory, file_name)) as data:
+                completed.update(data["ids"].tolist())
+        self._next_batch = int(files[-1][len("batch_"):-len(".npz")]) + 1 if files else 0
+        return completed
+
+    def write_batch(self, documents: List[Document], vectors: np.ndarray) -> None:
+        """
+        原子写入一个已完成 Embedding 的批次
+
+        Args:
+            documents: 文本块
+            vectors: 对应的向量矩阵
+        """
+        payload = json.dumps(
+            [{"text": doc.text, "metadata": doc.metadata} for doc in documents],
+            ensure_ascii=False,
+            default=str
+        )
+        path = os.path.join(self.directory, f"batch_{self._next_batch:08d}.npz")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                ids=np.array([doc.id for doc in documents], dtype=str),
+                vectors=np.asarray(vectors, dtype=np.float32),
+                documents=np.array(payload)
+            )
+        os.replace(tmp_path, path)
+        self._next_batch += 1
+
+    def iter_batches(self) -> Iterator[Tuple[List[Document], np.ndarray]]:
+        """按写入顺序读取检查点中的批次"""
+        for file_name in self._batch_files():
+            with np.load(os.path.join(self.directory, file_name)) as data:
+                ids = data["ids"].tolist()
+                vectors = data["vectors"]
+                payload = json.loads(str(data["documents"]))
+            documents = [
+                Document(text=item["text"], metadata=item["metadata"], id=doc_id)
+                for doc_id, item in zip(ids, payload)
+            ]
+            yield documents, vectors
+
+    def clear(self) -> None:
+        """删除检查点"""
+        shutil.rmtree(self.directory, ignore_errors=True)
+        self._next_batch = 0
+
+    def _batch_files(self) -> List[str]:
+        """已完成的批次文件（忽略未写完的临时文件）"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(
+            name for name in os.listdir(self.directory)
+            if name.startswith("batch_") and name.endswith(".npz")
+        )
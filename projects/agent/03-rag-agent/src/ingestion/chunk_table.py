@@ -0,0 +1,183 @@
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.ingestion.base import Document
+
+# 文本块在原文中的位置 (start, end, tail_start, tail_end)，与 text_splitter.ChunkSpan 相同
+_Span = Tuple[int, int, int, int]
+
+
+class ChunkTable:
+    """
+    列式文本块表
+
+    每个文本块只占用几个定长整数列（所属文档序号、块序号、原文偏移、token 数），
+    文本和元数据只按原文档各保存一份：文本块内容是原文的切片，元数据在访问时由
+    原文档元数据加上块信息拼出。百万级文本块不再对应百万个 Document 对象和元数据字典，
+    需要时再用 document(i) 或迭代按需生成与 split_document 完全相同的 Document。
+    """
+
+    def __init__(self):
+        self._parents: List[Document] = []
+        # 第 i 个原文档的文本块为 [_parent_offsets[i], _parent_offsets[i + 1])
+        self._parent_offsets = array("q", [0])
+
+        self.parent_index = array("i")
+        self.ordinal = array("i")
+        self.start = array("q")
+        self.end = array("q")
+        self.tail_start = array("q")
+        self.tail_end = array("q")
+        # 未统计 token 数时为 -1
+        self.token_count = array("i")
+
+    def add_document(
+        self,
+        document: Document,
+        spans: Sequence[_Span],
+        token_counts: Optional[Sequence[int]] = None
+    ) -> range:
+        """
+        加入一个原文档的全部文本块
+
+        Args:
+            document: 原文档（只保存引用，不复制文本和元数据）
+            spans: 文本块在原文中的位置
+            token_counts: 每个文本块的 token 数
+
+        Returns:
+            range: 新文本块在表中的行号
+        """
+        first = len(self.ordinal)
+        parent = len(self._parents)
+        count = len(spans)
+
+        self._parents.append(document)
+        self._parent_offsets.append(first + count)
+        self.parent_index.extend([parent] * count)
+        self.ordinal.extend(range(count))
+        for column, values in zip(
+            (self.start, self.end, self.tail_start, self.tail_end), zip(*spans)
+        ):
+            column.extend(values)
+        self.token_count.extend(token_counts if token_counts is not None else [-1] * count)
+
+        return range(first, first + count)
+
+    def __len__(self) -> int:
+        return len(self.ordinal)
+
+    def __getitem__(self, index: int) -> Document:
+        return self.document(index)
+
+    def __iter__(self) -> Iterator[Document]:
+        for index in range(len(self)):
+            yield self.document(index)
+
+    @property
+    def parent_count(self) -> int:
+        """原文档数量"""
+        return len(self._parents)
+
+    def parent(self, index: int) -> Document:
+        """文本块所属的原文档"""
+        return self._parents[self.parent_index[index]]
+
+    def chunk_total(self, index: int) -> int:
+        """文本块所属原文档的文本块总数"""
+        parent = self.parent_index[index]
+        return self._parent_offsets[parent + 1] - self._parent_offsets[parent]
+
+    def chunk_id(self, index: int) -> Optional[str]:
+        """文本块ID，与 split_document 生成的ID相同"""
+        parent_id = self.parent(index).id
+        return f"{parent_id}_chunk_{self.ordinal[index]}" if parent_id else None
+
+    def text(self, index: int) -> str:
+        """从原文中切出文本块内容"""
+        text = self.parent(index).text
+        start, end = self.start[index], self.end[index]
+        tail_start, tail_end = self.tail_start[index], self.tail_end[index]
+        if tail_start == tail_end:
+            return text[start:end]
+        return text[start:end] + text[tail_start:tail_end]
+
+    def bounds(self, index: int) -> Tuple[int, int]:
+        """文本块覆盖的原文区间 [start, end)"""
+        start, end = self.start[index], self.end[index]
+        tail_start, tail_end = self.tail_start[index], self.tail_end[index]
+        return (
+            start if start < end else tail_start,
+            tail_end if tail_start < tail_end else end,
+        )
+
+    def metadata(self, index: int, text: Optional[str] = None) -> Dict[str, Any]:
+        """
+        生成文本块元数据（每次调用返回新的字典）
+
+        Args:
+            index: 行号
+            text: 已取出的文本块内容，用于计算 chunk_size，避免重复切片
+
+        Returns:
+            Dict[str, Any]: 原文档元数据加上块信息
+        """
+        parent = self.parent(index)
+        if text is None:
+            text = self.text(index)
+        start, end = self.bounds(index)
+
+        metadata = parent.metadata.copy()
+        metadata.update({
+            "document_type": "chunk",
+            "chunk_id": self.ordinal[index],
+            "chunk_total": self.chunk_total(index),
+            "chunk_size": len(text),
+            "start": start,
+            "end": end,
+            "parent_id": parent.id
+        })
+        token_count = self.token_count[index]
+        if token_count >= 0:
+            metadata["token_count"] = token_count
+        return metadata
+
+    def document(self, index: int) -> Document:
+        """按需生成第 index 个文本块的 Document"""
+        if index < 0:
+            index += len(self)
+        text = self.text(index)
+        return Document(text=text, metadata=self.metadata(index, text), id=self.chunk_id(index))
+
+    def rows(self, parent: int) -> range:
+        """第 parent 个原文档的文本块行号"""
+        return range(self._parent_offsets[parent], self._parent_offsets[parent + 1])
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """以 numpy 数组返回各整数列的副本，便于批量统计和筛选
+
+        返回副本而不是视图：导出缓冲区期间 array 无法扩容，会影响之后继续加入文本块。
+        """
+        return {
+            name: np.frombuffer(column, dtype=np.int32 if column.typecode == "i" else np.int64).copy()
+            for name, column in (
+                ("parent_index", self.parent_index),
+                ("ordinal", self.ordinal),
+                ("start", self.start),
+                ("end", self.end),
+                ("tail_start", self.tail_start),
+                ("tail_end", self.tail_end),
+                ("token_count", self.token_count),
+            )
+        }
+
+    @property
+    def nbytes(self) -> int:
+        """整数列占用的字节数（不含共享的原文档）"""
+        columns = (
+            self.parent_index, self.ordinal, self.start, self.end,
+            self.tail_start, self.tail_end, self.token_count, self._parent_offsets,
+        )
+        return sum(column.itemsize * len(column) for column in columns)
@@ -0,0 +1,200 @@
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+_MASK64 = (1 << 64) - 1
+_WHITESPACE = re.compile(r"\s+")
+# 多项式滚动哈希的基数（奇数，按 2^64 取模自然溢出）
+_ROLLING_BASE = np.uint64(0x100000001B3)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 终结函数，把滚动哈希打散为均匀分布的 64 位值"""
+    values = values ^ (values >> np.uint64(30))
+    values = values * np.uint64(0xBF58476D1CE4E5B9)
+    values = values ^ (values >> np.uint64(27))
+    values = values * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def simhash(text: str, shingle_size: int = 4) -> int:
+    """
+    计算文本的 64 位 SimHash 指纹
+
+    文本先转小写并合并空白，再以字符 n-gram（中英文通用，无需分词）为特征。
+    每个不同的 n-gram 只投一票：否则目录点线、分隔线、表格填充等长串重复字符会主导指纹，
+    使共享这类填充的不相关文本得到相同的指纹。
+    特征哈希用 numpy 向量化计算，结果与进程和 Python 哈希种子无关，可以持久化。
+
+    Args:
+        text: 文本
+        shingle_size: n-gram 长度
+
+    Returns:
+        int: 64 位指纹
+    """
+    normalized = _WHITESPACE.sub(" ", text.lower()).strip()
+    codes = np.frombuffer(normalized.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if codes.size == 0:
+        return 0
+
+    size = min(shingle_size, codes.size)
+    count = codes.size - size + 1
+    with np.errstate(over="ignore"):
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(size):
+            hashes = hashes * _ROLLING_BASE + codes[offset:offset + count]
+        hashes = _mix64(hashes)
+    hashes = np.unique(hashes)
+    count = hashes.size
+
+    bits = (hashes[:, None] >> np.arange(64, dtype=np.uint64)) & np.uint64(1)
+    # 每一位上 1 的数量超过一半则指纹该位为 1
+    ones = bits.sum(axis=0, dtype=np.int64)
+    fingerprint = 0
+    for bit in np.flatnonzero(ones * 2 > count):
+        fingerprint |= 1 << int(bit)
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个 64 位指纹之间的汉明距离"""
+    return bin((a ^ b) & _MASK64).count("1")
+
+
+class SimHashIndex:
+    """
+    SimHash 近似查找索引
+
+    把 64 位指纹切成 max_distance + 1 段：汉明距离不超过 max_distance 的两个指纹
+    至少有一段完全相同（抽屉原理），因此只需比较分段相同的候选。
+    """
+
+    def __init__(self, max_distance: int = 3):
+        """
+        初始化索引
+
+        Args:
+            max_distance: 视为近似重复的最大汉明距离
+        """
+        self.max_distance = max_distance
+        segments = max_distance + 1
+        width = 64 // segments
+        # (位移, 掩码)，最后一段包含剩余的位
+        self._segments: List[Tuple[int, int]] = [
+            (i * width, (1 << (width if i < segments - 1 else 64 - i * width)) - 1)
+            for i in range(segments)
+        ]
+        self._tables: List[Dict[int, List[str]]] = [{} for _ in self._segments]
+        self._fingerprints: Dict[str, int] = {}
+
+    def add(self, key: str, fingerprint: int) -> None:
+        """加入一个指纹"""
+        if key in self._fingerprints:
+            self.remove([key])
+        self._fingerprints[key] = fingerprint
+        for table, (shift, mask) in zip(self._tables, self._segments):
+            table.setdefault((fingerprint >> shift) & mask, []).append(key)
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """移除指纹"""
+        for key in keys:
+            fingerprint = self._fingerprints.pop(key, None)
+            if fingerprint is None:
+                continue
+            for table, (shift, mask) in zip(self._tables, self._segments):
+                segment = (fingerprint >> shift) & mask
+                bucket = table.get(segment)
+                if bucket is not None:
+                    bucket.remove(key)
+                    if not bucket:
+                        del table[segment]
+
+    def find(self, fingerprint: int, max_distance: Optional[int] = None) -> Optional[str]:
+        """
+        查找一个近似重复的已有指纹
+
+        Args:
+            fingerprint: 指纹
+            max_distance: 最大汉明距离，默认使用索引的阈值（不能超过该阈值）
+
+        Returns:
+            Optional[str]: 找到的键
+        """
+        if max_distance is None or max_distance > self.max_distance:
+            max_distance = self.max_distance
+        for table, (shift, mask) in zip(self._tables, self._segments):
+            for key in table.get((fingerprint >> shift) & mask, ()):
+                if hamming_distance(fingerprint, self._fingerprints[key]) <= max_distance:
+                    return key
+        return None
+
+    def clear(self) -> None:
+        """清空索引"""
+        for table in self._tables:
+            table.clear()
+        self._fingerprints.clear()
+
+    def __len__(self) -> int:
+        return len(self._fingerprints)
+
+
+class ChunkDeduplicator:
+    """
+    文本块近似去重
+
+    按写入顺序保留第一次出现的文本块，之后与其 SimHash 汉明距离不超过阈值的文本块视为重复，
+    不再 Embedding 和写入索引。过短的文本块 SimHash 不可靠，只在指纹完全相同时去重。
+    """
+
+    def __init__(self, max_distance: int = 3, min_length: int = 64, shingle_size: int = 4):
+        """
+        初始化去重器
+
+        Args:
+            max_distance: 视为近似重复的最大汉明距离（64 位指纹）
+            min_length: 参与近似去重的最短文本长度
+            shingle_size: 字符 n-gram 长度
+        """
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.shingle_size = shingle_size
+        self.index = SimHashIndex(max_distance)
+
+    def signature(self, text: str) -> int:
+        """计算文本块指纹"""
+        return simhash(text, self.shingle_size)
+
+    def check(self, key: str, text: str, exact: bool = False) -> Tuple[Optional[str], int]:
+        """
+        检查文本块是否与已保留的文本块近似重复，不重复时登记为已保留
+
+        Args:
+            key: 文本块ID
+            text: 文本块内容
+            exact: 只在指纹完全相同时去重（如表格行组：字面相近但数据不同）
+
+        Returns:
+            Tuple[Optional[str], int]: 重复对象的ID（不重复时为 None）和文本块指纹
+        """
+        fingerprint = self.signature(text)
+        max_distance = 0 if exact or len(text) < self.min_length else None
+        duplicate_of = self.index.find(fingerprint, max_distance)
+
+        if duplicate_of is None or duplicate_of == key:
+            self.index.add(key, fingerprint)
+            return None, fingerprint
+        return duplicate_of, fingerprint
+
+    def add(self, key: str, fingerprint: int) -> None:
+        """登记一个已保留的文本块（如从索引清单恢复）"""
+        self.index.add(key, fingerprint)
+
+    def remove(self, keys: Iterable[str]) -> None:
+        """移除已删除的文本块"""
+        self.index.remove(keys)
+
+    def clear(self) -> None:
+        """清空已登记的文本块"""
+        self.index.clear()
@@ -1,30 +1,94 @@
+import importlib
 import os
-from typing import List, Optional
+import re
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import lru_cache
+from types import ModuleType
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from src.ingestion.base import Document, DocumentLoader
 
+# CSV 分块读取时每块的行数
+_CSV_READ_ROWS = 10000
 
-try:
-    from PyPDF2 import PdfReader
-except ImportError:
-    print("Warning: PyPDF2 not installed. PDF support will be limited.")
 
-try:
-    import pandas as pd
-except ImportError:
-    print("Warning: pandas not installed. Excel/CSV support will be disabled.")
-    pd = None
+@lru_cache()
+def _import_optional(module_name: str, purpose: str) -> ModuleType:
+    """
+    延迟导入可选依赖
+
+    pandas、PyPDF2、openpyxl 导入耗时较长（pandas 约 0.5 秒），只在第一次加载对应格式的文件时导入，
+    从不加载这类文件的进程（如 API 服务）不必付出这部分启动开销。
+
+    Args:
+        module_name: 模块名
+        purpose: 用途，用于未安装时的错误信息
+
+    Returns:
+        ModuleType: 模块
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        raise RuntimeError(f"{module_name} 未安装，无法{purpose}")
+
+
+def _open_pdf(file_path: str):
+    """打开 PDF 文件，返回 PyPDF2.PdfReader"""
+    return _import_optional("PyPDF2", "加载 PDF 文件").PdfReader(file_path)
+
+
+# 句子或段落的结束位置：中文句末标点、英文句末标点后接空白，以及空行
+_SENTENCE_END = re.compile(r"(?:[。！？!?…]|\.(?=\s))[”’\"'）)]*|\n\s*\n")
+
+
+def _split_trailing_fragment(text: str, max_chars: int) -> Tuple[str, str]:
+    """把文本末尾未结束的句子分离出来
+
+    Args:
+        text: 文本
+        max_chars: 可分离的最大长度，末尾片段更长（如没有标点的表格）时不分离
+
+    Returns:
+        Tuple[str, str]: (到最后一个句子结束处的文本, 末尾未结束的片段)
+    """
+    text = text.rstrip()
+    last_end = None
+    for match in _SENTENCE_END.finditer(text, max(0, len(text) - max_chars - 1)):
+        last_end = match.end()
+    if last_end is None:
+        return text, ""
+    return text[:last_end].rstrip(), text[last_end:].strip()
+
 
 class SimpleDocumentLoader(DocumentLoader):
     """简单文档加载器，支持txt、md和pdf格式"""
     
-    def __init__(self, supported_extensions: Optional[List[str]] = None):
+    def __init__(
+        self,
+        supported_extensions: Optional[List[str]] = None,
+        pdf_page_workers: int = 0,
+        pdf_pages_per_task: int = 8,
+        table_rows_per_part: int = 50,
+        table_part_max_chars: int = 0
+    ):
         """初始化文档加载器
         
         Args:
             supported_extensions: 支持的文件扩展名列表
+            pdf_page_workers: 解析单个 PDF 时的并行进程数，0 或 1 表示在当前进程中逐页解析
+            pdf_pages_per_task: 并行解析 PDF 时每个任务包含的页数
+            table_rows_per_part: CSV/Excel 每个行组的最大行数
+            table_part_max_chars: CSV/Excel 每个行组的最大字符数（含表头），0 表示不限制
         """
         self.supported_extensions = supported_extensions or [".txt", ".md", ".pdf", ".xlsx", ".csv"]
+        self.pdf_page_workers = pdf_page_workers
+        self.pdf_pages_per_task = pdf_pages_per_task
+        self.table_rows_per_part = table_rows_per_part
+        self.table_part_max_chars = table_part_max_chars
     
     def load(self, file_path: str, **kwargs) -> Document:
         """加载单个文档
@@ -36,21 +100,10 @@ class SimpleDocumentLoader(DocumentLoader):
         Returns:
             Document: 加载的文档
         """
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"文件不存在: {file_path}")
-        
-        file_extension = os.path.splitext(file_path)[1].lower()
-        
-        if file_extension not in self.supported_extensions:
-            raise ValueError(f"不支持的文件格式: {file_extension}")
+        file_extension = self._check_file(file_path)
         
         text = ""
-        metadata = {
-            "file_path": file_path,
-            "file_name": os.path.basename(file_path),
-            "file_extension": file_extension,
-            "document_type": "original"
-        }
+        metadata = self._base_metadata(file_path, file_extension)
         
         # 根据文件类型加载内容
         if file_extension in [".txt", ".md"]:
@@ -59,12 +112,8 @@ class SimpleDocumentLoader(DocumentLoader):
         elif file_extension == ".pdf":
             text = self._load_pdf(file_path, metadata)
         elif file_extension in [".xlsx"]:
-            if pd is None:
-                raise RuntimeError("pandas 未安装，无法加载 Excel 文件")
             text = self._load_excel(file_path, metadata)
         elif file_extension == ".csv":
-            if pd is None:
-                raise RuntimeError("pandas 未安装，无法加载 CSV 文件")
             text = self._load_csv(file_path, metadata)
         
         return Document(
@@ -73,34 +122,285 @@ class SimpleDocumentLoader(DocumentLoader):
             id=kwargs.get("id")
         )
     
+    def iter_load(self, file_path: str, **kwargs) -> Iterator[Document]:
+        """分段加载单个文档（生成器）
+        
+        PDF 按页惰性解析，每页产出一个文档（元数据含 page_number）；CSV/Excel 按行组产出
+        （元数据含 row_start/row_end）；下游可以在整个文件解析完之前开始分块。其他格式产出整个文档。
+        分段文档的元数据带有 part_index，用于生成各段稳定且唯一的ID。
+        
+        Args:
+            file_path: 文件路径
+            **kwargs: 额外参数
+            
+        Yields:
+            Document: 文档片段
+        """
+        file_extension = self._check_file(file_path)
+        
+        if file_extension == ".pdf":
+            yield from self.iter_pdf_pages(file_path)
+            return
+        
+        if file_extension in (".csv", ".xlsx"):
+            yield from self.iter_table_parts(file_path)
+            return
+        
+        yield self.load(file_path, **kwargs)
+    
+    # 跨页句子的最大长度：页末未结束的句子移到下一页开头，超过此长度时不移动
+    PDF_CARRY_MAX_CHARS = 1000
+    
+    def iter_pdf_pages(self, file_path: str) -> Iterator[Document]:
+        """逐页加载 PDF 文件，跳过没有文本的页面
+        
+        每页单独分块，文本块不会跨页；为了不把跨页的句子切成两段，
+        页末未结束的句子会移到下一页的开头（元数据 carried_chars 为移入的字符数）。
+        
+        Args:
+            file_path: PDF文件路径
+            
+        Yields:
+            Document: 单页文档
+        """
+        reader = self._open_pdf_checked(file_path)
+        total_pages = len(reader.pages)
+        
+        pending: Optional[Document] = None
+        for page_number, page_text in self._iter_pdf_page_texts(file_path, reader):
+            if not page_text.strip():
+                continue
+            metadata = self._base_metadata(file_path, ".pdf")
+            metadata.update({
+                "page_number": page_number,
+                "total_pages": total_pages,
+                "part_index": page_number
+            })
+            document = Document(text=page_text, metadata=metadata)
+            
+            if pending is not None:
+                head, fragment = _split_trailing_fragment(pending.text, self.PDF_CARRY_MAX_CHARS)
+                if fragment and head:
+                    pending.text = head
+                    separator = " " if fragment[-1].isascii() and page_text.lstrip()[:1].isascii() else ""
+                    document.text = fragment + separator + page_text.lstrip()
+                    metadata["carried_chars"] = len(fragment) + len(separator)
+                yield pending
+            pending = document
+        
+        if pending is not None:
+            yield pending
+    
     def load_directory(self, directory_path: str, **kwargs) -> List[Document]:
         """加载目录中的所有文档
         
         Args:
             directory_path: 目录路径
-            **kwargs: 额外参数
+            **kwargs: 额外参数（parallel、max_workers、timeout 见 iter_documents）
             
         Returns:
             List[Document]: 加载的文档列表
         """
+        return list(self.iter_directory(directory_path, **kwargs))
+    
+    def iter_directory(self, directory_path: str, **kwargs) -> Iterator[Document]:
+        """逐个加载目录中的文档（生成器），不在内存中保留整个语料
+        
+        Args:
+            directory_path: 目录路径
+            **kwargs: 额外参数（parallel、max_workers、timeout 见 iter_documents）
+            
+        Yields:
+            Document: 加载的文档
+        """
+        yield from self.iter_documents(self.iter_file_paths(directory_path), **kwargs)
+    
+    def iter_documents(
+        self,
+        file_paths: Iterable[str],
+        parallel: bool = False,
+        max_workers: Optional[int] = None,
+        timeout: Optional[float] = None,
+        on_error: Optional[Callable[[str, Exception], None]] = None,
+        stream_parts: bool = False,
+        **kwargs
+    ) -> Iterator[Document]:
+        """加载一组文件，单个文件失败不会影响其他文件
+        
+        并行模式下使用进程池解析文件（PDF、Excel 解析是 CPU 密集型），
+        按完成顺序返回文档；超过 timeout 的文件会被放弃并回收对应的工作进程。
+        
+        Args:
+            file_paths: 文件路径
+            parallel: 是否使用进程池并行加载
+            max_workers: 并行进程数，默认使用 CPU 核数
+            timeout: 单个文件的加载超时时间（秒），仅并行模式有效
+            on_error: 文件加载失败时的回调，默认打印错误信息
+            stream_parts: 是否按 iter_load 分段产出（如 PDF 逐页），而不是每个文件一个文档；
+                分段模式下文件中途失败时，之前的片段已经产出
+            **kwargs: 传递给 load 的额外参数
+            
+        Yields:
+            Document: 加载的文档
+        """
+        on_error = on_error or _print_load_error
+        
+        if not parallel:
+            load = self.iter_load if stream_parts else self._load_as_list
+            for file_path in file_paths:
+                try:
+                    yield from load(file_path, **kwargs)
+                except Exception as e:
+                    on_error(file_path, e)
+            return
+        
+        yield from self._iter_documents_parallel(
+            file_paths,
+            max_workers=max_workers or os.cpu_count() or 1,
+            timeout=timeout,
+            on_error=on_error,
+            stream_parts=stream_parts,
+            load_kwargs=kwargs
+        )
+    
+    def _iter_documents_parallel(
+        self,
+        file_paths: Iterable[str],
+        max_workers: int,
+        timeout: Optional[float],
+        on_error: Callable[[str, Exception], None],
+        stream_parts: bool,
+        load_kwargs: dict
+    ) -> Iterator[Document]:
+        """使用进程池加载文件
+        
+        同时在途的任务数不超过进程数，因此任务提交时间近似于开始执行时间，
+        可用于判断单个文件是否超时。超时或工作进程崩溃时重建进程池，
+        其余在途文件逐个单独重试一次，再次失败的文件即为出错的文件。
+        分段模式下每个工作进程返回该文件的全部片段，文件之间已经并行，不再按页并行。
+        """
+        paths = iter(file_paths)
+        executor = ProcessPoolExecutor(max_workers=max_workers)
+        # future -> (文件路径, 提交时间, 已重试次数)
+        pending: Dict[Future, Tuple[str, float, int]] = {}
+        retry: List[Tuple[str, int]] = []
+        exhausted = False
+        # 子进程中使用同一个加载器类（子类重写的加载逻辑同样生效）和相同的配置，
+        # 但文件之间已经并行，不再按页并行
+        loader_class = type(self)
+        worker_options = {
+            "supported_extensions": self.supported_extensions,
+            "pdf_pages_per_task": self.pdf_pages_per_task,
+            "table_rows_per_part": self.table_rows_per_part,
+            "table_part_max_chars": self.table_part_max_chars,
+        }
+        
+        def submit(file_path: str, attempts: int) -> None:
+            future = executor.submit(
+                _load_in_worker, loader_class, worker_options, file_path, stream_parts, load_kwargs
+            )
+            pending[future] = (file_path, time.monotonic(), attempts)
+        
+        try:
+            while True:
+                # 重试的文件单独运行，以便确认导致进程崩溃的具体文件
+                isolating = any(attempts > 0 for _, _, attempts in pending.values())
+                while not isolating and len(pending) < max_workers and (retry or not exhausted):
+                    if retry:
+                        if not pending:
+                            submit(*retry.pop())
+                            isolating = True
+                        break
+                    file_path = next(paths, None)
+                    if file_path is None:
+                        exhausted = True
+                        break
+                    submit(file_path, 0)
+                
+                if not pending:
+                    return
+                
+                done, _ = wait(list(pending), timeout=1.0, return_when=FIRST_COMPLETED)
+                broken = False
+                
+                for future in done:
+                    file_path, _, attempts = pending.pop(future)
+                    try:
+                        documents = future.result()
+                    except BrokenProcessPool as e:
+                        broken = True
+                        if attempts < 1:
+                            retry.append((file_path, attempts + 1))
+                        else:
+                            on_error(file_path, RuntimeError(f"工作进程异常退出: {e}"))
+                    except Exception as e:
+                        on_error(file_path, e)
+                    else:
+                        yield from documents
+                
+                expired = []
+                if timeout is not None:
+                    now = time.monotonic()
+                    expired = [
+                        future for future, (_, submitted_at, _) in pending.items()
+                        if now - submitted_at > timeout
+                    ]
+                
+                if broken or expired:
+                    for future in expired:
+                        file_path, _, _ = pending.pop(future)
+                        on_error(file_path, TimeoutError(f"加载超时（>{timeout} 秒）"))
+                    # 其余在途任务重新提交到新的进程池
+                    retry.extend((file_path, attempts) for file_path, _, attempts in pending.values())
+                    pending.clear()
+                    _terminate_executor(executor)
+                    executor = ProcessPoolExecutor(max_workers=max_workers)
+        finally:
+            _terminate_executor(executor)
+    
+    def iter_file_paths(self, directory_path: str) -> Iterator[str]:
+        """遍历目录，返回所有受支持格式的文件路径
+        
+        Args:
+            directory_path: 目录路径
+            
+        Yields:
+            str: 文件路径
+        """
         if not os.path.exists(directory_path):
             raise FileNotFoundError(f"目录不存在: {directory_path}")
         
-        documents = []
-        
         for root, dirs, files in os.walk(directory_path):
             for file in files:
-                file_path = os.path.join(root, file)
                 file_extension = os.path.splitext(file)[1].lower()
-                
                 if file_extension in self.supported_extensions:
-                    try:
-                        document = self.load(file_path, **kwargs)
-                        documents.append(document)
-                    except Exception as e:
-                        print(f"加载文件失败 {file_path}: {e}")
+                    yield os.path.join(root, file)
+    
+    def _check_file(self, file_path: str) -> str:
+        """检查文件是否存在且格式受支持，返回小写扩展名"""
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"文件不存在: {file_path}")
         
-        return documents
+        file_extension = os.path.splitext(file_path)[1].lower()
+        
+        if file_extension not in self.supported_extensions:
+            raise ValueError(f"不支持的文件格式: {file_extension}")
+        
+        return file_extension
+    
+    @staticmethod
+    def _base_metadata(file_path: str, file_extension: str) -> dict:
+        """文档的基础元数据"""
+        return {
+            "file_path": file_path,
+            "file_name": os.path.basename(file_path),
+            "file_extension": file_extension,
+            "document_type": "original"
+        }
+    
+    def _load_as_list(self, file_path: str, **kwargs) -> List[Document]:
+        """以列表形式返回整个文档，与 iter_load 的调用方式保持一致"""
+        return [self.load(file_path, **kwargs)]
     
     def _load_pdf(self, file_path: str, metadata: dict) -> str:
         """加载PDF文件
@@ -112,62 +412,279 @@ class SimpleDocumentLoader(DocumentLoader):
         Returns:
             str: PDF文件的文本内容
         """
+        reader = self._open_pdf_checked(file_path)
+        metadata["total_pages"] = len(reader.pages)
+        
+        parts = []
+        for page_number, page_text in self._iter_pdf_page_texts(file_path, reader):
+            if page_text:
+                parts.append(f"\n--- Page {page_number} ---\n")
+                parts.append(page_text)
+        
+        return "".join(parts)
+    
+    @staticmethod
+    def _open_pdf_checked(file_path: str):
+        """打开PDF文件（读取页数等只打开一次，逐页解析复用同一个 reader）"""
         try:
-            reader = PdfReader(file_path)
-            metadata["total_pages"] = len(reader.pages)
-            
-            text = ""
-            for i, page in enumerate(reader.pages):
-                page_text = page.extract_text()
-                if page_text:
-                    text += f"\n--- Page {i+1} ---\n"
-                    text += page_text
-            
-            return text
+            return _open_pdf(file_path)
         except Exception as e:
             raise RuntimeError(f"PDF加载失败: {e}")
+    
+    def _iter_pdf_page_texts(self, file_path: str, reader) -> Iterator[Tuple[int, str]]:
+        """按页码顺序产出 (页码, 文本)
+        
+        未启用并行时在当前进程中用已打开的 reader 逐页解析；否则把页面按 pdf_pages_per_task 分组提交到进程池
+        （子进程各自打开文件），在途任务数不超过进程数的两倍，已解析但未被消费的页面数量因此有上限。
+        """
+        pages_per_task = max(1, self.pdf_pages_per_task)
+        total_pages = len(reader.pages)
+        
+        if self.pdf_page_workers <= 1 or total_pages <= pages_per_task:
+            try:
+                for i, page in enumerate(reader.pages):
+                    yield i + 1, page.extract_text() or ""
+            except Exception as e:
+                raise RuntimeError(f"PDF加载失败: {e}")
+            return
+        
+        executor = ProcessPoolExecutor(max_workers=self.pdf_page_workers)
+        try:
+            starts = iter(range(0, total_pages, pages_per_task))
+            in_flight: deque = deque()
+            
+            def submit_next() -> None:
+                start = next(starts, None)
+                if start is not None:
+                    end = min(start + pages_per_task, total_pages)
+                    in_flight.append((start, executor.submit(_extract_pdf_pages, file_path, start, end)))
+            
+            for _ in range(self.pdf_page_workers * 2):
+                submit_next()
+            
+            while in_flight:
+                start, future = in_flight.popleft()
+                try:
+                    page_texts = future.result()
+                except Exception as e:
+                    raise RuntimeError(f"PDF加载失败: {e}")
+                submit_next()
+                for offset, page_text in enumerate(page_texts):
+                    yield start + offset + 1, page_text
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
     # === 新增方法：加载 Excel ===
     def _load_excel(self, file_path: str, metadata: dict) -> str:
-        """加载 Excel 文件（.xlsx/.xls），每张工作表转为 Markdown 表格"""
-        try:
-            # 读取所有工作表
-            sheet_dict = pd.read_excel(file_path, sheet_name=None, dtype=str)
-            metadata["sheets"] = ", ".join(sheet_dict.keys())  # 例如 "Sheet1, Sheet2"
+        """加载 Excel 文件（.xlsx），每张工作表转为 Markdown 表格，按行组分段并重复表头"""
+        sheet_names: List[str] = []
+        parts = [text for _, text in self._iter_excel_row_groups(file_path, sheet_names)]
+        metadata["sheets"] = ", ".join(sheet_names)  # 例如 "Sheet1, Sheet2"
+        return "\n\n".join(parts)
+    
+    # === 新增方法：加载 CSV ===
+    def _load_csv(self, file_path: str, metadata: dict) -> str:
+        """加载 CSV 文件，转为 Markdown 表格，按行组分段并重复表头"""
+        return "\n\n".join(text for _, text in self._iter_csv_row_groups(file_path))
+    
+    def iter_table_parts(self, file_path: str) -> Iterator[Document]:
+        """按行组分段加载 CSV/Excel 文件
+        
+        CSV 使用 pandas 分块读取，Excel 使用 openpyxl 只读模式逐行读取，内存占用与行数无关。
+        每个行组是一个完整的 Markdown 表格（重复表头），不会在单元格中间被截断；
+        元数据中的 row_start/row_end 为数据行序号（从 1 开始，表头之后的第一行为 1），
+        空行被跳过但仍计入行号。
+        
+        Args:
+            file_path: 文件路径
             
-            text_parts = []
-            for sheet_name, df in sheet_dict.items():
-                if df.empty:
-                    continue
+        Yields:
+            Document: 行组文档
+        """
+        file_extension = self._check_file(file_path)
+        
+        if file_extension == ".csv":
+            row_groups = self._iter_csv_row_groups(file_path)
+        else:
+            row_groups = self._iter_excel_row_groups(file_path)
+        
+        for part_index, (part_metadata, text) in enumerate(row_groups, 1):
+            metadata = self._base_metadata(file_path, file_extension)
+            metadata.update(part_metadata)
+            metadata["part_index"] = part_index
+            yield Document(text=text, metadata=metadata)
+    
+    def _iter_csv_row_groups(self, file_path: str) -> Iterator[Tuple[dict, str]]:
+        """分块读取 CSV，产出 (行组元数据, Markdown 文本)"""
+        pd = _import_optional("pandas", "加载 CSV 文件")
+        
+        try:
+            reader = pd.read_csv(
+                file_path,
+                dtype=str,
+                keep_default_na=False,
+                # 读取块与行组大小无关：块太小时 pandas 的单块开销占主导
+                chunksize=max(self.table_rows_per_part, _CSV_READ_ROWS),
+                # 保留空行（读出为全空的行），行号与文件中的记录一一对应
+                skip_blank_lines=False
+            )
+            with reader:
+                frames = iter(reader)
+                first = next(frames, None)
+                if first is None:
+                    return
                 
-                # 将 DataFrame 转为 Markdown 表格（LLM 友好格式）
-                # 如果没有 to_markdown，回退到字符串
-                if hasattr(df, 'to_markdown'):
-                    table_str = df.to_markdown(index=False)
-                else:
-                    table_str = df.to_string(index=False)
+                header = [str(column) for column in first.columns]
+                rows = enumerate(
+                    (
+                        row
+                        for frame in _chain_first(first, frames)
+                        for row in frame.itertuples(index=False, name=None)
+                    ),
+                    1
+                )
+                title = f"## CSV File: {os.path.basename(file_path)}"
+                yield from self._iter_row_groups(title, header, rows, {})
+        except Exception as e:
+            raise RuntimeError(f"CSV 加载失败 ({file_path}): {e}")
+    
+    def _iter_excel_row_groups(
+        self,
+        file_path: str,
+        sheet_names: Optional[List[str]] = None
+    ) -> Iterator[Tuple[dict, str]]:
+        """以只读模式逐行读取 Excel 的每张工作表，产出 (行组元数据, Markdown 文本)
+        
+        Args:
+            file_path: 文件路径
+            sheet_names: 提供时追加工作簿中的工作表名称，避免为读取名称再打开一次文件
+        """
+        openpyxl = _import_optional("openpyxl", "加载 Excel 文件")
+        
+        try:
+            workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        except Exception as e:
+            raise RuntimeError(f"Excel 加载失败 ({file_path}): {e}")
+        
+        try:
+            if sheet_names is not None:
+                sheet_names.extend(workbook.sheetnames)
+            for worksheet in workbook.worksheets:
+                # 只读模式下缺失的行也会以全空行产出，序号即工作表中的行号；第一个非空行作为表头
+                rows = enumerate(worksheet.iter_rows(values_only=True), 1)
+                header_number, header_row = next(
+                    ((number, row) for number, row in rows if any(value is not None for value in row)),
+                    (0, None)
+                )
+                if header_row is None:
+                    continue
                 
-                text_parts.append(f"## Sheet: {sheet_name}\n\n{table_str}\n")
-            
-            return "\n".join(text_parts)
+                header = [
+                    f"Unnamed: {i}" if value is None else str(value)
+                    for i, value in enumerate(header_row)
+                ]
+                title = f"## Sheet: {worksheet.title}"
+                data_rows = ((number - header_number, row) for number, row in rows)
+                yield from self._iter_row_groups(title, header, data_rows, {"sheet_name": worksheet.title})
         except Exception as e:
             raise RuntimeError(f"Excel 加载失败 ({file_path}): {e}")
+        finally:
+            workbook.close()
     
-    # === 新增方法：加载 CSV ===
-    def _load_csv(self, file_path: str, metadata: dict) -> str:
-        """加载 CSV 文件"""
-        try:
-            df = pd.read_csv(file_path, dtype=str)
-            if df.empty:
-                return ""
+    def _iter_row_groups(
+        self,
+        title: str,
+        header: List[str],
+        rows: Iterable[Tuple[int, tuple]],
+        extra_metadata: dict
+    ) -> Iterator[Tuple[dict, str]]:
+        """把数据行聚合为行组，每组最多 table_rows_per_part 行、table_part_max_chars 个字符
+        
+        rows 为读取方给出的 (数据行序号, 单元格值)；全空的行被跳过，row_start/row_end 与原表格对应。
+        """
+        head = f"{title}\n\n{_render_table_row(header)}\n{_render_table_row(['---'] * len(header))}\n"
+        max_chars = self.table_part_max_chars
+        lines: List[str] = []
+        size = len(head)
+        row_start = row_end = 0
+        
+        def flush() -> Tuple[dict, str]:
+            metadata = dict(extra_metadata)
+            metadata.update({"row_start": row_start, "row_end": row_end})
+            return metadata, head + "\n".join(lines)
+        
+        for row_number, row in rows:
+            if all(value is None or value == "" for value in row):
+                continue
             
-            if hasattr(df, 'to_markdown'):
-                table_str = df.to_markdown(index=False)
-            else:
-                table_str = df.to_string(index=False)
+            cells = ["" if value is None else str(value) for value in row[:len(header)]]
+            cells.extend([""] * (len(header) - len(cells)))
+            line = _render_table_row(cells)
             
-            return f"## CSV File: {os.path.basename(file_path)}\n\n{table_str}"
-        except Exception as e:
-            raise RuntimeError(f"CSV 加载失败 ({file_path}): {e}")
+            if lines and (
+                len(lines) >= self.table_rows_per_part
+                or (max_chars and size + len(line) + 1 > max_chars)
+            ):
+                yield flush()
+                lines = []
+                size = len(head)
+            
+            if not lines:
+                row_start = row_number
+            lines.append(line)
+            size += len(line) + 1
+            row_end = row_number
+        
+        if lines:
+            yield flush()
+
+def _load_in_worker(
+    loader_class: type,
+    loader_options: dict,
+    file_path: str,
+    stream_parts: bool,
+    load_kwargs: dict
+) -> List[Document]:
+    """进程池工作函数：在子进程中加载单个文件"""
+    loader = loader_class(**loader_options)
+    if stream_parts:
+        return list(loader.iter_load(file_path, **load_kwargs))
+    return [loader.load(file_path, **load_kwargs)]
+
+
+def _extract_pdf_pages(file_path: str, start: int, end: int) -> List[str]:
+    """进程池工作函数：解析 PDF 第 start 到 end - 1 页（从 0 开始）的文本"""
+    reader = _open_pdf(file_path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, end)]
+
+
+def _render_table_row(cells: List[str]) -> str:
+    """渲染一行 Markdown 表格，转义单元格中的竖线和换行"""
+    escaped = (cell.replace("|", "\\|").replace("\r", " ").replace("\n", " ") for cell in cells)
+    return "| " + " | ".join(escaped) + " |"
+
+
+def _chain_first(first, rest: Iterator) -> Iterator:
+    """把已经取出的第一个元素放回迭代器开头"""
+    yield first
+    yield from rest
+
+
+def _print_load_error(file_path: str, error: Exception) -> None:
+    """默认的加载失败处理：打印错误信息后继续"""
+    print(f"加载文件失败 {file_path}: {error}")
+
+
+def _terminate_executor(executor: ProcessPoolExecutor) -> None:
+    """立即关闭进程池，并终止仍在运行（可能已卡死）的工作进程"""
+    # ProcessPoolExecutor 没有公开终止工作进程的接口：shutdown(wait=False) 只停止派发新任务，
+    # 卡死在某个文件上的进程会一直运行。这里读取私有属性 _processes 拿到进程对象后逐个 terminate；
+    # 属性不存在（其他 Python 实现或未来版本）时退化为只 shutdown
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
 
 # 为兼容性，创建别名
 TextDocumentLoader = SimpleDocumentLoader
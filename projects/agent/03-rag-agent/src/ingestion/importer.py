@@ -0,0 +1,340 @@
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from src.ingestion.base import Document
+from src.ingestion.pipeline import make_document_id
+
+if TYPE_CHECKING:
+    from src.document_store.base import DocumentStore
+
+logger = logging.getLogger(__name__)
+
+# 支持的文件格式及扩展名
+IMPORT_FORMATS = {
+    ".parquet": "parquet",
+    ".jsonl": "jsonl",
+    ".npy": "npy",
+}
+
+# 一批导入数据：文本块及对应的向量矩阵（行一一对应）
+ImportBatch = Tuple[List[Document], np.ndarray]
+
+
+@dataclass
+class ImportStats:
+    """导入统计"""
+    file_count: int = 0
+    chunk_count: int = 0
+    failed_files: List[str] = field(default_factory=list)
+
+
+def detect_import_format(path: str) -> str:
+    """根据扩展名判断导入文件格式"""
+    file_format = IMPORT_FORMATS.get(os.path.splitext(path)[1].lower())
+    if file_format is None:
+        raise ValueError(f"不支持的导入文件格式: {path}")
+    return file_format
+
+
+def iter_import_files(path: str) -> List[str]:
+    """
+    列出待导入的文件
+
+    目录下的 .npy 文件与同名 .jsonl 成对出现，这样的 .jsonl 只作为 .npy 的记录文件，不单独导入。
+
+    Args:
+        path: 文件或目录
+
+    Returns:
+        List[str]: 按文件名排序的文件路径
+    """
+    if not os.path.isdir(path):
+        return [path]
+
+    names = sorted(os.listdir(path))
+    paired = {os.path.splitext(name)[0] + ".jsonl" for name in names if name.lower().endswith(".npy")}
+    return [
+        os.path.join(path, name) for name in names
+        if os.path.splitext(name)[1].lower() in IMPORT_FORMATS and name not in paired
+    ]
+
+
+def iter_embedding_batches(
+    path: str,
+    batch_size: int = 5000,
+    file_format: Optional[str] = None,
+    dimensions: Optional[int] = None,
+) -> Iterator[ImportBatch]:
+    """
+    按批读取预先计算好的文本块和向量
+
+    每条记录包含 id（可选，缺省时按文件路径和行号生成）、text、metadata（可选，
+    对象或 JSON 字符串）和 embedding（向量）。
+
+    - Parquet：按行组流式读取；向量列为 list<float> 或 fixed_size_list<float>，
+      float32 且无空值时直接零拷贝映射为 numpy 数组
+    - JSONL：每行一个 JSON 对象
+    - NPY：向量矩阵 xxx.npy（内存映射读取）与同名记录文件 xxx.jsonl 成对出现，
+      记录文件每行一个对象（不含 embedding），行顺序与矩阵行一致
+
+    Args:
+        path: 文件路径
+        batch_size: 每批的记录数
+        file_format: 文件格式，默认按扩展名判断
+        dimensions: 期望的向量维度，提供时校验
+
+    Yields:
+        ImportBatch: (文本块列表, float32 向量矩阵)
+    """
+    file_format = file_format or detect_import_format(path)
+    if file_format == "parquet":
+        batches = _iter_parquet_batches(path, batch_size, dimensions)
+    elif file_format == "jsonl":
+        batches = _iter_jsonl_batches(path, batch_size)
+    elif file_format == "npy":
+        batches = _iter_npy_batches(path, batch_size, dimensions)
+    else:
+        raise ValueError(f"不支持的导入文件格式: {file_format}")
+
+    for documents, vectors in batches:
+        if vectors.ndim != 2 or vectors.shape[0] != len(documents):
+            raise ValueError(f"{path}: 向量数量与文本块数量不一致")
+        if dimensions and vectors.shape[1] != dimensions:
+            raise ValueError(f"{path}: 向量维度为 {vectors.shape[1]}，与配置的 {dimensions} 不一致")
+        yield documents, vectors
+
+
+class EmbeddingImporter:
+    """
+    预计算 Embedding 批量导入器
+
+    跳过加载、分块和 Embedding，直接把离线生成的文本块和向量写入向量数据库和文档存储
+    （BM25 检索从文档存储建索引）。读取下一批与写入当前批在两个线程中重叠进行，
+    导入速度只受磁盘读取和索引写入限制。
+
+    能廉价发现的错误（如 NPY 矩阵行数与记录文件行数不一致、Parquet 向量维度不符）在写入前检查；
+    文件读到中途才出错时，删除该文件已写入的文本块，失败的文件不会留下部分数据。
+    """
+
+    def __init__(
+        self,
+        vector_store: Any,
+        document_store: Optional["DocumentStore"] = None,
+        batch_size: int = 5000,
+        dimensions: Optional[int] = None,
+    ):
+        """
+        初始化导入器
+
+        Args:
+            vector_store: 向量数据库实例
+            document_store: 文档存储
+            batch_size: 每批写入的文本块数量
+            dimensions: 期望的向量维度，不一致的文件导入失败
+        """
+        self.vector_store = vector_store
+        self.document_store = document_store
+        self.batch_size = batch_size
+        self.dimensions = dimensions
+
+    def run(
+        self,
+        path: str,
+        file_format: Optional[str] = None,
+        progress: Optional[Callable[[int], Any]] = None,
+    ) -> ImportStats:
+        """
+        导入一个文件或目录
+
+        Args:
+            path: 文件或目录（目录下的所有支持格式文件按文件名顺序导入）
+            file_format: 文件格式，默认按扩展名判断
+            progress: 每写入一批后调用，参数为该批的文本块数量
+
+        Returns:
+            ImportStats: 导入统计
+        """
+        stats = ImportStats()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-import") as reader:
+            for file_path in iter_import_files(path):
+                stats.file_count += 1
+                written: List[str] = []
+                try:
+                    batches = iter_embedding_batches(file_path, self.batch_size, file_format, self.dimensions)
+                    # 写入当前批时，后台线程预读下一批
+                    pending = reader.submit(next, batches, None)
+                    while True:
+                        batch = pending.result()
+                        if batch is None:
+                            break
+                        pending = reader.submit(next, batches, None)
+                        documents, vectors = batch
+                        self._write_batch(documents, vectors)
+                        written.extend(doc.id for doc in documents)
+                        if progress is not None:
+                            progress(len(documents))
+                    stats.chunk_count += len(written)
+                except Exception as e:
+                    logger.warning(f"导入文件失败 {file_path}: {e}")
+                    stats.failed_files.append(file_path)
+                    self._delete_written(written)
+        return stats
+
+    def _write_batch(self, documents: List[Document], vectors: np.ndarray) -> None:
+        """写入一批文本块；与索引构建流水线相同，先写文档存储"""
+        if self.document_store is not None:
+            self.document_store.add_documents(documents)
+        self.vector_store.add_documents(documents, vectors)
+
+    def _delete_written(self, ids: List[str]) -> None:
+        """删除导入失败的文件已写入的文本块"""
+        if not ids:
+            return
+        if self.document_store is not None:
+            self.document_store.delete_documents(ids)
+        if not hasattr(self.vector_store, "delete_documents"):
+            logger.warning(f"{self.vector_store.__class__.__name__} 不支持按ID删除，{len(ids)} 个已导入的文本块未被清理")
+            return
+        self.vector_store.delete_documents(ids)
+        logger.info(f"已删除导入失败文件写入的 {len(ids)} 个文本块")
+
+
+def _make_document(record: Dict[str, Any], path_id: str, row: int) -> Document:
+    """由一条导入记录生成文本块"""
+    metadata = record.get("metadata") or {}
+    if isinstance(metadata, str):
+        metadata = json.loads(metadata)
+    doc_id = record.get("id")
+    return Document(
+        text=record.get("text") or "",
+        metadata=metadata,
+        id=str(doc_id) if doc_id is not None else f"{path_id}_row_{row}"
+    )
+
+
+@lru_cache()
+def _import_pyarrow() -> Any:
+    """延迟导入 pyarrow（只有导入 Parquet 文件时需要，API 服务进程不加载）"""
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("pyarrow 未安装，无法导入 Parquet 文件")
+    return pyarrow
+
+
+def _iter_parquet_batches(path: str, batch_size: int, dimensions: Optional[int] = None) -> Iterator[ImportBatch]:
+    """流式读取 Parquet 文件"""
+    pa = _import_pyarrow()
+    parquet_file = pa.parquet.ParquetFile(path)
+    schema = parquet_file.schema_arrow
+    names = set(schema.names)
+    if "text" not in names or "embedding" not in names:
+        raise ValueError(f"{path}: Parquet 文件缺少 text 或 embedding 列")
+    # 定长列表列的维度记录在 schema 中，写入前即可校验
+    embedding_type = schema.field("embedding").type
+    if dimensions and pa.types.is_fixed_size_list(embedding_type) and embedding_type.list_size != dimensions:
+        raise ValueError(f"{path}: 向量维度为 {embedding_type.list_size}，与配置的 {dimensions} 不一致")
+    columns = [name for name in ("id", "text", "metadata", "embedding") if name in names]
+
+    path_id = make_document_id(path)
+    row = 0
+    for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+        vectors = _arrow_vectors(record_batch.column(columns.index("embedding")))
+        fields = {
+            name: record_batch.column(columns.index(name)).to_pylist()
+            for name in columns if name != "embedding"
+        }
+        documents = [
+            _make_document({name: values[i] for name, values in fields.items()}, path_id, row + i)
+            for i in range(record_batch.num_rows)
+        ]
+        row += record_batch.num_rows
+        yield documents, vectors
+
+
+def _arrow_vectors(column: Any) -> np.ndarray:
+    """把 Arrow 列表列转换为二维 float32 矩阵，条件允许时不复制数据"""
+    pa = _import_pyarrow()
+    if column.null_count:
+        raise ValueError("embedding 列存在空值")
+    if pa.types.is_fixed_size_list(column.type):
+        dimensions = column.type.list_size
+    else:
+        lengths = np.diff(np.asarray(column.offsets))
+        if lengths.size and (lengths != lengths[0]).any():
+            raise ValueError("embedding 列的向量长度不一致")
+        dimensions = int(lengths[0]) if lengths.size else 0
+
+    values = column.flatten()
+    if values.null_count:
+        raise ValueError("embedding 列存在空值")
+    if not pa.types.is_float32(values.type):
+        values = values.cast(pa.float32())
+    return values.to_numpy(zero_copy_only=False).reshape(len(column), dimensions)
+
+
+def _iter_jsonl_batches(path: str, batch_size: int) -> Iterator[ImportBatch]:
+    """逐行读取 JSONL 文件"""
+    path_id = make_document_id(path)
+    documents: List[Document] = []
+    vectors: List[List[float]] = []
+
+    with open(path, "r", encoding="utf-8") as f:
+        row = 0
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if "embedding" not in record:
+                raise ValueError(f"{path}: 第 {row + 1} 条记录缺少 embedding")
+            vectors.append(record["embedding"])
+            documents.append(_make_document(record, path_id, row))
+            row += 1
+            if len(documents) >= batch_size:
+                yield documents, np.asarray(vectors, dtype=np.float32)
+                documents, vectors = [], []
+
+    if documents:
+        yield documents, np.asarray(vectors, dtype=np.float32)
+
+
+def _iter_npy_batches(path: str, batch_size: int, dimensions: Optional[int] = None) -> Iterator[ImportBatch]:
+    """读取 .npy 向量矩阵及同名 .jsonl 记录文件"""
+    records_path = os.path.splitext(path)[0] + ".jsonl"
+    if not os.path.exists(records_path):
+        raise ValueError(f"{path}: 缺少记录文件 {records_path}")
+
+    matrix = np.load(path, mmap_mode="r")
+    if matrix.ndim != 2:
+        raise ValueError(f"{path}: 向量矩阵应为二维")
+    if dimensions and matrix.shape[1] != dimensions:
+        raise ValueError(f"{path}: 向量维度为 {matrix.shape[1]}，与配置的 {dimensions} 不一致")
+    # 先数一遍记录文件的行数（只读行不解析），行数与矩阵不一致时在写入任何数据之前失败
+    with open(records_path, "r", encoding="utf-8") as f:
+        record_count = sum(1 for line in f if line.strip())
+    if record_count != matrix.shape[0]:
+        raise ValueError(f"{path}: 记录数 {record_count} 与向量数 {matrix.shape[0]} 不一致")
+
+    path_id = make_document_id(path)
+    documents: List[Document] = []
+    row = 0
+    with open(records_path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            documents.append(_make_document(json.loads(line), path_id, row))
+            row += 1
+            if len(documents) >= batch_size:
+                yield documents, np.asarray(matrix[row - len(documents):row], dtype=np.float32)
+                documents = []
+
+    if documents:
+        yield documents, np.asarray(matrix[row - len(documents):row], dtype=np.float32)
@@ -0,0 +1,252 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+# 版本 2：文本块同时写入文档存储，旧清单中的文件需要重新处理
+# 版本 3：SimHash 特征去重后投票，旧指纹不可比较，并且旧版本可能误删了文本块，需要重新处理
+MANIFEST_VERSION = 3
+
+
+def default_manifest_path(vector_store_path: str, collection_name: str) -> str:
+    """默认的清单文件路径：与向量数据库放在同一目录，按集合区分"""
+    return os.path.join(vector_store_path, f"{collection_name}_manifest.json")
+
+
+def index_config(
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str,
+    embedding_model: str,
+    dedup_max_distance: Optional[int] = None
+) -> Dict[str, Any]:
+    """影响分块和向量结果的构建配置；构建脚本与文件监听器必须使用同一份配置，否则清单会被视为失效"""
+    return {
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunk_unit": chunk_unit,
+        "embedding_model": embedding_model,
+        "dedup_max_distance": dedup_max_distance,
+    }
+
+
+def file_sha256(file_path: str, block_size: int = 1 << 20) -> str:
+    """计算文件内容的 SHA-256 哈希"""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class FileRecord:
+    """清单中的单个文件记录"""
+    size: int
+    mtime: float
+    sha256: str
+    chunk_ids: List[str] = field(default_factory=list)
+    # 已写入文本块的 SimHash 指纹（开启去重时）
+    signatures: Dict[str, int] = field(default_factory=dict)
+    # 因近似重复被跳过的文本块所对应的已保留文本块ID
+    duplicate_of: List[str] = field(default_factory=list)
+
+
+@dataclass
+class ManifestDiff:
+    """当前目录与清单之间的差异"""
+    added: List[str] = field(default_factory=list)
+    modified: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> List[str]:
+        """需要重新处理的文件（新增 + 修改）"""
+        return self.added + self.modified
+
+
+class IndexManifest:
+    """
+    索引清单：记录每个已索引文件的大小、修改时间、内容哈希以及生成的文本块ID，
+    用于增量构建时只处理新增或变更的文件，并清理已删除文件的文本块。
+    """
+
+    def __init__(self, manifest_path: str, config: Optional[Dict[str, Any]] = None):
+        """
+        初始化索引清单
+
+        Args:
+            manifest_path: 清单文件路径（JSON）
+            config: 影响分块结果的构建配置（如分块大小、Embedding 模型），
+                与已有清单不一致时所有文件都视为已修改
+        """
+        self.manifest_path = manifest_path
+        self.config = config or {}
+        self.files: Dict[str, FileRecord] = {}
+        self._config_changed = False
+        # diff 阶段计算出的 (size, mtime, sha256)，供 update 复用，避免重复哈希
+        self._pending: Dict[str, Tuple[int, float, str]] = {}
+        self._load()
+
+    @staticmethod
+    def normalize_path(file_path: str) -> str:
+        """统一路径格式，作为清单的键"""
+        return os.path.normpath(file_path)
+
+    def _load(self) -> None:
+        """从磁盘加载清单，不存在时为空清单"""
+        if not os.path.exists(self.manifest_path):
+            return
+
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+
+        self.files = {
+            path: FileRecord(**record)
+            for path, record in data.get("files", {}).items()
+        }
+        if data.get("version") != MANIFEST_VERSION:
+            self._config_changed = True
+        if self.config and data.get("config") != self.config:
+            self._config_changed = True
+
+    def diff(self, file_paths: Iterable[str]) -> ManifestDiff:
+        """
+        比较当前文件与清单记录
+
+        大小和修改时间都未变化的文件直接视为未变更；否则计算内容哈希，
+        哈希相同（如仅被 touch）同样视为未变更。
+
+        Args:
+            file_paths: 当前目录中的文件路径
+
+        Returns:
+            ManifestDiff: 差异结果
+        """
+        result = ManifestDiff()
+        seen = set()
+
+        for file_path in file_paths:
+            path = self.normalize_path(file_path)
+            seen.add(path)
+            stat = os.stat(path)
+            record = self.files.get(path)
+
+            if record is None:
+                result.added.append(path)
+                continue
+
+            if self._config_changed:
+                result.modified.append(path)
+                continue
+
+            if record.size == stat.st_size and record.mtime == stat.st_mtime:
+                result.unchanged.append(path)
+                continue
+
+            sha256 = file_sha256(path)
+            self._pending[path] = (stat.st_size, stat.st_mtime, sha256)
+            if sha256 == record.sha256:
+                record.size, record.mtime = stat.st_size, stat.st_mtime
+                result.unchanged.append(path)
+            else:
+                result.modified.append(path)
+
+        result.removed = [path for path in self.files if path not in seen]
+        return result
+
+    def get_chunk_ids(self, file_path: str) -> List[str]:
+        """获取文件已索引的文本块ID"""
+        record = self.files.get(self.normalize_path(file_path))
+        return list(record.chunk_ids) if record else []
+
+    def update(
+        self,
+        file_path: str,
+        chunk_ids: List[str],
+        signatures: Optional[Dict[str, int]] = None,
+        duplicate_of: Optional[List[str]] = None
+    ) -> None:
+        """记录文件的最新状态、文本块ID及去重信息"""
+        path = self.normalize_path(file_path)
+        stat = os.stat(path)
+        pending = self._pending.pop(path, None)
+        if pending and pending[0] == stat.st_size and pending[1] == stat.st_mtime:
+            sha256 = pending[2]
+        else:
+            sha256 = file_sha256(path)
+
+        self.files[path] = FileRecord(
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            sha256=sha256,
+            chunk_ids=list(chunk_ids),
+            signatures=dict(signatures or {}),
+            duplicate_of=list(duplicate_of or [])
+        )
+
+    def find_dependents(self, chunk_ids: Iterable[str], exclude: Iterable[str] = ()) -> List[str]:
+        """
+        查找有文本块因与给定文本块近似重复而被跳过的文件
+
+        这些文件需要重新处理，否则被跳过的内容会随给定文本块一起从索引中消失。
+        查找是传递的：找到的文件自身的文本块也视为将被删除。
+
+        Args:
+            chunk_ids: 将被删除的文本块ID
+            exclude: 不需要检查的文件（如本身已在重新处理的文件）
+
+        Returns:
+            List[str]: 需要重新处理的文件路径
+        """
+        stale = set(chunk_ids)
+        skip = {self.normalize_path(path) for path in exclude}
+        result: List[str] = []
+        found = True
+
+        while found and stale:
+            found = False
+            for path, record in self.files.items():
+                if path in skip or not record.duplicate_of:
+                    continue
+                if stale.intersection(record.duplicate_of):
+                    result.append(path)
+                    skip.add(path)
+                    stale.update(record.chunk_ids)
+                    found = True
+
+        return result
+
+    def remove(self, file_path: str) -> List[str]:
+        """从清单中移除文件，返回其文本块ID"""
+        record = self.files.pop(self.normalize_path(file_path), None)
+        return list(record.chunk_ids) if record else []
+
+    def clear(self) -> None:
+        """清空清单（用于重建索引）"""
+        self.files.clear()
+        self._pending.clear()
+        self._config_changed = False
+
+    def save(self) -> None:
+        """原子写入清单文件（先写临时文件再替换）"""
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        data = {
+            "version": MANIFEST_VERSION,
+            "config": self.config,
+            "files": {path: asdict(record) for path, record in self.files.items()},
+        }
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.manifest_path)
+        self._config_changed = False
+
+    def __len__(self) -> int:
+        return len(self.files)
@@ -0,0 +1,470 @@
+import hashlib
+import logging
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Union
+
+from src.ingestion.base import Document, DocumentLoader, TextSplitter
+from src.ingestion.checkpoint import IngestionCheckpoint
+from src.ingestion.chunk_table import ChunkTable
+from src.ingestion.dedup import ChunkDeduplicator
+from src.ingestion.manifest import IndexManifest
+from src.embeddings.base import EmbeddingClient
+
+if TYPE_CHECKING:
+    # src.document_store 依赖 src.ingestion.base，运行时导入会形成循环
+    from src.document_store.base import DocumentStore
+
+logger = logging.getLogger(__name__)
+
+# 队列结束标记
+_SENTINEL = object()
+
+
+def make_document_id(file_path: str) -> str:
+    """根据文件路径生成稳定的文档ID，保证多次构建得到相同的文本块ID"""
+    normalized = os.path.normpath(file_path).replace("\\", "/")
+    return hashlib.md5(normalized.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class IngestionStats:
+    """流水线运行统计"""
+    file_count: int = 0
+    failed_files: List[str] = field(default_factory=list)
+    chunk_count: int = 0
+    # 每个文件的文本块ID（写入清单用）：只保存ID，每个文本块几十字节，是唯一随语料规模增长的状态
+    file_chunk_ids: Dict[str, List[str]] = field(default_factory=dict)
+    # 增量构建相关统计
+    added_count: int = 0
+    modified_count: int = 0
+    removed_count: int = 0
+    unchanged_count: int = 0
+    deleted_chunk_count: int = 0
+    changed_files: List[str] = field(default_factory=list)
+    removed_files: List[str] = field(default_factory=list)
+    # 近似去重相关统计
+    duplicate_chunk_count: int = 0
+    # 从检查点恢复、无需重新 Embedding 的文本块数量
+    resumed_chunk_count: int = 0
+    file_signatures: Dict[str, Dict[str, int]] = field(default_factory=dict)
+    file_duplicates: Dict[str, List[str]] = field(default_factory=dict)
+
+
+class _PipelineAborted(Exception):
+    """下游阶段失败时用于终止上游阶段"""
+
+
+class _ChunkList:
+    """把 split_document 的结果包装成与 ChunkTable 相同的按行访问接口"""
+
+    def __init__(self, chunks: List[Document]):
+        self.chunks = chunks
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    def chunk_id(self, index: int) -> Optional[str]:
+        return self.chunks[index].id
+
+    def text(self, index: int) -> str:
+        return self.chunks[index].text
+
+    def document(self, index: int) -> Document:
+        return self.chunks[index]
+
+
+class IngestionPipeline:
+    """
+    流式索引构建流水线：加载 → 分块 →（近似去重）→ Embedding → 写入向量数据库（及文档存储）
+
+    各阶段运行在独立线程中，通过有界队列串联：
+    - 加载/分块线程按批次产出文本块
+    - Embedding 线程为每个批次生成向量
+    - 调用线程把向量写入向量数据库
+    队列写满时上游阻塞（背压），文本块内容和向量的内存占用只与 batch_size × queue_size 有关，与语料规模无关；
+    随语料规模增长的只有清单所需的每个文本块的ID（以及开启去重时的 64 位指纹）。
+    """
+
+    def __init__(
+        self,
+        document_loader: DocumentLoader,
+        text_splitter: TextSplitter,
+        embedding_client: EmbeddingClient,
+        vector_store: Any,
+        batch_size: int = 64,
+        queue_size: int = 4,
+        parallel_loading: bool = False,
+        load_workers: Optional[int] = None,
+        load_timeout: Optional[float] = None,
+        document_store: Optional["DocumentStore"] = None,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ):
+        """
+        初始化流水线
+
+        Args:
+            document_loader: 文档加载器
+            text_splitter: 文本分块器
+            embedding_client: Embedding 客户端
+            vector_store: 向量数据库实例
+            batch_size: 每批 Embedding 的文本块数量
+            queue_size: 阶段之间队列的最大批次数
+            parallel_loading: 是否使用进程池并行解析文件
+            load_workers: 并行解析的进程数，默认使用 CPU 核数
+            load_timeout: 单个文件的解析超时时间（秒）
+            document_store: 文档存储，提供时文本块的文本和元数据同时按ID写入
+            deduplicator: 文本块近似去重器，提供时跳过与已保留文本块近似重复的文本块
+        """
+        self.document_loader = document_loader
+        self.text_splitter = text_splitter
+        self.embedding_client = embedding_client
+        self.vector_store = vector_store
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.parallel_loading = parallel_loading
+        self.load_workers = load_workers
+        self.load_timeout = load_timeout
+        self.document_store = document_store
+        self.deduplicator = deduplicator
+
+    def run(
+        self,
+        file_paths: Iterable[str],
+        progress: Optional[Callable[[int], None]] = None,
+        checkpoint: Optional[IngestionCheckpoint] = None,
+        resume: bool = False,
+    ) -> IngestionStats:
+        """
+        处理给定的文件并写入向量数据库
+
+        Args:
+            file_paths: 待处理的文件路径（可以是惰性迭代器）
+            progress: 每写入一批后回调，参数为本批文本块数量
+            checkpoint: 检查点；提供时已完成 Embedding 的批次写入检查点而不是索引，
+                需要随后调用 publish 发布（sync 会自动完成）
+            resume: 是否沿用检查点中已完成的批次，跳过其中的文本块
+
+        Returns:
+            IngestionStats: 运行统计
+        """
+        stats = IngestionStats()
+        completed_ids: Set[str] = checkpoint.start(resume=resume) if checkpoint is not None else set()
+        write_batch = checkpoint.write_batch if checkpoint is not None else self._write_batch
+        stop = threading.Event()
+        chunk_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        vector_queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        errors: List[BaseException] = []
+
+        def produce():
+            try:
+                for batch in self._iter_chunk_batches(file_paths, stats, completed_ids):
+                    self._put(chunk_queue, batch, stop)
+            except _PipelineAborted:
+                return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                self._put_sentinel(chunk_queue, stop)
+
+        def embed():
+            try:
+                for batch in self._drain(chunk_queue, stop):
+                    vectors = self.embedding_client.embed_documents_array(
+                        [chunk.text for chunk in batch],
+                        batch_size=self.batch_size
+                    )
+                    self._put(vector_queue, (batch, vectors), stop)
+            except _PipelineAborted:
+                return
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                self._put_sentinel(vector_queue, stop)
+
+        workers = [
+            threading.Thread(target=produce, name="ingestion-split", daemon=True),
+            threading.Thread(target=embed, name="ingestion-embed", daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            for batch, vectors in self._drain(vector_queue, stop):
+                write_batch(batch, vectors)
+                stats.chunk_count += len(batch)
+                if progress:
+                    progress(len(batch))
+        except _PipelineAborted:
+            pass
+        except BaseException:
+            stop.set()
+            raise
+        finally:
+            for worker in workers:
+                worker.join()
+
+        if errors:
+            raise errors[0]
+
+        return stats
+
+    def sync(
+        self,
+        file_paths: Iterable[str],
+        manifest: IndexManifest,
+        progress: Optional[Callable[[int], None]] = None,
+        checkpoint: Optional[IngestionCheckpoint] = None,
+        resume: bool = False,
+    ) -> IngestionStats:
+        """
+        增量同步：只处理新增或变更的文件，并删除已移除文件的文本块
+
+        使用检查点时，Embedding 结果先逐批落盘，全部完成后才删除旧文本块、写入新文本块并保存清单；
+        中途失败时索引和清单保持原样，带 resume 重新运行会跳过检查点中已完成的文本块。
+        清单未保存前重新计算的差异与上次相同，因此恢复时处理的是同一批文件。
+
+        Args:
+            file_paths: 当前目录中的全部文件路径
+            manifest: 索引清单，同步完成后会被更新并保存
+            progress: 每写入一批后回调，参数为本批文本块数量
+            checkpoint: 检查点
+            resume: 是否从检查点恢复
+
+        Returns:
+            IngestionStats: 运行统计
+        """
+        diff = manifest.diff(file_paths)
+
+        # 先删除变更文件和已移除文件的旧文本块，再写入新文本块
+        stale_ids: List[str] = []
+        for path in diff.modified:
+            stale_ids.extend(manifest.get_chunk_ids(path))
+        for path in diff.removed:
+            stale_ids.extend(manifest.remove(path))
+
+        if self.deduplicator is not None:
+            # 有内容因与旧文本块重复而被跳过的未变更文件，需要随之重新处理
+            for path in manifest.find_dependents(stale_ids, exclude=diff.modified):
+                diff.unchanged.remove(path)
+                diff.modified.append(path)
+                stale_ids.extend(manifest.get_chunk_ids(path))
+            # 用未变更文件的指纹恢复去重器，新文件与已有索引比较
+            self.deduplicator.clear()
+            for path in diff.unchanged:
+                for chunk_id, signature in manifest.files[path].signatures.items():
+                    self.deduplicator.add(chunk_id, signature)
+
+        if checkpoint is None:
+            deleted = self.delete_chunks(stale_ids)
+            stats = self.run(diff.changed, progress=progress)
+        else:
+            stats = self.run(diff.changed, progress=progress, checkpoint=checkpoint, resume=resume)
+            # 先删除旧文本块再写入：文件修改后新旧文本块的ID可能相同
+            deleted = self.delete_chunks(stale_ids)
+            failed = set(stats.failed_files)
+            self.publish(checkpoint, file_paths={path for path in stats.file_chunk_ids if path not in failed})
+
+        # 处理失败的文件从清单中移除，下次运行时重试；中途失败前已写入的片段一并清理
+        failed_ids: List[str] = []
+        for path in stats.failed_files:
+            manifest.remove(path)
+            failed_ids.extend(stats.file_chunk_ids.pop(path, []))
+            stats.file_signatures.pop(path, None)
+            stats.file_duplicates.pop(path, None)
+        deleted += self.delete_chunks(failed_ids)
+
+        for path, chunk_ids in stats.file_chunk_ids.items():
+            manifest.update(
+                path,
+                chunk_ids,
+                signatures=stats.file_signatures.get(path),
+                duplicate_of=stats.file_duplicates.get(path)
+            )
+
+        if self.deduplicator is not None and failed_ids:
+            # 依赖失败文件文本块的文件同样移出清单，下次运行时重新处理
+            self.deduplicator.remove(failed_ids)
+            for path in manifest.find_dependents(failed_ids):
+                chunk_ids = manifest.remove(path)
+                self.deduplicator.remove(chunk_ids)
+                deleted += self.delete_chunks(chunk_ids)
+        manifest.save()
+        if checkpoint is not None:
+            checkpoint.clear()
+
+        stats.added_count = len(diff.added)
+        stats.modified_count = len(diff.modified)
+        stats.removed_count = len(diff.removed)
+        stats.unchanged_count = len(diff.unchanged)
+        stats.deleted_chunk_count = deleted
+        stats.changed_files = diff.changed
+        stats.removed_files = diff.removed
+        return stats
+
+    def publish(self, checkpoint: IngestionCheckpoint, file_paths: Optional[Set[str]] = None) -> int:
+        """
+        把检查点中的批次写入文档存储和向量数据库
+
+        写入按ID覆盖，发布中途失败后可以安全地重新发布。
+
+        Args:
+            checkpoint: 检查点
+            file_paths: 只发布这些文件的文本块（如排除处理失败或已不存在的文件），默认全部发布；
+                按文件而不是文本块ID过滤，无需再构造一份全部文本块ID的集合
+
+        Returns:
+            int: 发布的文本块数量
+        """
+        published = 0
+        for documents, vectors in checkpoint.iter_batches():
+            if file_paths is not None:
+                keep = [i for i, doc in enumerate(documents) if doc.metadata.get("file_path") in file_paths]
+                if len(keep) < len(documents):
+                    documents = [documents[i] for i in keep]
+                    vectors = vectors[keep]
+            if documents:
+                self._write_batch(documents, vectors)
+                published += len(documents)
+        return published
+
+    def _write_batch(self, batch: List[Document], vectors: Any) -> None:
+        """写入一批文本块；先写文档存储，保证向量检索命中的ID总能取回内容"""
+        if self.document_store is not None:
+            self.document_store.add_documents(batch)
+        self.vector_store.add_documents(batch, vectors)
+
+    def delete_chunks(self, chunk_ids: List[str]) -> int:
+        """
+        从向量数据库（及文档存储）中删除文本块
+
+        Args:
+            chunk_ids: 要删除的文本块ID
+
+        Returns:
+            int: 删除的文本块数量
+        """
+        if not chunk_ids:
+            return 0
+        if self.document_store is not None:
+            self.document_store.delete_documents(chunk_ids)
+        if not hasattr(self.vector_store, "delete_documents"):
+            logger.warning(f"{self.vector_store.__class__.__name__} 不支持按ID删除，{len(chunk_ids)} 个旧文本块未被清理")
+            return 0
+        self.vector_store.delete_documents(chunk_ids)
+        return len(chunk_ids)
+
+    def _iter_chunk_batches(
+        self,
+        file_paths: Iterable[str],
+        stats: IngestionStats,
+        completed_ids: Set[str]
+    ) -> Iterator[List[Document]]:
+        """逐个文件加载并分块，按 batch_size 聚合成批次
+
+        文件按片段流式加载（如 PDF 逐页），每个片段加载后立即分块，无需等待整个文件解析完成。
+        completed_ids 中的文本块已在检查点中，仍计入文件的文本块ID，但不再产出。
+        """
+        def count_files(paths: Iterable[str]) -> Iterator[str]:
+            for path in paths:
+                stats.file_count += 1
+                yield path
+
+        def on_error(file_path: str, error: Exception) -> None:
+            logger.warning(f"处理文件失败 {file_path}: {error}")
+            stats.failed_files.append(file_path)
+
+        documents = self.document_loader.iter_documents(
+            count_files(file_paths),
+            parallel=self.parallel_loading,
+            max_workers=self.load_workers,
+            timeout=self.load_timeout,
+            on_error=on_error,
+            stream_parts=True
+        )
+
+        batch: List[Document] = []
+        for document in documents:
+            file_path = document.metadata.get("file_path")
+            if not document.id:
+                document.id = make_document_id(file_path)
+                part_index = document.metadata.get("part_index")
+                if part_index is not None:
+                    document.id = f"{document.id}_p{part_index}"
+            try:
+                table = self._split(document)
+            except Exception as e:
+                on_error(file_path, e)
+                continue
+
+            chunk_ids = stats.file_chunk_ids.setdefault(file_path, [])
+            # 表格行组字面相近但数据不同，只做精确去重
+            exact = "row_start" in document.metadata
+            for index in range(len(table)):
+                chunk_id = table.chunk_id(index)
+                if self.deduplicator is not None:
+                    duplicate_of, signature = self.deduplicator.check(chunk_id, table.text(index), exact=exact)
+                    if duplicate_of is not None:
+                        stats.duplicate_chunk_count += 1
+                        stats.file_duplicates.setdefault(file_path, []).append(duplicate_of)
+                        continue
+                    stats.file_signatures.setdefault(file_path, {})[chunk_id] = signature
+
+                chunk_ids.append(chunk_id)
+                if chunk_id in completed_ids:
+                    stats.resumed_chunk_count += 1
+                    continue
+                # 只为需要写入的文本块生成 Document，重复和已完成的文本块不产生对象
+                batch.append(table.document(index))
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+
+        if batch:
+            yield batch
+
+    def _split(self, document: Document) -> Union[ChunkTable, _ChunkList]:
+        """分块；分块器支持时返回列式文本块表，按需生成文本块"""
+        if hasattr(self.text_splitter, "split_to_table"):
+            return self.text_splitter.split_to_table([document])
+        return _ChunkList(self.text_splitter.split_document(document).chunks)
+
+    @staticmethod
+    def _put(target: "queue.Queue", item: Any, stop: threading.Event) -> None:
+        """阻塞写入队列，期间若流水线被终止则退出"""
+        while True:
+            if stop.is_set():
+                raise _PipelineAborted()
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _put_sentinel(target: "queue.Queue", stop: threading.Event) -> None:
+        """写入结束标记；流水线已终止时下游会自行退出，无需等待"""
+        while not stop.is_set():
+            try:
+                target.put(_SENTINEL, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    @staticmethod
+    def _drain(source: "queue.Queue", stop: threading.Event) -> Iterator[Any]:
+        """从队列中持续读取，直到遇到结束标记"""
+        while True:
+            if stop.is_set():
+                raise _PipelineAborted()
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if item is _SENTINEL:
+                return
+            yield item
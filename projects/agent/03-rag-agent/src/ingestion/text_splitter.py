@@ -1,141 +1,255 @@
-from typing import List, Optional, Sequence
+import math
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from src.ingestion.base import ChunkResult, Document, TextSplitter
+from src.ingestion.chunk_table import ChunkTable
+from src.ingestion.tokenizer import TokenCounter, get_token_counter
+
+
+# 文本块在原文中的位置 (start, end, tail_start, tail_end)：
+# 文本块内容为 text[start:end] + text[tail_start:tail_end]，
+# 其中 tail 是与下一个文本块重叠的部分（无重叠时 tail_start == tail_end）
+ChunkSpan = Tuple[int, int, int, int]
+
+
+def extract_span(text: str, span: ChunkSpan) -> str:
+    """从原文中取出文本块内容"""
+    start, end, tail_start, tail_end = span
+    if tail_start == tail_end:
+        return text[start:end]
+    return text[start:end] + text[tail_start:tail_end]
+
+
+def span_bounds(span: ChunkSpan) -> Tuple[int, int]:
+    """文本块覆盖的原文区间 [start, end)"""
+    start, end, tail_start, tail_end = span
+    return (
+        start if start < end else tail_start,
+        tail_end if tail_start < tail_end else end,
+    )
 
 
 class RecursiveCharacterTextSplitter(TextSplitter):
-    """递归字符文本分块器，按分隔符列表递归拆分文本"""
-    
+    """递归字符文本分块器，按分隔符列表递归拆分文本
+
+    全程基于原文的字符偏移进行拆分、合并和重叠处理，只在最后一步切片生成文本块，
+    时间和内存开销与文本长度呈线性关系。
+    """
+
     def __init__(
         self,
         chunk_size: int = 512,
         chunk_overlap: int = 128,
         separators: Optional[Sequence[str]] = None,
+        token_counter: Optional[TokenCounter] = None,
     ):
         """初始化文本分块器
-        
+
         Args:
             chunk_size: 每个文本块的最大字符数
             chunk_overlap: 文本块之间的重叠字符数
             separators: 用于拆分文本的分隔符列表
+            token_counter: token 计数器；提供时在文本块元数据中记录 token_count，
+                供下游批处理和上下文拼装直接复用
         """
         self.chunk_size = chunk_size
         self.chunk_overlap = chunk_overlap
         self.separators = separators or ["\n\n", "\n", " ", ""]
-    
+        self.token_counter = token_counter
+
     def split_text(self, text: str, **kwargs) -> List[str]:
         """将文本拆分为字符串列表
-        
+
         Args:
             text: 要拆分的文本
             **kwargs: 额外参数
-            
+
         Returns:
             List[str]: 文本块列表
         """
+        return [
+            text[start:end] if tail_start == tail_end else text[start:end] + text[tail_start:tail_end]
+            for start, end, tail_start, tail_end in self.split_spans(text, **kwargs)
+        ]
+
+    def split_text_with_offsets(self, text: str, **kwargs) -> List[Tuple[str, int, int]]:
+        """将文本拆分为 (文本块, 起始偏移, 结束偏移) 列表
+
+        Args:
+            text: 要拆分的文本
+            **kwargs: 额外参数
+
+        Returns:
+            List[Tuple[str, int, int]]: 文本块及其在原文中覆盖的 [start, end) 区间
+        """
+        return [(extract_span(text, span), *span_bounds(span)) for span in self.split_spans(text, **kwargs)]
+
+    def split_spans(self, text: str, **kwargs) -> List[ChunkSpan]:
+        """计算文本块在原文中的位置
+
+        Args:
+            text: 要拆分的文本
+            **kwargs: 额外参数（chunk_size、chunk_overlap、separators）
+
+        Returns:
+            List[ChunkSpan]: 去除首尾空白后的非空文本块位置
+        """
         chunk_size = kwargs.get("chunk_size", self.chunk_size)
         chunk_overlap = kwargs.get("chunk_overlap", self.chunk_overlap)
         separators = kwargs.get("separators", self.separators)
-        
-        def _split_text_with_separator(text: str, separator: str) -> List[str]:
-            """使用指定分隔符拆分文本"""
-            if separator == "":
-                return list(text)
-            
-            parts = text.split(separator)
-            result = []
-            current_part = ""
-            
-            for part in parts:
-                if len(current_part) + len(part) + len(separator) <= chunk_size:
-                    if current_part:
-                        current_part += separator + part
-                    else:
-                        current_part = part
-                else:
-                    if current_part:
-                        result.append(current_part)
-                    current_part = part
-            
-            if current_part:
-                result.append(current_part)
-            
-            return result
-        
-        chunks = [text]
-        
+
+        spans = [(0, len(text))]
+
         for separator in separators:
-            temp_chunks = []
-            for chunk in chunks:
-                if len(chunk) > chunk_size:
-                    temp_chunks.extend(_split_text_with_separator(chunk, separator))
+            temp_spans = []
+            for start, end in spans:
+                if self._length(text, start, end) > chunk_size:
+                    temp_spans.extend(self._split_span(text, start, end, separator, chunk_size))
                 else:
-                    temp_chunks.append(chunk)
-            chunks = temp_chunks
-        
-        # 处理重叠
-        if chunk_overlap > 0:
-            final_chunks = []
-            for i, chunk in enumerate(chunks):
-                final_chunks.append(chunk)
-                if i < len(chunks) - 1:
-                    next_chunk = chunks[i + 1]
-                    overlap_text = chunk[-chunk_overlap:] + next_chunk[:chunk_overlap]
-                    if len(overlap_text) > chunk_overlap:
-                        final_chunks[-1] = final_chunks[-1][:-chunk_overlap] + overlap_text
-        else:
-            final_chunks = chunks
-        
-        # 过滤空块
-        final_chunks = [chunk.strip() for chunk in final_chunks if chunk.strip()]
-        
-        return final_chunks
-    
+                    temp_spans.append((start, end))
+            spans = temp_spans
+
+        return self._finalize_spans(text, spans, chunk_overlap)
+
+    def _length(self, text: str, start: int, end: int) -> int:
+        """计算 text[start:end] 的长度（按字符）"""
+        return end - start
+
+    def _split_span(
+        self,
+        text: str,
+        start: int,
+        end: int,
+        separator: str,
+        chunk_size: int
+    ) -> List[Tuple[int, int]]:
+        """使用指定分隔符拆分 text[start:end]，并把相邻片段贪心合并到 chunk_size 以内"""
+        if separator == "":
+            return [(i, i + 1) for i in range(start, end)]
+
+        separator_length = len(separator)
+        result = []
+        current_start = current_end = start
+        current_length = 0
+        position = start
+
+        # 只使用各片段的长度推算偏移，片段字符串本身用完即释放
+        for part_length in map(len, text[start:end].split(separator)):
+            part_end = position + part_length
+
+            if current_length + part_length + separator_length <= chunk_size:
+                if current_length:
+                    # 原文中当前片段与新片段之间恰好隔着分隔符，合并后仍是连续区间
+                    current_end = part_end
+                    current_length = current_end - current_start
+                else:
+                    current_start, current_end, current_length = position, part_end, part_length
+            else:
+                if current_length:
+                    result.append((current_start, current_end))
+                current_start, current_end, current_length = position, part_end, part_length
+
+            position = part_end + separator_length
+
+        if current_length:
+            result.append((current_start, current_end))
+
+        return result
+
+    def _finalize_spans(self, text: str, spans: List[Tuple[int, int]], chunk_overlap: int) -> List[ChunkSpan]:
+        """为每个文本块追加下一个文本块开头的 chunk_overlap 个字符，并去除首尾空白、过滤空块
+
+        单次遍历完成，首尾均非空白的文本块（绝大多数情况）无需逐字符处理。
+        """
+        result = []
+        append = result.append
+        isspace = str.isspace
+        # 末尾补一个空区间作为最后一个文本块的“下一个”，其长度为 0，不会产生重叠
+        following = iter(spans[1:] + [(0, 0)]) if chunk_overlap > 0 else None
+
+        for start, end in spans:
+            tail_start = tail_end = end
+
+            if following is not None:
+                next_start, next_end = next(following)
+                own = end - start
+                borrowed = next_end - next_start
+                if own > chunk_overlap:
+                    own = chunk_overlap
+                if borrowed > chunk_overlap:
+                    borrowed = chunk_overlap
+                if own + borrowed > chunk_overlap:
+                    tail_start, tail_end = next_start, next_start + borrowed
+
+            if start == end:
+                continue
+            if isspace(text[start]) or isspace(text[(tail_end if tail_start < tail_end else end) - 1]):
+                span = _strip_span(text, (start, end, tail_start, tail_end))
+                if span[0] < span[1] or span[2] < span[3]:
+                    append(span)
+            else:
+                append((start, end, tail_start, tail_end))
+
+        return result
+
     def split_document(self, document: Document, **kwargs) -> ChunkResult:
         """将文档拆分为文档块
-        
+
         Args:
             document: 要拆分的文档
             **kwargs: 额外参数
-            
+
         Returns:
             ChunkResult: 分块结果
         """
-        chunks = self.split_text(document.text, **kwargs)
-        
-        chunk_documents = []
-        for i, chunk in enumerate(chunks):
-            # 创建新的元数据，包含块信息
-            chunk_metadata = document.metadata.copy()
-            chunk_metadata.update({
-                "document_type": "chunk",
-                "chunk_id": i,
-                "chunk_total": len(chunks),
-                "chunk_size": len(chunk),
-                "parent_id": document.id
-            })
-            
-            chunk_document = Document(
-                text=chunk,
-                metadata=chunk_metadata,
-                id=f"{document.id}_chunk_{i}" if document.id else None
-            )
-            
-            chunk_documents.append(chunk_document)
-        
+        chunk_documents = list(self.split_to_table([document], **kwargs))
+
         return ChunkResult(
             chunks=chunk_documents,
             original_document=document,
             chunk_count=len(chunk_documents)
         )
-    
+
+    def split_to_table(
+        self,
+        documents: Iterable[Document],
+        table: Optional[ChunkTable] = None,
+        **kwargs
+    ) -> ChunkTable:
+        """将文档拆分为列式文本块表，不为每个文本块创建 Document 和元数据字典
+
+        Args:
+            documents: 要拆分的文档
+            table: 追加写入的文本块表，默认新建
+            **kwargs: 额外参数
+
+        Returns:
+            ChunkTable: 文本块表，按需生成与 split_document 相同的文本块
+        """
+        if table is None:
+            table = ChunkTable()
+
+        for document in documents:
+            text = document.text
+            spans = self.split_spans(text, **kwargs)
+            token_counts = None
+            if self.token_counter is not None:
+                # 整篇文档只计算一次 token 前缀和，每个文本块的 token 数 O(1) 得到
+                prefix = self.token_counter.prefix_counts(text)
+                token_counts = [_span_token_count(prefix, span) for span in spans]
+            table.add_document(document, spans, token_counts)
+
+        return table
+
     def split_documents(self, documents: List[Document], **kwargs) -> List[ChunkResult]:
         """将多个文档拆分为文档块
-        
+
         Args:
             documents: 要拆分的文档列表
             **kwargs: 额外参数
-            
+
         Returns:
             List[ChunkResult]: 分块结果列表
         """
@@ -144,3 +258,173 @@ class RecursiveCharacterTextSplitter(TextSplitter):
             results.append(self.split_document(document, **kwargs))
         return results
 
+
+class TokenTextSplitter(RecursiveCharacterTextSplitter):
+    """按 token 数分块的递归文本分块器
+
+    分隔符的递归拆分与 RecursiveCharacterTextSplitter 相同，但 chunk_size / chunk_overlap
+    以 token 计。整篇文本先计算一次逐字符的 token 前缀和，之后任意区间的 token 数
+    都是一次减法；中英文混排时每个文本块的 token 数也基本稳定。
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = 512,
+        chunk_overlap: int = 128,
+        separators: Optional[Sequence[str]] = None,
+        token_counter: Optional[TokenCounter] = None,
+    ):
+        """初始化文本分块器
+
+        Args:
+            chunk_size: 每个文本块的最大 token 数
+            chunk_overlap: 文本块之间的重叠 token 数
+            separators: 用于拆分文本的分隔符列表
+            token_counter: token 计数器，默认使用进程内共享的计数器
+        """
+        super().__init__(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            separators=separators,
+            token_counter=token_counter or get_token_counter()
+        )
+
+    def split_spans(self, text: str, **kwargs) -> List[ChunkSpan]:
+        """计算文本块在原文中的位置（按 token 计量）
+
+        Args:
+            text: 要拆分的文本
+            **kwargs: 额外参数（chunk_size、chunk_overlap、separators）
+
+        Returns:
+            List[ChunkSpan]: 去除首尾空白后的非空文本块位置
+        """
+        chunk_size = kwargs.get("chunk_size", self.chunk_size)
+        chunk_overlap = kwargs.get("chunk_overlap", self.chunk_overlap)
+        separators = kwargs.get("separators", self.separators)
+        prefix = self.token_counter.prefix_counts(text)
+
+        spans = [(0, len(text))]
+
+        for separator in separators:
+            temp_spans = []
+            for start, end in spans:
+                if prefix[end] - prefix[start] > chunk_size:
+                    temp_spans.extend(self._split_token_span(text, prefix, start, end, separator, chunk_size))
+                else:
+                    temp_spans.append((start, end))
+            spans = temp_spans
+
+        result = []
+        last_index = len(spans) - 1
+        for i, (start, end) in enumerate(spans):
+            tail_start = tail_end = end
+            if chunk_overlap > 0 and i < last_index:
+                # 取下一个文本块开头不超过 chunk_overlap 个 token 的部分作为重叠
+                next_start, next_end = spans[i + 1]
+                cut = int(np.searchsorted(prefix, prefix[next_start] + chunk_overlap, side="right")) - 1
+                tail_start, tail_end = next_start, min(max(cut, next_start), next_end)
+
+            span = _strip_span(text, (start, end, tail_start, tail_end))
+            if span[0] < span[1] or span[2] < span[3]:
+                result.append(span)
+        return result
+
+    def _split_token_span(
+        self,
+        text: str,
+        prefix: np.ndarray,
+        start: int,
+        end: int,
+        separator: str,
+        chunk_size: int
+    ) -> List[Tuple[int, int]]:
+        """使用指定分隔符拆分 text[start:end]，并把相邻片段贪心合并到 chunk_size 个 token 以内"""
+        if separator == "":
+            # 没有可用的分隔符时，直接按 token 预算切分字符
+            result = []
+            position = start
+            while position < end:
+                cut = int(np.searchsorted(prefix, prefix[position] + chunk_size, side="right")) - 1
+                cut = min(max(cut, position + 1), end)
+                result.append((position, cut))
+                position = cut
+            return result
+
+        separator_length = len(separator)
+        result = []
+        current_start = current_end = start
+        position = start
+
+        for part_length in map(len, text[start:end].split(separator)):
+            part_end = position + part_length
+
+            if current_end > current_start and prefix[part_end] - prefix[current_start] <= chunk_size:
+                current_end = part_end
+            else:
+                if current_end > current_start:
+                    result.append((current_start, current_end))
+                current_start, current_end = position, part_end
+
+            position = part_end + separator_length
+
+        if current_end > current_start:
+            result.append((current_start, current_end))
+
+        return result
+
+
+def create_text_splitter(
+    chunk_size: int,
+    chunk_overlap: int,
+    chunk_unit: str = "char",
+    token_counter: Optional[TokenCounter] = None
+) -> TextSplitter:
+    """创建文本分块器实例
+
+    Args:
+        chunk_size: 文本块大小
+        chunk_overlap: 文本块重叠大小
+        chunk_unit: 计量单位，"char" 按字符，"token" 按 token
+        token_counter: token 计数器，用于在元数据中记录 token_count
+
+    Returns:
+        TextSplitter: 文本分块器实例
+    """
+    if chunk_unit == "token":
+        return TokenTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            token_counter=token_counter
+        )
+    if chunk_unit == "char":
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+            token_counter=token_counter
+        )
+    raise ValueError(f"Unsupported chunk_unit: {chunk_unit}")
+
+
+def _span_token_count(prefix: np.ndarray, span: ChunkSpan) -> int:
+    """根据 token 前缀和计算文本块的 token 数"""
+    start, end, tail_start, tail_end = span
+    return int(math.ceil(prefix[end] - prefix[start] + prefix[tail_end] - prefix[tail_start]))
+
+
+def _strip_span(text: str, span: ChunkSpan) -> ChunkSpan:
+    """在不生成字符串的前提下，去除文本块首尾的空白字符"""
+    start, end, tail_start, tail_end = span
+    while start < end and text[start].isspace():
+        start += 1
+    if start == end:
+        while tail_start < tail_end and text[tail_start].isspace():
+            tail_start += 1
+
+    while tail_end > tail_start and text[tail_end - 1].isspace():
+        tail_end -= 1
+    if tail_end == tail_start:
+        while end > start and text[end - 1].isspace():
+            end -= 1
+
+    return (start, end, tail_start, tail_end)
@@ -0,0 +1,172 @@
+import logging
+import math
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenCounter:
+    """Token 计数器基础接口
+
+    除了统计整段文本的 token 数，还提供逐字符的累计计数（前缀和），
+    使任意区间 text[start:end] 的 token 数都可以 O(1) 得到，便于分块时增量计数。
+    """
+
+    def count(self, text: str) -> int:
+        """统计文本的 token 数
+
+        Args:
+            text: 文本
+
+        Returns:
+            int: token 数
+        """
+        if not text:
+            return 0
+        return int(math.ceil(self.prefix_counts(text)[-1]))
+
+    def prefix_counts(self, text: str) -> np.ndarray:
+        """计算逐字符的累计 token 数
+
+        Args:
+            text: 文本
+
+        Returns:
+            np.ndarray: 长度为 len(text) + 1 的数组，第 i 项为 text[:i] 的 token 数
+        """
+        raise NotImplementedError
+
+
+class EstimatedTokenCounter(TokenCounter):
+    """离线 token 估算器，按字符类别加权，无需下载词表
+
+    默认权重按常见 BPE 词表（Qwen / cl100k 一类）的经验值设定：
+    中日韩字符约 0.7 token/字，英文字母和数字约 4 字符/token，空白几乎不单独成 token。
+    可用 calibrate() 根据真实分词结果重新拟合权重。
+    """
+
+    # 字符类别：中日韩、ASCII 字母数字、空白、ASCII 标点、其他
+    CLASS_NAMES = ("cjk", "alnum", "space", "punct", "other")
+    DEFAULT_WEIGHTS = (0.7, 0.25, 0.05, 0.6, 0.5)
+
+    def __init__(self, weights: Optional[Sequence[float]] = None):
+        """初始化估算器
+
+        Args:
+            weights: 各字符类别的 token 权重，顺序同 CLASS_NAMES
+        """
+        self.weights = np.asarray(self.DEFAULT_WEIGHTS if weights is None else weights, dtype=np.float64)
+        # 最近一次计算的前缀和，同一文本连续调用（分块后统计每块 token 数）时直接复用
+        self._last: Optional[Tuple[str, np.ndarray]] = None
+
+    @staticmethod
+    def _classify(text: str) -> np.ndarray:
+        """向量化地把每个字符映射到类别编号"""
+        codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+        classes = np.full(codes.shape, 4, dtype=np.uint8)
+
+        ascii_mask = codes < 128
+        classes[ascii_mask] = 3
+        alnum = (
+            ((codes >= 48) & (codes <= 57))
+            | ((codes >= 65) & (codes <= 90))
+            | ((codes >= 97) & (codes <= 122))
+        )
+        classes[alnum] = 1
+        classes[(codes == 32) | (codes == 9) | (codes == 10) | (codes == 13)] = 2
+        cjk = (
+            ((codes >= 0x4E00) & (codes <= 0x9FFF))
+            | ((codes >= 0x3400) & (codes <= 0x4DBF))
+            | ((codes >= 0x3000) & (codes <= 0x30FF))
+            | ((codes >= 0xAC00) & (codes <= 0xD7AF))
+            | ((codes >= 0xFF00) & (codes <= 0xFFEF))
+        )
+        classes[cjk] = 0
+        return classes
+
+    def prefix_counts(self, text: str) -> np.ndarray:
+        last = self._last
+        if last is not None and last[0] is text:
+            return last[1]
+
+        prefix = np.zeros(len(text) + 1, dtype=np.float64)
+        if text:
+            np.cumsum(self.weights[self._classify(text)], out=prefix[1:])
+
+        self._last = (text, prefix)
+        return prefix
+
+    def calibrate(self, texts: List[str], token_counts: List[int]) -> np.ndarray:
+        """根据真实分词结果，用最小二乘重新拟合各类别权重
+
+        Args:
+            texts: 样本文本
+            token_counts: 样本文本对应的真实 token 数
+
+        Returns:
+            np.ndarray: 新的权重
+        """
+        features = np.stack([
+            np.bincount(self._classify(text), minlength=len(self.CLASS_NAMES))
+            for text in texts
+        ]).astype(np.float64)
+        weights, *_ = np.linalg.lstsq(features, np.asarray(token_counts, dtype=np.float64), rcond=None)
+        self.weights = np.clip(weights, 0.0, None)
+        self._last = None
+        return self.weights
+
+
+class TiktokenCounter(TokenCounter):
+    """基于本地 BPE 词表（tiktoken）的精确计数器
+
+    tiktoken 会把词表缓存到 TIKTOKEN_CACHE_DIR，离线环境需提前放好词表文件。
+    """
+
+    def __init__(self, encoding_name: str = "cl100k_base"):
+        """初始化计数器
+
+        Args:
+            encoding_name: tiktoken 编码名称
+        """
+        import tiktoken
+
+        self.encoding = tiktoken.get_encoding(encoding_name)
+
+    def count(self, text: str) -> int:
+        return len(self.encoding.encode(text, disallowed_special=()))
+
+    def prefix_counts(self, text: str) -> np.ndarray:
+        tokens = self.encoding.encode(text, disallowed_special=())
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        # 每个 token 计入其起始字符之后的位置
+        starts = np.zeros(len(text) + 1, dtype=np.float64)
+        np.add.at(starts, np.minimum(np.asarray(offsets, dtype=np.int64) + 1, len(text)), 1.0)
+        return np.cumsum(starts)
+
+
+def create_token_counter(encoding_name: Optional[str] = None) -> TokenCounter:
+    """创建 token 计数器
+
+    Args:
+        encoding_name: tiktoken 编码名称；为空或 tiktoken 不可用时使用离线估算器
+
+    Returns:
+        TokenCounter: token 计数器实例
+    """
+    if encoding_name:
+        try:
+            return TiktokenCounter(encoding_name)
+        except Exception as e:
+            logger.warning(f"无法加载 BPE 词表 {encoding_name}，改用离线估算器: {e}")
+    return EstimatedTokenCounter()
+
+
+@lru_cache()
+def get_token_counter() -> TokenCounter:
+    """获取进程内共享的 token 计数器（单例）"""
+    return create_token_counter(get_settings().tokenizer_encoding)
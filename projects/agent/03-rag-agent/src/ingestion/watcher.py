@@ -0,0 +1,301 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from src.config.settings import get_settings
+from src.document_store.base import DocumentStore
+from src.ingestion.dedup import ChunkDeduplicator
+from src.ingestion.document_loader import SimpleDocumentLoader
+from src.ingestion.manifest import IndexManifest, default_manifest_path, index_config
+from src.ingestion.pipeline import IngestionPipeline, IngestionStats
+
+try:
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentWatcher:
+    """
+    文档目录监听器
+
+    优先使用 watchdog（inotify 等系统通知），未安装时退化为定期扫描文件大小和修改时间。
+    连续的文件事件会被合并：最后一次事件之后静默 debounce 秒才触发一次回调，
+    避免编辑器保存、批量拷贝时对同一批文件反复建索引。回调在监听器的后台线程中串行执行。
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        on_change: Callable[[List[str]], None],
+        extensions: Optional[Iterable[str]] = None,
+        debounce: float = 2.0,
+        poll_interval: float = 5.0,
+        use_polling: Optional[bool] = None,
+    ):
+        """
+        初始化监听器
+
+        Args:
+            directory: 监听的目录
+            on_change: 变更回调，参数为本轮合并后发生变化的路径
+            extensions: 关注的文件扩展名，默认关注所有文件
+            debounce: 合并事件的静默时间（秒）
+            poll_interval: 轮询模式下的扫描间隔（秒）
+            use_polling: 是否强制使用轮询，默认仅在 watchdog 不可用时轮询
+        """
+        self.directory = directory
+        self.on_change = on_change
+        self.extensions = {ext.lower() for ext in extensions} if extensions else None
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_polling = Observer is None if use_polling is None else use_polling
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._pending: Set[str] = set()
+        self._last_event = 0.0
+        self._snapshot: Dict[str, Tuple[int, float]] = {}
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    def start(self, initial_sync: bool = True) -> None:
+        """
+        启动监听
+
+        Args:
+            initial_sync: 是否在启动后立即触发一次回调，补上服务停机期间的变更
+        """
+        if self._thread is not None:
+            return
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._stop.clear()
+
+        if self.use_polling:
+            self._snapshot = self._scan()
+            logger.info(f"正在以轮询模式监听文档目录 {self.directory}（间隔 {self.poll_interval} 秒）")
+        else:
+            self._observer = Observer()
+            self._observer.schedule(_WatchdogHandler(self), self.directory, recursive=True)
+            self._observer.start()
+            logger.info(f"正在监听文档目录 {self.directory}")
+
+        if initial_sync:
+            self.notify(self.directory)
+
+        self._thread = threading.Thread(target=self._run, name="document-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """停止监听，等待正在执行的回调结束"""
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join(timeout)
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def notify(self, path: str) -> None:
+        """记录一个发生变化的路径，等待静默期结束后统一处理"""
+        with self._lock:
+            self._pending.add(path)
+            self._last_event = time.monotonic()
+
+    def is_relevant(self, path: str) -> bool:
+        """判断路径是否属于关注的文件类型"""
+        if self.extensions is None:
+            return True
+        return os.path.splitext(path)[1].lower() in self.extensions
+
+    def _run(self) -> None:
+        """后台线程：轮询扫描（如需要）并在静默期结束后触发回调"""
+        tick = max(0.05, min(self.debounce, 0.5))
+        next_scan = time.monotonic() + self.poll_interval
+
+        while not self._stop.wait(tick):
+            now = time.monotonic()
+            if self.use_polling and now >= next_scan:
+                self._poll()
+                next_scan = now + self.poll_interval
+
+            with self._lock:
+                if not self._pending or now - self._last_event < self.debounce:
+                    continue
+                paths, self._pending = sorted(self._pending), set()
+
+            try:
+                self.on_change(paths)
+            except Exception as e:
+                logger.exception(f"处理文档变更失败: {e}")
+
+    def _poll(self) -> None:
+        """扫描目录并与上次快照比较"""
+        snapshot = self._scan()
+        previous = self._snapshot
+        self._snapshot = snapshot
+
+        for path, signature in snapshot.items():
+            if previous.get(path) != signature:
+                self.notify(path)
+        for path in previous.keys() - snapshot.keys():
+            self.notify(path)
+
+    def _scan(self) -> Dict[str, Tuple[int, float]]:
+        """记录目录下关注文件的 (大小, 修改时间)"""
+        snapshot = {}
+        for root, _, files in os.walk(self.directory):
+            for file in files:
+                path = os.path.join(root, file)
+                if not self.is_relevant(path):
+                    continue
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                snapshot[path] = (stat.st_size, stat.st_mtime)
+        return snapshot
+
+
+class _WatchdogHandler:
+    """把 watchdog 事件转发给 DocumentWatcher"""
+
+    def __init__(self, watcher: DocumentWatcher):
+        self.watcher = watcher
+
+    def dispatch(self, event) -> None:
+        if event.event_type in ("opened", "closed_no_write"):
+            return
+        for path in (event.src_path, getattr(event, "dest_path", None)):
+            # 目录事件（如整个子目录被移动或删除）同样需要触发同步
+            if path and (event.is_directory or self.watcher.is_relevant(path)):
+                self.watcher.notify(path)
+
+
+class LiveIndexUpdater:
+    """
+    在线索引更新：根据索引清单增量同步向量数据库和文档存储
+
+    每次回调都会与清单比较整个目录（只比较大小和修改时间，代价很低），
+    因此即使漏掉个别文件事件，下一次触发时也会被补上。
+    """
+
+    def __init__(
+        self,
+        pipeline: IngestionPipeline,
+        manifest: IndexManifest,
+        directory: str,
+    ):
+        """
+        初始化更新器
+
+        Args:
+            pipeline: 索引构建流水线
+            manifest: 索引清单
+            directory: 文档目录
+        """
+        self.pipeline = pipeline
+        self.manifest = manifest
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def __call__(self, paths: List[str]) -> IngestionStats:
+        return self.update()
+
+    def update(self) -> IngestionStats:
+        """同步一次目录中的全部变更"""
+        with self._lock:
+            loader = self.pipeline.document_loader
+            stats = self.pipeline.sync(loader.iter_file_paths(self.directory), self.manifest)
+
+            if stats.changed_files or stats.removed_files:
+                logger.info(
+                    f"文档索引已更新：新增 {stats.added_count}，修改 {stats.modified_count}，"
+                    f"删除 {stats.removed_count}，写入文本块 {stats.chunk_count}，"
+                    f"清理旧文本块 {stats.deleted_chunk_count}，跳过近似重复 {stats.duplicate_chunk_count}，"
+                    f"失败 {len(stats.failed_files)}"
+                )
+            return stats
+
+
+def create_document_watcher(document_store: Optional[DocumentStore] = None) -> DocumentWatcher:
+    """
+    根据配置创建文档目录监听器，变更会增量写入向量数据库和文档存储
+
+    Args:
+        document_store: 文档存储（BM25 检索从中建索引），应与服务使用同一个实例
+
+    Returns:
+        DocumentWatcher: 未启动的监听器
+    """
+    from src.embeddings.openai_embeddings import create_embedding_client
+    from src.ingestion.text_splitter import create_text_splitter
+    from src.ingestion.tokenizer import get_token_counter
+    from src.vector_store.chroma_vector_store import create_vector_store
+
+    settings = get_settings()
+
+    document_loader = SimpleDocumentLoader(
+        supported_extensions=settings.document_extensions,
+        pdf_page_workers=settings.document_pdf_page_workers,
+        table_rows_per_part=settings.document_table_rows_per_part,
+        table_part_max_chars=settings.rag_chunk_size if settings.rag_chunk_unit == "char" else 0
+    )
+    text_splitter = create_text_splitter(
+        chunk_size=settings.rag_chunk_size,
+        chunk_overlap=settings.rag_chunk_overlap,
+        chunk_unit=settings.rag_chunk_unit,
+        token_counter=get_token_counter()
+    )
+    embedding_client = create_embedding_client(
+        api_key=settings.openai_api_key,
+        model=settings.embedding_model,
+        dimensions=settings.embedding_dimensions,
+        base_url=settings.openai_api_base
+    )
+    vector_store = create_vector_store(
+        store_type="chroma",
+        collection_name=settings.vector_store_collection_name,
+        embedding_dimensions=settings.embedding_dimensions,
+        vector_store_path=settings.vector_store_path,
+        embedding_function=embedding_client.embed_text
+    )
+    deduplicator = (
+        ChunkDeduplicator(settings.ingestion_dedup_max_distance)
+        if settings.ingestion_dedup_enabled else None
+    )
+    pipeline = IngestionPipeline(
+        document_loader=document_loader,
+        text_splitter=text_splitter,
+        embedding_client=embedding_client,
+        vector_store=vector_store,
+        batch_size=settings.embedding_batch_size,
+        queue_size=settings.ingestion_queue_size,
+        document_store=document_store,
+        deduplicator=deduplicator
+    )
+    manifest = IndexManifest(
+        default_manifest_path(settings.vector_store_path, settings.vector_store_collection_name),
+        config=index_config(
+            settings.rag_chunk_size,
+            settings.rag_chunk_overlap,
+            settings.rag_chunk_unit,
+            settings.embedding_model,
+            dedup_max_distance=settings.ingestion_dedup_max_distance if deduplicator else None
+        )
+    )
+    updater = LiveIndexUpdater(pipeline, manifest, settings.document_dir)
+
+    return DocumentWatcher(
+        settings.document_dir,
+        on_change=updater,
+        extensions=settings.document_extensions,
+        debounce=settings.document_watch_debounce,
+        poll_interval=settings.document_watch_poll_interval
+    )
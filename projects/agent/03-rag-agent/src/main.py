@@ -1,6 +1,8 @@
+import asyncio
 import logging
 import os
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
 from src.api.routes import router as api_router
@@ -31,10 +33,41 @@ async def lifespan(app: FastAPI):
     os.makedirs(settings.document_dir, exist_ok=True)
     
     print("settings.vector_store_path:", settings.vector_store_path)
-    logger.info("RAG Agent 应用启动成功（使用 Chroma 向量数据库）")
+    
+    # 应用级对象图（客户端、向量数据库、检索器、Agent）在后台线程中预热，启动不等待索引加载；
+    # 预热完成前 /ready 返回 503，RAG 请求也返回 503
+    from src.container import create_app_container
+    
+    container = create_app_container(settings)
+    app.state.container = container
+    watchers = []
+    
+    async def warm_up():
+        await asyncio.to_thread(container.warm_up)
+        if not container.ready:
+            return
+        
+        # 监听文档目录，新增/修改/删除的文件在线写入向量数据库和文档存储
+        if settings.document_watch_enabled and settings.index_snapshot_path:
+            logger.warning("使用索引快照时索引是只读的，已忽略 DOCUMENT_WATCH_ENABLED")
+        elif settings.document_watch_enabled:
+            from src.ingestion.watcher import create_document_watcher
+            
+            watcher = create_document_watcher(document_store=container.document_store)
+            watcher.start()
+            watchers.append(watcher)
+    
+    warm_up_task = asyncio.create_task(warm_up())
+    
+    logger.info("RAG Agent 应用启动成功（使用 Chroma 向量数据库），索引正在后台预热")
     yield
     
     logger.info("正在关闭 RAG Agent 应用...")
+    container.stop()
+    await warm_up_task
+    for watcher in watchers:
+        watcher.stop()
+    await container.aclose()
     logger.info("RAG Agent 应用已关闭")
 
 
@@ -59,6 +92,14 @@ def create_app() -> FastAPI:
             "vector_store": "Chroma"
         }
 
+    # 就绪检查接口：索引预热完成前返回 503 及进度，供负载均衡和滚动发布判断是否转发流量
+    @app.get("/ready")
+    async def readiness_check() -> JSONResponse:
+        container = getattr(app.state, "container", None)
+        if container is None:
+            return JSONResponse(status_code=503, content={"status": "starting"})
+        return JSONResponse(status_code=200 if container.ready else 503, content=container.readiness())
+
     # 包含 API 路由
     app.include_router(api_router, prefix="/agent")
     
@@ -1,9 +1,16 @@
 from src.rag_pipeline.base import RAGPipeline
 from src.rag_pipeline.basic_rag import BasicRAGPipeline, create_rag_pipeline
+from src.rag_pipeline.cache import CompletionCache, SemanticCache
+from src.rag_pipeline.compressor import ExtractiveCompressor, create_compressor
+from src.rag_pipeline.context_packer import ContextPacker
 
 __all__ = [
     "RAGPipeline",
     "BasicRAGPipeline",
+    "CompletionCache",
+    "ContextPacker",
+    "ExtractiveCompressor",
+    "SemanticCache",
+    "create_compressor",
     "create_rag_pipeline",
 ]
-
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, List, Dict, Any, Optional
 from src.ingestion.base import Document
 
 
@@ -22,6 +22,29 @@ class RAGPipeline(ABC):
         """
         pass
     
+    async def run_stream(self, query: str, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式运行 RAG Pipeline
+
+        依次产出 {"event": "sources", ...}（检索结果）、若干 {"event": "token" / "reasoning", "text": ...}
+        和 {"event": "done", ...}（run() 返回值中除回复和上下文文档以外的字段，如 cache_hit、retrieved_count）。
+        默认实现等待 run() 完成后一次性产出回复，子类可覆盖为真正的流式输出。
+
+        Args:
+            query: 用户查询文本
+            **kwargs: 其他参数
+
+        Yields:
+            流式事件字典
+        """
+        result = await self.run(query, **kwargs)
+        yield {"event": "sources", **{key: value for key, value in result.items() if key != "response"}}
+        yield {"event": "token", "text": result["response"]}
+        yield {
+            "event": "done",
+            **{key: value for key, value in result.items() if key not in ("response", "context_documents")}
+        }
+    
     @abstractmethod
     def get_context(self, query: str, **kwargs) -> List[Document]:
         """
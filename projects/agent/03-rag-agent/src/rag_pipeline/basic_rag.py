@@ -1,27 +1,59 @@
-from typing import List, Dict, Any, Optional
+import logging
+from typing import AsyncIterator, List, Dict, Any, Hashable, Optional, Sequence, Tuple
 from src.rag_pipeline.base import RAGPipeline
+from src.rag_pipeline.cache import CompletionCache, SemanticCache
+from src.rag_pipeline.compressor import ExtractiveCompressor
+from src.rag_pipeline.context_packer import ContextPacker
 from src.retriever.base import Retriever
 from src.clients.llm_client import LLMClient
+from src.embeddings.base import EmbeddingClient
 from src.ingestion.base import Document
 from src.config.settings import get_settings
 
+logger = logging.getLogger(__name__)
+
 
 class BasicRAGPipeline(RAGPipeline):
     """
     基础的 RAG Pipeline 实现，包含检索、上下文构造和 LLM 调用三个核心步骤
     """
     
-    def __init__(self, retriever: Retriever, llm_client: LLMClient):
+    SYSTEM_PROMPT = "你是一个基于知识库的问答助手，严格根据提供的上下文回答用户问题。"
+    
+    def __init__(
+        self,
+        retriever: Retriever,
+        llm_client: LLMClient,
+        semantic_cache: Optional[SemanticCache] = None,
+        embedding_client: Optional[EmbeddingClient] = None,
+        index_version: Hashable = None,
+        completion_cache: Optional[CompletionCache] = None,
+        context_packer: Optional[ContextPacker] = None,
+        compressor: Optional[ExtractiveCompressor] = None
+    ):
         """
         初始化 RAG Pipeline
         
         Args:
             retriever: 检索器实例
             llm_client: LLM 客户端实例
+            semantic_cache: 语义答案缓存，检索到相同上下文且查询相似时跳过 LLM 调用
+            embedding_client: 计算查询向量的客户端（使用语义缓存时必需，
+                应与向量检索共享同一个 CachedEmbeddingClient，避免重复请求）
+            index_version: 检索器所用索引的版本，语义缓存和补全缓存据此失效
+            completion_cache: 补全缓存，完整请求体相同时跳过 LLM 调用
+            context_packer: 上下文装填器，默认按配置的 rag_context_limit 创建
+            compressor: 可选的抽取式压缩器，每个上下文只保留与查询最相关的句子
         """
         self.retriever = retriever
         self.llm_client = llm_client
+        self.semantic_cache = semantic_cache if embedding_client is not None else None
+        self.embedding_client = embedding_client
+        self.index_version = index_version
+        self.completion_cache = completion_cache
         self.settings = get_settings()
+        self.context_packer = context_packer or ContextPacker(max_tokens=self.settings.rag_context_limit)
+        self.compressor = compressor
         self._pipeline_runs = 0
         self._retrieval_count = 0
         self._llm_calls = 0
@@ -78,6 +110,25 @@ class BasicRAGPipeline(RAGPipeline):
         retrieve_k = k or self.settings.rag_top_k
         return self.retriever.retrieve(query, k=retrieve_k, **kwargs)
     
+    def _prepare_context(self, query: str, context_documents: List[Document]) -> List[Document]:
+        """
+        把检索结果整理为提示词中的上下文：合并重叠的文本块，（启用压缩时）只保留与查询相关的句子，
+        再按 token 预算装填
+        
+        Args:
+            query: 用户查询
+            context_documents: 检索到的文档（按相关性从高到低排列）
+            
+        Returns:
+            实际放入提示词的上下文文档
+        """
+        if self.compressor is None:
+            return self.context_packer.pack(context_documents)
+        return self.context_packer.pack(
+            context_documents,
+            compress=lambda documents: self.compressor.compress(query, documents)
+        )
+    
     async def run(self, query: str, k: Optional[int] = None, **kwargs) -> Dict[str, Any]:
         """
         运行 RAG Pipeline 处理查询并生成响应
@@ -92,22 +143,136 @@ class BasicRAGPipeline(RAGPipeline):
         """
         self._pipeline_runs += 1
         
-        # 1. 检索相关文档
+        # 1. 检索相关文档，按 token 预算整理上下文
         retrieve_k = k or self.settings.rag_top_k
-        context_documents = self.get_context(query, k=retrieve_k, **kwargs)
+        retrieved_documents = self.get_context(query, k=retrieve_k, **kwargs)
+        context_documents = self._prepare_context(query, retrieved_documents)
         
         # 2. 构建提示词
         prompt = self._build_prompt(query, context_documents)
         
-        # 3. 调用 LLM 生成响应
-        self._llm_calls += 1
-        system_prompt = "你是一个基于知识库的问答助手，严格根据提供的上下文回答用户问题。"
-        response = await self.llm_client.chat(system_prompt, prompt)
+        # 3. 查找补全缓存和语义答案缓存，都未命中时调用 LLM 生成响应
+        context_ids = [doc.id for doc in context_documents]
+        response, cache_keys = self._cache_lookup(query, prompt, context_ids)
+        cache_hit = response is not None
+        if not cache_hit:
+            self._llm_calls += 1
+            response, ok = await self.llm_client.chat_with_status(self.SYSTEM_PROMPT, prompt)
+            if ok:
+                self._cache_store(query, context_ids, cache_keys, response)
         
         # 4. 准备返回结果
-        result = {
+        return {
             "query": query,
             "response": response,
+            "cache_hit": cache_hit,
+            **self._context_details(context_documents, len(retrieved_documents))
+        }
+    
+    async def run_stream(self, query: str, k: Optional[int] = None, **kwargs) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式运行 RAG Pipeline：检索完成后先产出上下文来源，再逐段产出 LLM 生成的内容
+        
+        Args:
+            query: 用户查询文本
+            k: 返回的文档数量，默认使用配置文件中的值
+            **kwargs: 其他参数
+            
+        Yields:
+            流式事件字典，见 RAGPipeline.run_stream
+        """
+        self._pipeline_runs += 1
+        
+        retrieve_k = k or self.settings.rag_top_k
+        retrieved_documents = self.get_context(query, k=retrieve_k, **kwargs)
+        context_documents = self._prepare_context(query, retrieved_documents)
+        yield {"event": "sources", "query": query, **self._context_details(context_documents, len(retrieved_documents))}
+        # done 事件携带与 run() 返回值相同的统计字段（上下文文档已在 sources 中发送）
+        summary = {
+            "query": query,
+            "retrieved_count": len(retrieved_documents),
+            "used_context_count": len(context_documents)
+        }
+        
+        prompt = self._build_prompt(query, context_documents)
+        context_ids = [doc.id for doc in context_documents]
+        response, cache_keys = self._cache_lookup(query, prompt, context_ids)
+        if response is not None:
+            yield {"event": "token", "text": response}
+            yield {"event": "done", **summary, "cache_hit": True}
+            return
+        
+        self._llm_calls += 1
+        parts: List[str] = []
+        failed = False
+        finish_reason = None
+        async for kind, text in self.llm_client.chat_stream(self.SYSTEM_PROMPT, prompt):
+            if kind == "content":
+                parts.append(text)
+                yield {"event": "token", "text": text}
+            elif kind == "reasoning":
+                yield {"event": "reasoning", "text": text}
+            elif kind == "finish":
+                finish_reason = text
+            else:
+                failed = True
+                yield {"event": "error", "message": text}
+        # 出错或因 max_tokens 被截断的回复不写入缓存
+        if not failed and finish_reason != "length":
+            self._cache_store(query, context_ids, cache_keys, "".join(parts))
+        elif finish_reason == "length":
+            logger.warning("LLM 流式回复达到 max_tokens 上限被截断，不写入缓存")
+        yield {"event": "done", **summary, "cache_hit": False}
+    
+    def _cache_lookup(
+        self,
+        query: str,
+        prompt: str,
+        context_ids: Sequence[str]
+    ) -> Tuple[Optional[str], Tuple[Optional[str], Optional[List[float]]]]:
+        """
+        依次查找补全缓存（完整请求相同）和语义答案缓存（上下文相同且查询相似）
+        
+        Returns:
+            (命中的回复, (请求哈希, 查询向量))；后者供未命中时写回缓存，对应缓存未启用时为 None
+        """
+        request_key = None
+        if self.completion_cache is not None:
+            request_key = self.llm_client.request_key(self.SYSTEM_PROMPT, prompt)
+            response = self.completion_cache.get(request_key, self.index_version)
+            if response is not None:
+                return response, (request_key, None)
+        
+        if self.semantic_cache is None:
+            return None, (request_key, None)
+        try:
+            query_embedding = self.embedding_client.embed_text(query)
+        except Exception as e:
+            logger.warning(f"计算查询向量失败，跳过语义答案缓存: {e}")
+            return None, (request_key, None)
+        response = self.semantic_cache.lookup(query_embedding, context_ids, self.index_version)
+        return response, (request_key, query_embedding)
+    
+    def _cache_store(
+        self,
+        query: str,
+        context_ids: Sequence[str],
+        cache_keys: Tuple[Optional[str], Optional[List[float]]],
+        response: str
+    ) -> None:
+        """把 LLM 的真实回复写入补全缓存和语义答案缓存"""
+        if not response:
+            return
+        request_key, query_embedding = cache_keys
+        if self.completion_cache is not None and request_key is not None:
+            self.completion_cache.put(request_key, self.index_version, response)
+        if self.semantic_cache is not None and query_embedding is not None:
+            self.semantic_cache.store(query, query_embedding, context_ids, self.index_version, response)
+    
+    @staticmethod
+    def _context_details(context_documents: List[Document], retrieved_count: int) -> Dict[str, Any]:
+        """检索结果中返回给调用方的部分：实际放入提示词的上下文及数量"""
+        return {
             "context_documents": [
                 {
                     "id": doc.id,
@@ -116,11 +281,9 @@ class BasicRAGPipeline(RAGPipeline):
                 }
                 for doc in context_documents
             ],
-            "retrieved_count": len(context_documents),
-            "used_context_count": min(len(context_documents), retrieve_k)
+            "retrieved_count": retrieved_count,
+            "used_context_count": len(context_documents)
         }
-        
-        return result
     
     def get_pipeline_stats(self) -> Dict[str, Any]:
         """
@@ -137,24 +300,30 @@ class BasicRAGPipeline(RAGPipeline):
             "pipeline_runs": self._pipeline_runs,
             "retrieval_count": self._retrieval_count,
             "llm_calls": self._llm_calls,
+            "completion_cache": self.completion_cache.get_stats() if self.completion_cache is not None else None,
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache is not None else None,
+            "context_packing": self.context_packer.get_stats(),
+            "compression": self.compressor.get_stats() if self.compressor is not None else None,
             "retriever": retriever_stats,
             "rag_top_k": self.settings.rag_top_k
         }
 
 
-def create_rag_pipeline(retriever: Retriever, llm_client: LLMClient) -> RAGPipeline:
+def create_rag_pipeline(retriever: Retriever, llm_client: LLMClient, **kwargs) -> RAGPipeline:
     """
     创建 RAG Pipeline 实例的工厂函数
     
     Args:
         retriever: 检索器实例
         llm_client: LLM 客户端实例
+        **kwargs: semantic_cache、embedding_client、index_version、completion_cache、context_packer、compressor，见 BasicRAGPipeline
         
     Returns:
         RAG Pipeline 实例
     """
     return BasicRAGPipeline(
         retriever=retriever,
-        llm_client=llm_client
+        llm_client=llm_client,
+        **kwargs
     )
 
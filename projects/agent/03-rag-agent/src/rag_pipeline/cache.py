@@ -0,0 +1,347 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def context_scope(context_ids: Sequence[Optional[str]]) -> str:
+    """检索结果（上下文文本块ID及顺序）的摘要，只有上下文完全相同的查询才共享答案"""
+    digest = hashlib.sha256()
+    for doc_id in context_ids:
+        digest.update((doc_id or "").encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+@dataclass
+class _SemanticEntry:
+    """一条缓存的答案"""
+    scope: str
+    query: str
+    embedding: np.ndarray  # 单位向量
+    response: str
+    created_at: float
+
+
+class SemanticCache:
+    """
+    语义答案缓存
+
+    以查询向量的余弦相似度查找之前的答案：只有检索到的上下文（文本块ID及顺序）相同、
+    并且查询向量相似度不低于阈值时才命中，命中时跳过 LLM 调用。
+    缓存与索引版本绑定，索引版本变化时全部失效。内存中按 LRU 淘汰并检查过期时间；
+    可选的 SQLite 持久化层与内存同步写入，服务重启后仍能命中。持久化时索引版本必须跨重建唯一
+    （服务使用“文档存储标识:内容版本”），否则重建后版本号重复会命中旧索引的答案。
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 1000,
+        ttl_seconds: float = 86400,
+        persist_path: Optional[str] = None,
+    ):
+        """
+        初始化缓存
+
+        Args:
+            similarity_threshold: 命中所需的最低余弦相似度
+            max_entries: 缓存的答案数量上限
+            ttl_seconds: 答案的有效期（秒），0 表示不过期
+            persist_path: SQLite 持久化文件路径，为空时只缓存在内存中
+        """
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = persist_path
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[int, _SemanticEntry]" = OrderedDict()
+        self._scopes: Dict[str, List[int]] = {}
+        self._next_id = 0
+        self._index_version: Optional[str] = None
+        self._hits = 0
+        self._misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if persist_path:
+            self._open_persistence(persist_path)
+
+    def lookup(self, query_embedding: Sequence[float], context_ids: Sequence[Optional[str]], index_version: Hashable) -> Optional[str]:
+        """
+        查找缓存的答案
+
+        Args:
+            query_embedding: 查询向量
+            context_ids: 本次检索到的上下文文本块ID（按顺序）
+            index_version: 当前索引版本
+
+        Returns:
+            Optional[str]: 命中时返回答案，否则返回 None
+        """
+        query = _normalize(query_embedding)
+        scope = context_scope(context_ids)
+        now = time.time()
+
+        with self._lock:
+            self._check_version(index_version)
+            best_id, best_score = None, self.similarity_threshold
+            expired = False
+            for entry_id in list(self._scopes.get(scope, ())):
+                entry = self._entries[entry_id]
+                if self._expired(entry, now):
+                    self._remove(entry_id)
+                    expired = True
+                    continue
+                if query is None or entry.embedding.shape != query.shape:
+                    continue
+                score = float(entry.embedding @ query)
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if expired and self._conn is not None:
+                self._conn.commit()
+
+            if best_id is None:
+                self._misses += 1
+                return None
+
+            self._hits += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id].response
+
+    def store(
+        self,
+        query: str,
+        query_embedding: Sequence[float],
+        context_ids: Sequence[Optional[str]],
+        index_version: Hashable,
+        response: str,
+    ) -> None:
+        """
+        缓存一个答案
+
+        Args:
+            query: 查询文本（仅用于排查问题）
+            query_embedding: 查询向量
+            context_ids: 生成答案时使用的上下文文本块ID（按顺序）
+            index_version: 生成答案时的索引版本
+            response: 答案
+        """
+        embedding = _normalize(query_embedding)
+        if embedding is None:
+            return
+
+        with self._lock:
+            self._check_version(index_version)
+            entry = _SemanticEntry(context_scope(context_ids), query, embedding, response, time.time())
+            entry_id = self._next_id
+            self._next_id += 1
+            self._add(entry_id, entry)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO semantic_cache (id, index_version, scope, query, embedding, response, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (entry_id, self._index_version, entry.scope, query, embedding.tobytes(), response, entry.created_at)
+                )
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+            if self._conn is not None:
+                self._conn.commit()
+
+    def clear(self) -> None:
+        """清空缓存（包括持久化层）"""
+        with self._lock:
+            self._entries.clear()
+            self._scopes.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM semantic_cache")
+                self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "similarity_threshold": self.similarity_threshold,
+                "persistent": self._conn is not None,
+            }
+
+    def close(self) -> None:
+        """关闭持久化连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _check_version(self, index_version: Hashable) -> None:
+        """索引版本变化时清空缓存；调用方持有锁"""
+        version = str(index_version)
+        if version == self._index_version:
+            return
+        if self._entries:
+            logger.info(f"索引版本已变化（{self._index_version} → {version}），语义答案缓存已清空")
+        self._entries.clear()
+        self._scopes.clear()
+        self._index_version = version
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM semantic_cache WHERE index_version != ?", (version,))
+            self._conn.commit()
+
+    def _expired(self, entry: _SemanticEntry, now: float) -> bool:
+        return bool(self.ttl_seconds) and now - entry.created_at > self.ttl_seconds
+
+    def _add(self, entry_id: int, entry: _SemanticEntry) -> None:
+        self._entries[entry_id] = entry
+        self._scopes.setdefault(entry.scope, []).append(entry_id)
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        ids = self._scopes[entry.scope]
+        ids.remove(entry_id)
+        if not ids:
+            del self._scopes[entry.scope]
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM semantic_cache WHERE id = ?", (entry_id,))
+
+    def _open_persistence(self, path: str) -> None:
+        """打开持久化数据库，把未过期的答案加载到内存（最近写入的优先）"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS semantic_cache ("
+            "id INTEGER PRIMARY KEY, index_version TEXT NOT NULL, scope TEXT NOT NULL, query TEXT NOT NULL, "
+            "embedding BLOB NOT NULL, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        if self.ttl_seconds:
+            self._conn.execute("DELETE FROM semantic_cache WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._conn.commit()
+
+        rows = self._conn.execute(
+            "SELECT id, index_version, scope, query, embedding, response, created_at "
+            "FROM semantic_cache ORDER BY id DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        if not rows:
+            return
+        # 只加载最近写入的索引版本的答案，其他版本在第一次查找时按当前索引版本清理
+        self._index_version = rows[0][1]
+        self._next_id = rows[0][0] + 1
+        for entry_id, version, scope, query, embedding, response, created_at in reversed(rows):
+            if version != self._index_version:
+                continue
+            self._add(entry_id, _SemanticEntry(scope, query, np.frombuffer(embedding, dtype=np.float32), response, created_at))
+
+
+class CompletionCache:
+    """
+    精确的补全缓存
+
+    以完整请求体（系统提示词、构造的提示词、模型、温度等）的哈希为键缓存 LLM 回复，
+    相同的请求（如评测重复运行、看板轮询同一问题）直接返回之前的回复。
+    按 LRU 限制条目数，索引版本变化时全部失效（提示词中的上下文来自索引）。
+    """
+
+    def __init__(self, max_entries: int = 512):
+        """
+        初始化缓存
+
+        Args:
+            max_entries: 缓存的回复数量上限
+        """
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._index_version: Optional[str] = None
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, key: str, index_version: Hashable) -> Optional[str]:
+        """
+        查找缓存的回复
+
+        Args:
+            key: 请求哈希（LLMClient.request_key）
+            index_version: 当前索引版本
+
+        Returns:
+            Optional[str]: 命中时返回回复，否则返回 None
+        """
+        with self._lock:
+            self._check_version(index_version)
+            response = self._entries.get(key)
+            if response is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return response
+
+    def put(self, key: str, index_version: Hashable, response: str) -> None:
+        """
+        缓存一个回复
+
+        Args:
+            key: 请求哈希
+            index_version: 生成回复时的索引版本
+            response: 回复
+        """
+        with self._lock:
+            self._check_version(index_version)
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self._invalidations,
+            }
+
+    def _check_version(self, index_version: Hashable) -> None:
+        """索引版本变化时清空缓存；调用方持有锁"""
+        version = str(index_version)
+        if version == self._index_version:
+            return
+        if self._entries:
+            self._invalidations += 1
+        self._entries.clear()
+        self._index_version = version
+
+
+def _normalize(embedding: Sequence[float]) -> Optional[np.ndarray]:
+    """转换为 float32 单位向量，零向量返回 None"""
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    if vector.ndim != 1 or norm == 0:
+        return None
+    return vector / norm
@@ -0,0 +1,222 @@
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.embeddings.base import EmbeddingClient
+from src.ingestion.base import Document
+from src.rag_pipeline.context_packer import sentence_spans
+from src.retriever.bm25_retriever import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class ExtractiveCompressor:
+    """
+    基于查询的抽取式上下文压缩
+
+    把每个上下文切分为句子，按与查询的相关度打分，每个上下文只保留得分最高的若干句（保持原文顺序，
+    不相邻的句子之间以省略号连接）。来源等元数据不变，提示词中的上下文数量和顺序也不变。
+
+    打分方式：
+    - "lexical"：查询词在句子中出现的 IDF 加权和（IDF 在本次的全部句子上计算，分词与 BM25 一致）
+    - "embedding"：句子向量与查询向量的余弦相似度；句子向量按 LRU 缓存，只为新句子请求 Embedding 接口，
+      请求失败时改用 lexical
+    """
+
+    # 不相邻句子之间的连接符
+    ELLIPSIS = " … "
+
+    def __init__(
+        self,
+        max_sentences: int = 3,
+        scoring: str = "lexical",
+        language: str = "zh",
+        embedding_client: Optional[EmbeddingClient] = None,
+        cache_size: int = 4096
+    ):
+        """
+        初始化压缩器
+
+        Args:
+            max_sentences: 每个上下文保留的句子数量上限，句子不多于此数量的上下文保持不变
+            scoring: 打分方式，"lexical" 或 "embedding"
+            language: 分词语言（lexical 打分使用）
+            embedding_client: Embedding 客户端（embedding 打分必需）
+            cache_size: 缓存的句子向量数量上限
+        """
+        if scoring not in ("lexical", "embedding"):
+            raise ValueError(f"不支持的打分方式: {scoring}，可选 lexical、embedding")
+        if scoring == "embedding" and embedding_client is None:
+            raise ValueError("embedding 打分需要 embedding_client")
+
+        self.max_sentences = max_sentences
+        self.scoring = scoring
+        self.language = language
+        self.embedding_client = embedding_client
+        self.cache_size = cache_size
+
+        self._lock = threading.Lock()
+        self._sentence_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._stats = {
+            "compressed_count": 0,
+            "sentences_in": 0,
+            "sentences_out": 0,
+            "chars_in": 0,
+            "chars_out": 0,
+        }
+
+    def compress(self, query: str, documents: List[Document]) -> List[Document]:
+        """
+        压缩上下文
+
+        Args:
+            query: 用户查询
+            documents: 上下文文档
+
+        Returns:
+            List[Document]: 压缩后的上下文（与输入一一对应，被压缩的是新的 Document，不修改输入）
+        """
+        spans = [sentence_spans(doc.text) for doc in documents]
+        targets = [i for i, doc_spans in enumerate(spans) if len(doc_spans) > self.max_sentences]
+        if not targets or self.max_sentences <= 0:
+            self._record(documents, documents, spans)
+            return list(documents)
+
+        sentences = [documents[i].text[start:end] for i in targets for start, end in spans[i]]
+        scores = self._score(query, sentences)
+
+        compressed = list(documents)
+        offset = 0
+        for i in targets:
+            count = len(spans[i])
+            doc_scores = scores[offset:offset + count]
+            offset += count
+            # 得分相同时保留靠前的句子，再按原文顺序输出
+            keep = np.sort(np.argsort(-doc_scores, kind="stable")[:self.max_sentences])
+            compressed[i] = self._extract(documents[i], spans[i], keep)
+
+        self._record(documents, compressed, spans)
+        return compressed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """压缩统计（累计值）"""
+        with self._lock:
+            chars_in = self._stats["chars_in"]
+            return {
+                "scoring": self.scoring,
+                "max_sentences": self.max_sentences,
+                **self._stats,
+                "compression_ratio": round(self._stats["chars_out"] / chars_in, 4) if chars_in else 1.0,
+            }
+
+    def _score(self, query: str, sentences: List[str]) -> np.ndarray:
+        """给句子打分，返回与 sentences 对应的分数数组"""
+        if self.scoring == "embedding":
+            try:
+                return self._embedding_scores(query, sentences)
+            except Exception as e:
+                logger.warning(f"计算句子向量失败，改用词项重合度打分: {e}")
+        return self._lexical_scores(query, sentences)
+
+    def _lexical_scores(self, query: str, sentences: List[str]) -> np.ndarray:
+        """查询词在句子中出现的 IDF 加权和"""
+        terms = list(dict.fromkeys(term.lower() for term in tokenize(query, self.language) if any(c.isalnum() for c in term)))
+        if not terms:
+            return np.zeros(len(sentences))
+
+        term_index = {term: j for j, term in enumerate(terms)}
+        presence = np.zeros((len(sentences), len(terms)), dtype=np.float64)
+        for i, sentence in enumerate(sentences):
+            columns = [term_index[token] for token in set(t.lower() for t in tokenize(sentence, self.language)) if token in term_index]
+            presence[i, columns] = 1.0
+
+        document_frequency = presence.sum(axis=0)
+        idf = np.log((len(sentences) + 1) / (document_frequency + 0.5))
+        return presence @ np.clip(idf, 0.0, None)
+
+    def _embedding_scores(self, query: str, sentences: List[str]) -> np.ndarray:
+        """句子向量与查询向量的余弦相似度"""
+        with self._lock:
+            vectors = {}
+            for sentence in dict.fromkeys(sentences):
+                vector = self._sentence_cache.get(sentence)
+                if vector is not None:
+                    self._sentence_cache.move_to_end(sentence)
+                    vectors[sentence] = vector
+
+        missing = [sentence for sentence in dict.fromkeys(sentences) if sentence not in vectors]
+        if missing:
+            embedded = np.asarray(self.embedding_client.embed_documents_array(missing), dtype=np.float32)
+            vectors.update(zip(missing, embedded))
+            with self._lock:
+                for sentence, vector in zip(missing, embedded):
+                    self._sentence_cache[sentence] = vector
+                while len(self._sentence_cache) > self.cache_size:
+                    self._sentence_cache.popitem(last=False)
+
+        matrix = np.stack([vectors[sentence] for sentence in sentences])
+        query_vector = np.asarray(self.embedding_client.embed_text(query), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_vector)
+        scores = matrix @ query_vector
+        return np.divide(scores, norms, out=np.zeros_like(scores), where=norms > 0)
+
+    def _extract(self, document: Document, spans: List[Tuple[int, int]], keep: np.ndarray) -> Document:
+        """按原文顺序拼接保留的句子，相邻句子保留原文中的间隔，不相邻的以省略号连接"""
+        text = document.text
+        parts: List[str] = []
+        previous = None
+        for index in keep.tolist():
+            start, end = spans[index]
+            if previous is not None and index == previous + 1:
+                parts.append(text[spans[previous][1]:end])
+            else:
+                if parts:
+                    parts.append(self.ELLIPSIS)
+                parts.append(text[start:end])
+            previous = index
+
+        compressed = "".join(parts).strip()
+        metadata = {**document.metadata, "compressed": True, "original_chunk_size": len(text), "chunk_size": len(compressed)}
+        metadata.pop("token_count", None)
+        return Document(text=compressed, metadata=metadata, id=document.id)
+
+    def _record(self, documents: List[Document], compressed: List[Document], spans: List[List[Tuple[int, int]]]) -> None:
+        sentences_out = sum(
+            min(len(doc_spans), self.max_sentences) if self.max_sentences > 0 else len(doc_spans)
+            for doc_spans in spans
+        )
+        with self._lock:
+            self._stats["compressed_count"] += 1
+            self._stats["sentences_in"] += sum(len(doc_spans) for doc_spans in spans)
+            self._stats["sentences_out"] += sentences_out
+            self._stats["chars_in"] += sum(len(doc.text) for doc in documents)
+            self._stats["chars_out"] += sum(len(doc.text) for doc in compressed)
+
+
+def create_compressor(
+    scoring: str = "lexical",
+    max_sentences: int = 3,
+    embedding_client: Optional[EmbeddingClient] = None,
+    language: str = "zh"
+) -> ExtractiveCompressor:
+    """
+    创建上下文压缩器的工厂函数
+
+    Args:
+        scoring: 打分方式，"lexical" 或 "embedding"
+        max_sentences: 每个上下文保留的句子数量上限
+        embedding_client: Embedding 客户端（embedding 打分必需）
+        language: 分词语言
+
+    Returns:
+        ExtractiveCompressor: 压缩器实例
+    """
+    return ExtractiveCompressor(
+        max_sentences=max_sentences,
+        scoring=scoring,
+        language=language,
+        embedding_client=embedding_client
+    )
@@ -0,0 +1,240 @@
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.ingestion.base import Document
+from src.ingestion.tokenizer import TokenCounter, get_token_counter
+
+# 句子结束位置：中文句末标点、英文句末标点后接空白，以及换行（可带后引号或右括号）
+_SENTENCE_END = re.compile(r"(?:[。！？!?；;…]+|\.(?=\s)|\n)[”’\"'）)\]]*")
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """
+    把文本切分为句子
+
+    Args:
+        text: 文本
+
+    Returns:
+        List[Tuple[int, int]]: 每个句子在文本中的区间 [start, end)（包含句末标点，不含前导空白），空白句子被跳过
+    """
+    spans = []
+    start = 0
+    for match in _SENTENCE_END.finditer(text):
+        spans.append((start, match.end()))
+        start = match.end()
+    spans.append((start, len(text)))
+
+    result = []
+    for start, end in spans:
+        while start < end and text[start].isspace():
+            start += 1
+        if text[start:end].strip():
+            result.append((start, end))
+    return result
+
+
+class ContextPacker:
+    """
+    按 token 预算装填上下文
+
+    1. 合并来自同一父文档（parent_id）且位置相邻或重叠的文本块，去掉分块重叠部分的重复文本
+    2. 按检索排名依次装入预算：放得下的整块装入；放不下时在句子边界截断，只保留完整的句子
+    3. 保持检索排名顺序输出，提示词中的上下文大小不超过预算
+    """
+
+    # 提示词中每个上下文的标题（序号、来源）和分隔符的估算开销
+    PER_DOCUMENT_OVERHEAD = 16
+
+    def __init__(self, max_tokens: int = 4096, token_counter: Optional[TokenCounter] = None):
+        """
+        初始化装填器
+
+        Args:
+            max_tokens: 上下文的 token 预算，0 表示不限制（仍合并重叠的文本块）
+            token_counter: token 计数器，默认使用进程内共享的计数器
+        """
+        self.max_tokens = max_tokens
+        self._token_counter = token_counter
+        self._lock = threading.Lock()
+        self._stats = {
+            "packed_count": 0,
+            "documents_in": 0,
+            "documents_out": 0,
+            "merged_count": 0,
+            "truncated_count": 0,
+            "tokens_in": 0,
+            "tokens_out": 0,
+        }
+
+    @property
+    def token_counter(self) -> TokenCounter:
+        if self._token_counter is None:
+            self._token_counter = get_token_counter()
+        return self._token_counter
+
+    def pack(
+        self,
+        documents: List[Document],
+        compress: Optional[Callable[[List[Document]], List[Document]]] = None
+    ) -> List[Document]:
+        """
+        在预算内装填上下文
+
+        Args:
+            documents: 检索到的文本块（按相关性从高到低排列）
+            compress: 可选的压缩步骤，在合并重叠的文本块之后、按预算装填之前执行
+
+        Returns:
+            List[Document]: 装填后的上下文（合并或截断的文本块是新的 Document，不修改输入）
+        """
+        merged = self.merge_overlaps(documents)
+        merged_count = len(documents) - len(merged)
+        if compress is not None:
+            merged = compress(merged)
+        budget = self.max_tokens if self.max_tokens and self.max_tokens > 0 else None
+
+        packed: List[Document] = []
+        tokens_in = tokens_out = truncated = 0
+        for doc in merged:
+            cost = self._token_count(doc) + self.PER_DOCUMENT_OVERHEAD
+            tokens_in += cost
+            if budget is None or tokens_out + cost <= budget:
+                packed.append(doc)
+                tokens_out += cost
+                continue
+
+            remaining = budget - tokens_out - self.PER_DOCUMENT_OVERHEAD
+            if remaining <= 0:
+                continue
+            # 只有需要在句子边界截断的文本块才计算逐字符的 token 前缀和
+            prefix = self.token_counter.prefix_counts(doc.text)
+            text = self._truncate(doc.text, prefix, remaining)
+            if text:
+                metadata = {**doc.metadata, "chunk_size": len(text), "truncated": True}
+                metadata.pop("token_count", None)
+                packed.append(Document(text=text, metadata=metadata, id=doc.id))
+                tokens_out += int(np.ceil(prefix[len(text)])) + self.PER_DOCUMENT_OVERHEAD
+                truncated += 1
+
+        with self._lock:
+            self._stats["packed_count"] += 1
+            self._stats["documents_in"] += len(documents)
+            self._stats["documents_out"] += len(packed)
+            self._stats["merged_count"] += merged_count
+            self._stats["truncated_count"] += truncated
+            self._stats["tokens_in"] += tokens_in
+            self._stats["tokens_out"] += tokens_out
+        return packed
+
+    def _token_count(self, doc: Document) -> int:
+        """
+        文本块的 token 数
+
+        未被合并、压缩或截断的文本块直接使用分块时记录在元数据中的 token_count
+        （这些步骤生成的新文本块会去掉该字段），其余文本块现场计数。
+        """
+        token_count = doc.metadata.get("token_count")
+        if isinstance(token_count, int) and token_count >= 0:
+            return token_count
+        return self.token_counter.count(doc.text)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """装填统计（累计值）"""
+        with self._lock:
+            return {"max_tokens": self.max_tokens, **self._stats}
+
+    @staticmethod
+    def merge_overlaps(documents: List[Document]) -> List[Document]:
+        """
+        合并同一父文档中相邻或重叠的文本块
+
+        合并后的文本块位于组内排名最高的文本块的位置，文本按原文顺序拼接，
+        ID 为组内文本块 ID 按原文顺序以 "+" 连接。缺少位置信息的文本块保持不变，重复的文本块只保留一次。
+        """
+        groups: Dict[Any, List[int]] = {}
+        seen_ids = set()
+        items: List[Optional[Document]] = []
+        for doc in documents:
+            if doc.id is not None:
+                if doc.id in seen_ids:
+                    continue
+                seen_ids.add(doc.id)
+            items.append(doc)
+            parent_id = doc.metadata.get("parent_id")
+            start, end = doc.metadata.get("start"), doc.metadata.get("end")
+            if parent_id is not None and isinstance(start, int) and isinstance(end, int):
+                groups.setdefault(parent_id, []).append(len(items) - 1)
+
+        for indices in groups.values():
+            if len(indices) < 2:
+                continue
+            ordered = sorted(indices, key=lambda i: (items[i].metadata["start"], items[i].metadata["end"]))
+            run, tail = [ordered[0]], ordered[0]
+            for index in ordered[1:]:
+                # 与本组中结束位置最靠后的文本块比较
+                if ContextPacker._overlap(items[tail], items[index]) is None:
+                    ContextPacker._merge_run(items, run)
+                    run, tail = [], index
+                run.append(index)
+                if items[index].metadata["end"] > items[tail].metadata["end"]:
+                    tail = index
+            ContextPacker._merge_run(items, run)
+
+        return [doc for doc in items if doc is not None]
+
+    @staticmethod
+    def _overlap(previous: Document, current: Document) -> Optional[int]:
+        """
+        后一个文本块开头与前一个文本块结尾重复的字符数，两者在原文中不相接时返回 None
+
+        分块时文本块主体和重叠部分之间的分隔符会被去掉，文本长度不一定等于 end - start，
+        因此在原文重叠区间的长度以内查找前一块的后缀与后一块的前缀相同的最长部分。
+        """
+        start, end = current.metadata["start"], previous.metadata["end"]
+        if start > end:
+            return None
+        if start == end:
+            return 0
+        if current.metadata["end"] <= end and current.text in previous.text:
+            return len(current.text)
+        for size in range(min(end - start, len(previous.text), len(current.text)), 0, -1):
+            if previous.text.endswith(current.text[:size]):
+                return size
+        return None
+
+    @staticmethod
+    def _merge_run(items: List[Optional[Document]], run: List[int]) -> None:
+        """把一组按原文顺序排列、首尾相接的文本块合并到其中排名最高的位置"""
+        if len(run) < 2:
+            return
+        first = items[run[0]]
+        text, end = first.text, first.metadata["end"]
+        previous = first
+        for index in run[1:]:
+            doc = items[index]
+            if doc.metadata["end"] > end:
+                text += doc.text[ContextPacker._overlap(previous, doc):]
+                end = doc.metadata["end"]
+                previous = doc
+
+        best = min(run)
+        metadata = {**items[best].metadata, "start": first.metadata["start"], "end": end, "chunk_size": len(text)}
+        metadata.pop("token_count", None)
+        metadata["merged_ids"] = [items[index].id for index in run]
+        merged_id = "+".join(str(items[index].id) for index in run)
+        for index in run:
+            items[index] = None
+        items[best] = Document(text=text, metadata=metadata, id=merged_id)
+
+    @staticmethod
+    def _truncate(text: str, prefix: np.ndarray, max_tokens: int) -> str:
+        """截断到预算内的最后一个句子边界，一个完整句子都放不下时返回空字符串"""
+        limit = int(np.searchsorted(prefix, max_tokens, side="right")) - 1
+        cut = 0
+        for match in _SENTENCE_END.finditer(text, 0, limit):
+            cut = match.end()
+        return text[:cut].rstrip()
@@ -0,0 +1,232 @@
+import json
+import os
+from array import array
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+class BM25Index:
+    """
+    基于倒排表的 BM25 (Okapi) 索引
+
+    打分公式与 rank_bm25.BM25Okapi 完全一致（包括负 idf 取 epsilon * 平均 idf 的处理），
+    但倒排表以 CSR 数组保存：查询只访问查询词的倒排列表，
+    并且可以写入 .npy 文件后以内存映射方式加载，无需重新分词。
+    文档增删时用 update() 生成新索引，只需为新文档分词。
+    """
+
+    VOCAB_FILE = "bm25_vocab.json"
+    ARRAY_FILES = ("bm25_offsets.npy", "bm25_docs.npy", "bm25_freqs.npy", "bm25_doc_len.npy")
+
+    def __init__(
+        self,
+        vocab: List[str],
+        offsets: np.ndarray,
+        docs: np.ndarray,
+        freqs: np.ndarray,
+        doc_len: np.ndarray,
+        k1: float = 1.5,
+        b: float = 0.75,
+        epsilon: float = 0.25,
+    ):
+        """
+        初始化索引
+
+        Args:
+            vocab: 词表，第 i 个词的倒排列表为 docs/freqs[offsets[i]:offsets[i + 1]]
+            offsets: 倒排列表偏移（长度为词表大小 + 1）
+            docs: 倒排列表中的文档序号
+            freqs: 倒排列表中的词频
+            doc_len: 每个文档的词数
+            k1: BM25 参数 k1
+            b: BM25 参数 b
+            epsilon: 负 idf 的下限系数
+        """
+        self.vocab = {term: i for i, term in enumerate(vocab)}
+        self.offsets = offsets
+        self.docs = docs
+        self.freqs = freqs
+        self.doc_len = doc_len
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.corpus_size = len(doc_len)
+        self.avgdl = float(doc_len.sum()) / self.corpus_size if self.corpus_size else 0.0
+
+        document_frequency = np.diff(np.asarray(offsets)).astype(np.float64)
+        idf = np.log(self.corpus_size - document_frequency + 0.5) - np.log(document_frequency + 0.5)
+        average_idf = float(idf.mean()) if idf.size else 0.0
+        self.idf = np.where(idf < 0, epsilon * average_idf, idf)
+
+        # 文档长度归一化项，每次查询复用
+        if self.corpus_size:
+            self._norm = k1 * (1 - b + b * np.asarray(doc_len, dtype=np.float64) / self.avgdl)
+        else:
+            self._norm = np.zeros(0)
+
+    @classmethod
+    def build(cls, tokenized_docs: Iterable[List[str]], **kwargs) -> "BM25Index":
+        """
+        由分词后的文档构建索引
+
+        Args:
+            tokenized_docs: 每个文档的词列表
+            **kwargs: BM25 参数（k1、b、epsilon）
+
+        Returns:
+            BM25Index: 索引
+        """
+        vocab: Dict[str, int] = {}
+        term_ids, doc_ids, freqs, doc_len = _count_postings(tokenized_docs, vocab, 0)
+        return cls._from_postings(sorted(vocab, key=vocab.get), term_ids, doc_ids, freqs, doc_len, **kwargs)
+
+    def update(self, removed: Sequence[int], tokenized_docs: Iterable[List[str]]) -> "BM25Index":
+        """
+        增量更新：删除指定序号的文档，并在末尾追加新文档
+
+        保留文档的倒排条目直接复用，只统计新文档的词频；被删除文档之后的文档序号依次前移。
+        结果与用更新后的语料重新 build() 的索引打分一致。本索引不变，更新期间可以继续查询。
+
+        Args:
+            removed: 要删除的文档序号（修改过的文档先删除再作为新文档追加）
+            tokenized_docs: 追加的文档的词列表
+
+        Returns:
+            BM25Index: 新的索引
+        """
+        keep = np.ones(self.corpus_size, dtype=bool)
+        keep[np.asarray(removed, dtype=np.int64)] = False
+        new_position = (np.cumsum(keep) - 1).astype(np.int32)
+
+        # 展开旧的倒排表为 (词, 文档, 词频) 条目，去掉被删除文档的条目
+        old_terms = np.repeat(np.arange(len(self.vocab), dtype=np.int32), np.diff(np.asarray(self.offsets)))
+        old_docs = np.asarray(self.docs)
+        alive = keep[old_docs]
+
+        # 词表按插入顺序即词序号排列，新词追加在末尾
+        vocab = dict(self.vocab)
+        term_ids, doc_ids, freqs, doc_len = _count_postings(tokenized_docs, vocab, int(keep.sum()))
+        terms = list(vocab)
+
+        term_ids = np.concatenate([old_terms[alive], term_ids])
+        # 去掉不再出现在任何文档中的词，词表与重新 build 的一致（平均 idf 不受影响）
+        used = np.bincount(term_ids, minlength=len(terms)) > 0
+        term_ids = (np.cumsum(used) - 1).astype(np.int32)[term_ids]
+        return self._from_postings(
+            [term for term, flag in zip(terms, used) if flag],
+            term_ids,
+            np.concatenate([new_position[old_docs[alive]], doc_ids]),
+            np.concatenate([np.asarray(self.freqs)[alive], freqs]),
+            np.concatenate([np.asarray(self.doc_len)[keep], doc_len]),
+            k1=self.k1,
+            b=self.b,
+            epsilon=self.epsilon
+        )
+
+    @classmethod
+    def _from_postings(
+        cls,
+        terms: List[str],
+        term_ids: np.ndarray,
+        doc_ids: np.ndarray,
+        freqs: np.ndarray,
+        doc_len: np.ndarray,
+        **kwargs
+    ) -> "BM25Index":
+        """由 (词, 文档, 词频) 条目组装 CSR 倒排表；同一个词的条目按文档序号递增给出"""
+        # 按词分组；稳定排序保持每个倒排列表内文档序号递增
+        order = np.argsort(term_ids, kind="stable")
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(terms)), out=offsets[1:])
+        return cls(terms, offsets, doc_ids[order], freqs[order], doc_len, **kwargs)
+
+    def get_scores(self, query: List[str]) -> np.ndarray:
+        """
+        计算查询对全部文档的 BM25 分数
+
+        Args:
+            query: 查询分词结果（重复的词重复计分，与 rank_bm25 一致）
+
+        Returns:
+            np.ndarray: 每个文档的分数
+        """
+        scores = np.zeros(self.corpus_size)
+        for token in query:
+            term = self.vocab.get(token)
+            if term is None:
+                continue
+            start, end = int(self.offsets[term]), int(self.offsets[term + 1])
+            docs = self.docs[start:end]
+            freqs = self.freqs[start:end].astype(np.float64)
+            scores[docs] += self.idf[term] * (freqs * (self.k1 + 1) / (freqs + self._norm[docs]))
+        return scores
+
+    def save(self, directory: str) -> List[str]:
+        """
+        把索引写入目录
+
+        Args:
+            directory: 目标目录
+
+        Returns:
+            List[str]: 写入的文件名
+        """
+        terms = sorted(self.vocab, key=self.vocab.get)
+        with open(os.path.join(directory, self.VOCAB_FILE), "w", encoding="utf-8") as f:
+            json.dump({"k1": self.k1, "b": self.b, "epsilon": self.epsilon, "terms": terms}, f, ensure_ascii=False)
+        for name, values in zip(self.ARRAY_FILES, (self.offsets, self.docs, self.freqs, self.doc_len)):
+            np.save(os.path.join(directory, name), np.asarray(values))
+        return [self.VOCAB_FILE, *self.ARRAY_FILES]
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> "BM25Index":
+        """
+        从目录加载索引
+
+        Args:
+            directory: save() 写入的目录
+            mmap: 是否以内存映射方式加载倒排数组
+
+        Returns:
+            BM25Index: 索引
+        """
+        with open(os.path.join(directory, cls.VOCAB_FILE), "r", encoding="utf-8") as f:
+            vocab = json.load(f)
+        arrays = [
+            np.load(os.path.join(directory, name), mmap_mode="r" if mmap else None)
+            for name in cls.ARRAY_FILES
+        ]
+        return cls(vocab["terms"], *arrays, k1=vocab["k1"], b=vocab["b"], epsilon=vocab["epsilon"])
+
+
+def _count_postings(
+    tokenized_docs: Iterable[List[str]],
+    vocab: Dict[str, int],
+    first_doc: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    统计文档的词频
+
+    Args:
+        tokenized_docs: 每个文档的词列表
+        vocab: 词表（词 -> 词序号），新词追加到末尾
+        first_doc: 第一个文档的序号
+
+    Returns:
+        (词序号, 文档序号, 词频, 文档词数) 数组
+    """
+    term_ids, doc_ids, freqs = array("i"), array("i"), array("i")
+    doc_len = array("i")
+
+    for doc_index, tokens in enumerate(tokenized_docs, first_doc):
+        doc_len.append(len(tokens))
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            term_ids.append(vocab.setdefault(token, len(vocab)))
+            doc_ids.append(doc_index)
+            freqs.append(count)
+
+    return tuple(np.asarray(values, dtype=np.int32) for values in (term_ids, doc_ids, freqs, doc_len))
@@ -1,10 +1,64 @@
 # src/retriever/bm25_retriever.py
-import jieba
-from typing import List, Dict, Any, Optional
-from rank_bm25 import BM25Okapi
+import logging
+import os
+import time
+import numpy as np
+from functools import lru_cache
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Sequence
 
 from src.retriever.base import Retriever
+from src.retriever.bm25_index import BM25Index
 from src.ingestion.base import Document
+from src.document_store.base import DocumentStore
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache()
+def _import_jieba() -> ModuleType:
+    """延迟导入 jieba，不做中文检索的进程不必加载"""
+    import jieba
+    
+    jieba.setLogLevel(logging.INFO)
+    return jieba
+
+
+def preload_tokenizer(language: str = "zh", cache_dir: Optional[str] = None) -> None:
+    """
+    预加载分词词典
+    
+    jieba 在第一次分词时才加载词典（从缓存加载约 1 秒，无缓存时需从词典文本构建），
+    启动预热时显式调用，避免第一个请求承担这部分延迟。
+    
+    Args:
+        language: 语言类型，只有中文需要加载词典
+        cache_dir: 词典缓存目录，默认为系统临时目录；容器部署时可指向持久化目录，
+            避免每次启动都重新构建
+    """
+    if language != "zh":
+        return
+    
+    jieba = _import_jieba()
+    if jieba.dt.initialized:
+        return
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        jieba.dt.tmp_dir = cache_dir
+    
+    start = time.perf_counter()
+    jieba.initialize()
+    logger.info(f"jieba 词典已加载，用时 {time.perf_counter() - start:.2f} 秒")
+
+
+def tokenize(text: str, language: str = "zh") -> List[str]:
+    """BM25 使用的分词函数（建索引和导出索引快照共用，保证分词一致）"""
+    if not text.strip():
+        return []
+    if language == "zh":
+        return [word for word in _import_jieba().cut(text) if word.strip() and not word.isspace()]
+    else:
+        return text.lower().split()
 
 
 class BM25Retriever(Retriever):
@@ -12,39 +66,104 @@ class BM25Retriever(Retriever):
     基于 BM25 的关键词检索器
     """
     
-    def __init__(self, documents: List[Document], language: str = "zh"):
+    def __init__(
+        self,
+        documents: Optional[List[Document]] = None,
+        language: str = "zh",
+        document_store: Optional[DocumentStore] = None,
+        index: Optional[BM25Index] = None,
+        doc_ids: Optional[Sequence[str]] = None,
+        progress: Optional[Callable[[int], Any]] = None
+    ):
         """
         初始化 BM25 检索器
         
         Args:
             documents: 所有文档列表（用于构建索引）
             language: 语言类型 ("zh" 中文 / "en" 英文)
+            document_store: 文档存储；提供时从存储中读取文本建索引，
+                索引只保留文档ID，检索结果的 top-k 再从存储中取回
+            index: 预先构建的倒排索引（如从索引快照加载），提供时不再分词建索引，
+                需同时提供 document_store 和与索引文档序号一一对应的 doc_ids
+            progress: 从文档存储建索引时，每分词 1000 个文档调用一次，参数为已处理的文档数；
+                回调抛出的异常会中止建索引
         """
         self.documents = documents
+        self.document_store = document_store
         self.language = language
         self._retrieval_count = 0
         
-        # 预处理：提取文本并分词
+        if index is not None:
+            self.doc_ids = doc_ids if doc_ids is not None else []
+            self.bm25 = index if index.corpus_size else None
+            return
+        
+        # 预处理：分词（文本不在检索器中保留）
         tokenized_docs = []
-        self.doc_texts = []
+        self.doc_ids: List[str] = []
+        
+        if document_store is not None:
+            for doc_id, text in document_store.iter_texts():
+                self.doc_ids.append(doc_id)
+                tokenized_docs.append(self._tokenize(text))
+                if progress is not None and len(self.doc_ids) % 1000 == 0:
+                    progress(len(self.doc_ids))
+        else:
+            for doc in documents or []:
+                tokenized_docs.append(self._tokenize(doc.text))
         
-        for doc in documents:
-            text = doc.text
-            self.doc_texts.append(text)
-            tokens = self._tokenize(text)
-            tokenized_docs.append(tokens)
+        # 构建 BM25 索引（空语料时无法计算平均长度）
+        self.bm25 = BM25Index.build(tokenized_docs) if tokenized_docs else None
+    
+    def apply_changes(
+        self,
+        upserted_ids: Sequence[str],
+        deleted_ids: Sequence[str],
+        progress: Optional[Callable[[int], Any]] = None
+    ) -> "BM25Retriever":
+        """
+        按文档存储的变化增量更新，返回新的检索器（本检索器不变，更新期间可以继续检索）
+        
+        只为写入的文档分词，其余文档的倒排条目直接复用。
+        
+        Args:
+            upserted_ids: 写入或覆盖的文档ID（见 DocumentStore.changes_since）
+            deleted_ids: 删除的文档ID
+            progress: 每分词 1000 个文档调用一次，参数为已处理的文档数；回调抛出的异常会中止更新
+            
+        Returns:
+            BM25Retriever: 更新后的检索器
+        """
+        if self.document_store is None:
+            raise ValueError("只有基于文档存储的 BM25 检索器支持增量更新")
+        
+        position = {str(doc_id): i for i, doc_id in enumerate(self.doc_ids)}
+        removed = {position[doc_id] for doc_id in (*upserted_ids, *deleted_ids) if doc_id in position}
+        
+        added_ids: List[str] = []
+        tokenized_docs = []
+        upserted_ids = list(upserted_ids)
+        for start in range(0, len(upserted_ids), 1000):
+            batch = upserted_ids[start:start + 1000]
+            for doc_id, document in zip(batch, self.document_store.get_documents(batch)):
+                if document is None:
+                    # 写入之后又被删除
+                    continue
+                added_ids.append(doc_id)
+                tokenized_docs.append(self._tokenize(document.text))
+            if progress is not None:
+                progress(start + len(batch))
         
-        # 构建 BM25 索引
-        self.bm25 = BM25Okapi(tokenized_docs)
+        doc_ids = [doc_id for i, doc_id in enumerate(self.doc_ids) if i not in removed] + added_ids
+        if self.bm25 is None:
+            index = BM25Index.build(tokenized_docs)
+        else:
+            index = self.bm25.update(sorted(removed), tokenized_docs)
+        return BM25Retriever(language=self.language, document_store=self.document_store, index=index, doc_ids=doc_ids)
     
     def _tokenize(self, text: str) -> List[str]:
         """分词函数"""
-        if not text.strip():
-            return []
-        if self.language == "zh":
-            return [word for word in jieba.cut(text) if word.strip() and not word.isspace()]
-        else:
-            return text.lower().split()
+        return tokenize(text, self.language)
     
     def retrieve(self, query: str, k: int = 5, **kwargs) -> List[Document]:
         """仅返回文档（不带分数）"""
@@ -55,20 +174,31 @@ class BM25Retriever(Retriever):
         """返回文档 + BM25 分数"""
         self._retrieval_count += 1
         
+        if self.bm25 is None or k <= 0:
+            return []
+        
         tokenized_query = self._tokenize(query)
         scores = self.bm25.get_scores(tokenized_query)
         
-        # 获取 top-k 索引（按分数降序）
-        top_k_indices = sorted(
-            range(len(scores)), 
-            key=lambda i: scores[i], 
-            reverse=True
-        )[:k]
+        # 获取 top-k 索引（按分数降序）：先 O(n) 选出 k 个，再只对这 k 个排序
+        if k < len(scores):
+            candidates = np.argpartition(-scores, k - 1)[:k]
+        else:
+            candidates = np.arange(len(scores))
+        top_k_indices = candidates[np.argsort(-scores[candidates], kind="stable")]
+        
+        if self.document_store is not None:
+            documents = self.document_store.get_documents([str(self.doc_ids[idx]) for idx in top_k_indices])
+        else:
+            documents = [self.documents[idx] for idx in top_k_indices]
         
         results = []
-        for idx in top_k_indices:
+        for idx, document in zip(top_k_indices, documents):
+            if document is None:
+                # 建索引之后已被删除的文本块
+                continue
             results.append({
-                "document": self.documents[idx],
+                "document": document,
                 "score": float(scores[idx])  # 转为 float 兼容 JSON
             })
         
@@ -80,6 +210,6 @@ class BM25Retriever(Retriever):
             **base_stats,
             "retrieval_count": self._retrieval_count,
             "retriever_type": "BM25Retriever",
-            "document_count": len(self.documents),
+            "document_count": len(self.doc_ids) if self.document_store is not None else len(self.documents or []),
             "language": self.language
         }
\ No newline at end of file
@@ -11,7 +11,7 @@ from src.retriever.base import Retriever
 def create_retriever(
     vector_store: 'VectorStore',
     embedding_client: 'EmbeddingClient',
-    documents: List[Document],  # 新增：用于 BM25
+    documents: Optional[List[Document]] = None,  # 新增：用于 BM25
     retriever_type: str = "hybrid",  # "vector", "bm25", or "hybrid"
     **kwargs
 ) -> Retriever:
@@ -23,17 +23,18 @@ def create_retriever(
         embedding_client: Embedding 客户端
         documents: 所有原始文档（用于 BM25）
         retriever_type: 检索器类型
+        **kwargs: document_store（BM25 从文档存储建索引）、
+            bm25_retriever（复用已构建的 BM25 检索器）、language、权重等
     """
     if retriever_type == "vector":
         return VectorStoreRetriever(vector_store, embedding_client)
     
     elif retriever_type == "bm25":
-        lang = kwargs.get("language", "zh")
-        return BM25Retriever(documents, language=lang)
+        return kwargs.get("bm25_retriever") or _create_bm25_retriever(documents, **kwargs)
     
     elif retriever_type == "hybrid":
         vector_retriever = VectorStoreRetriever(vector_store, embedding_client)
-        bm25_retriever = BM25Retriever(documents, language=kwargs.get("language", "zh"))
+        bm25_retriever = kwargs.get("bm25_retriever") or _create_bm25_retriever(documents, **kwargs)
         return HybridRetriever(
             vector_retriever=vector_retriever,
             bm25_retriever=bm25_retriever,
@@ -42,4 +43,13 @@ def create_retriever(
         )
     
     else:
-        raise ValueError(f"Unsupported retriever_type: {retriever_type}")
\ No newline at end of file
+        raise ValueError(f"Unsupported retriever_type: {retriever_type}")
+
+
+def _create_bm25_retriever(documents: Optional[List[Document]], **kwargs) -> BM25Retriever:
+    """根据参数创建 BM25 检索器"""
+    return BM25Retriever(
+        documents,
+        language=kwargs.get("language", "zh"),
+        document_store=kwargs.get("document_store")
+    )
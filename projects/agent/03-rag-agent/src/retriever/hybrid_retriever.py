@@ -19,7 +19,9 @@ def _normalize_scores(scores: List[float]) -> List[float]:
 
 
 def _get_doc_id(doc: Document) -> str:
-    """获取文档唯一ID（优先用 metadata.id，否则用文本哈希）"""
+    """获取文档唯一ID（优先用文本块ID，其次 metadata.id，否则用文本哈希）"""
+    if getattr(doc, 'id', None):
+        return str(doc.id)
     if hasattr(doc, 'metadata') and doc.metadata.get('id'):
         return str(doc.metadata['id'])
     return str(hash(doc.text))
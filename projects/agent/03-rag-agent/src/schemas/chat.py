@@ -29,6 +29,7 @@ class ChatResponseDetails(BaseModel):
     used_context_count: Optional[int] = Field(default=None, description="使用的上下文数量")
     error: Optional[str] = Field(default=None, description="错误信息")
     message: Optional[str] = Field(default=None, description="附加消息")
+    cache_hit: Optional[bool] = Field(default=None, description="是否命中答案缓存")
     
     # 工具使用相关
     expression: Optional[str] = Field(default=None, description="计算表达式")
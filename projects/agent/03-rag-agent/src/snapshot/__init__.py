@@ -0,0 +1,15 @@
+from src.snapshot.index_snapshot import (
+    IndexSnapshot,
+    embedding_fingerprint,
+    export_snapshot,
+    load_index_snapshot,
+)
+from src.snapshot.snapshot_vector_store import SnapshotVectorStore
+
+__all__ = [
+    "IndexSnapshot",
+    "SnapshotVectorStore",
+    "embedding_fingerprint",
+    "export_snapshot",
+    "load_index_snapshot",
+]
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from src.document_store.base import DocumentStore
+from src.document_store.sqlite_document_store import SQLiteDocumentStore
+from src.retriever.bm25_index import BM25Index
+from src.retriever.bm25_retriever import BM25Retriever, tokenize
+from src.snapshot.snapshot_vector_store import SnapshotVectorStore
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+META_FILE = "snapshot.json"
+VECTORS_FILE = "vectors.npy"
+NORMS_FILE = "vector_norms.npy"
+IDS_FILE = "ids.npy"
+DOCUMENTS_FILE = "documents.sqlite3"
+MANIFEST_FILE = "manifest.json"
+
+
+def embedding_fingerprint(model: str, dimensions: int) -> str:
+    """Embedding 模型和维度的指纹，服务端据此确认查询向量与快照向量可比"""
+    return hashlib.sha256(f"{model}:{dimensions}".encode("utf-8")).hexdigest()[:16]
+
+
+def file_sha256(path: str, block_size: int = 1 << 20) -> str:
+    """分块计算文件的 SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def export_snapshot(
+    output_dir: str,
+    vector_store: Any,
+    document_store: DocumentStore,
+    embedding_model: str,
+    embedding_dimensions: int,
+    manifest_path: Optional[str] = None,
+    config: Optional[Dict[str, Any]] = None,
+    language: str = "zh",
+    batch_size: int = 1000,
+) -> Dict[str, Any]:
+    """
+    把已构建的索引导出为自包含的快照目录
+
+    快照包含向量矩阵（.npy，可内存映射）、BM25 倒排表、文档存储副本、索引清单，
+    以及 Embedding 模型指纹和每个文件的 SHA-256。先写入临时目录，完成后整体重命名，
+    不会留下半成品。导出期间不应有其他进程写入索引。
+
+    Args:
+        output_dir: 快照目录，已存在时被替换
+        vector_store: 向量数据库实例（需要能按ID读回向量）
+        document_store: 文档存储（需要支持 backup）
+        embedding_model: Embedding 模型名称
+        embedding_dimensions: 向量维度
+        manifest_path: 索引清单路径，存在时一并复制
+        config: 构建配置（分块参数等），记录在快照元数据中
+        language: BM25 分词语言
+        batch_size: 每次从向量数据库读取的向量数
+
+    Returns:
+        Dict[str, Any]: 快照元数据
+    """
+    if not hasattr(document_store, "backup"):
+        raise RuntimeError(f"{document_store.__class__.__name__} 不支持备份，无法导出索引快照")
+
+    output_dir = os.path.normpath(output_dir)
+    tmp_dir = f"{output_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    try:
+        # 1. 遍历文档存储：记录文本块顺序，同时分词构建 BM25 倒排表
+        ids: List[str] = []
+
+        def tokenized_docs() -> Iterator[List[str]]:
+            for doc_id, text in document_store.iter_texts():
+                ids.append(doc_id)
+                yield tokenize(text, language)
+
+        bm25_files = BM25Index.build(tokenized_docs()).save(tmp_dir)
+        np.save(os.path.join(tmp_dir, IDS_FILE), np.array(ids, dtype=str))
+
+        # 2. 按同一顺序从向量数据库读回向量，直接写入内存映射文件
+        count = len(ids)
+        vectors = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, VECTORS_FILE), mode="w+", dtype=np.float32, shape=(count, embedding_dimensions)
+        )
+        norms = np.lib.format.open_memmap(
+            os.path.join(tmp_dir, NORMS_FILE), mode="w+", dtype=np.float32, shape=(count,)
+        )
+        for start in range(0, count, batch_size):
+            batch = _fetch_embeddings(vector_store, ids[start:start + batch_size], embedding_dimensions)
+            vectors[start:start + len(batch)] = batch
+            norms[start:start + len(batch)] = np.linalg.norm(batch, axis=1)
+        vectors.flush()
+        norms.flush()
+        del vectors, norms
+
+        # 3. 文档存储和索引清单
+        document_store.backup(os.path.join(tmp_dir, DOCUMENTS_FILE))
+        files = [IDS_FILE, VECTORS_FILE, NORMS_FILE, DOCUMENTS_FILE, *bm25_files]
+        if manifest_path and os.path.exists(manifest_path):
+            shutil.copyfile(manifest_path, os.path.join(tmp_dir, MANIFEST_FILE))
+            files.append(MANIFEST_FILE)
+
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "created_at": time.time(),
+            "chunk_count": count,
+            "embedding": {
+                "model": embedding_model,
+                "dimensions": embedding_dimensions,
+                "fingerprint": embedding_fingerprint(embedding_model, embedding_dimensions),
+            },
+            "bm25": {"language": language},
+            "config": config or {},
+            "files": {
+                name: {
+                    "size": os.path.getsize(os.path.join(tmp_dir, name)),
+                    "sha256": file_sha256(os.path.join(tmp_dir, name)),
+                }
+                for name in files
+            },
+        }
+        with open(os.path.join(tmp_dir, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    os.replace(tmp_dir, output_dir)
+    return meta
+
+
+class IndexSnapshot:
+    """
+    索引快照（只读）
+
+    服务节点直接使用下载的快照目录：向量矩阵、文本块ID和 BM25 倒排表以内存映射方式打开，
+    文档存储以只读方式打开，无需重建索引或重新 Embedding。
+    """
+
+    def __init__(self, path: str):
+        """
+        打开快照
+
+        Args:
+            path: 快照目录
+        """
+        self.path = path
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            raise ValueError(f"不是有效的索引快照目录: {path}")
+        with open(meta_path, "r", encoding="utf-8") as f:
+            self.meta: Dict[str, Any] = json.load(f)
+        if self.meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"不支持的索引快照版本: {self.meta.get('version')}")
+
+    @property
+    def chunk_count(self) -> int:
+        return self.meta["chunk_count"]
+
+    def verify(self) -> None:
+        """校验快照中每个文件的大小和 SHA-256，不一致时抛出 ValueError"""
+        for name, info in self.meta["files"].items():
+            file_path = os.path.join(self.path, name)
+            if not os.path.exists(file_path):
+                raise ValueError(f"索引快照缺少文件: {name}")
+            if os.path.getsize(file_path) != info["size"] or file_sha256(file_path) != info["sha256"]:
+                raise ValueError(f"索引快照文件校验失败: {name}")
+
+    def check_embedding(self, model: str, dimensions: int) -> None:
+        """确认服务端的 Embedding 配置与快照一致，否则查询向量与快照向量不可比"""
+        if embedding_fingerprint(model, dimensions) != self.meta["embedding"]["fingerprint"]:
+            embedding = self.meta["embedding"]
+            raise ValueError(
+                f"索引快照使用 {embedding['model']}（{embedding['dimensions']} 维）生成，"
+                f"与当前配置 {model}（{dimensions} 维）不一致"
+            )
+
+    def load_ids(self) -> np.ndarray:
+        """文本块ID（内存映射）"""
+        return np.load(os.path.join(self.path, IDS_FILE), mmap_mode="r")
+
+    def open_document_store(self) -> SQLiteDocumentStore:
+        """以只读方式打开快照中的文档存储"""
+        return SQLiteDocumentStore(os.path.join(self.path, DOCUMENTS_FILE), read_only=True)
+
+    def create_vector_store(self, document_store: DocumentStore, ids: Optional[Sequence[str]] = None) -> SnapshotVectorStore:
+        """基于内存映射向量矩阵的只读向量库"""
+        return SnapshotVectorStore(
+            vectors=np.load(os.path.join(self.path, VECTORS_FILE), mmap_mode="r"),
+            norms=np.load(os.path.join(self.path, NORMS_FILE), mmap_mode="r"),
+            ids=self.load_ids() if ids is None else ids,
+            document_store=document_store
+        )
+
+    def create_bm25_retriever(self, document_store: DocumentStore, ids: Optional[Sequence[str]] = None) -> BM25Retriever:
+        """基于快照倒排表的 BM25 检索器，不需要重新分词"""
+        return BM25Retriever(
+            language=self.meta["bm25"]["language"],
+            document_store=document_store,
+            index=BM25Index.load(self.path),
+            doc_ids=self.load_ids() if ids is None else ids
+        )
+
+
+def load_index_snapshot(
+    path: str,
+    embedding_model: str,
+    embedding_dimensions: int,
+    verify: bool = True
+) -> IndexSnapshot:
+    """
+    打开并检查索引快照
+
+    Args:
+        path: 快照目录
+        embedding_model: 服务端使用的 Embedding 模型
+        embedding_dimensions: 服务端使用的向量维度
+        verify: 是否校验文件 SHA-256（大快照较慢，可在下载时已校验的情况下关闭）
+
+    Returns:
+        IndexSnapshot: 快照
+    """
+    snapshot = IndexSnapshot(path)
+    snapshot.check_embedding(embedding_model, embedding_dimensions)
+    if verify:
+        snapshot.verify()
+    logger.info(f"已加载索引快照 {path}（{snapshot.chunk_count} 个文本块）")
+    return snapshot
+
+
+def _fetch_embeddings(vector_store: Any, ids: List[str], dimensions: int) -> np.ndarray:
+    """按ID从向量数据库读回向量，顺序与 ids 一致"""
+    if hasattr(vector_store, "get_embeddings"):
+        vectors = vector_store.get_embeddings(ids)
+    elif hasattr(vector_store, "collection"):
+        # Chroma 集合：get 返回的顺序不保证与请求一致，按ID重新排列
+        result = vector_store.collection.get(ids=ids, include=["embeddings"])
+        found = dict(zip(result["ids"], result["embeddings"]))
+        missing = [doc_id for doc_id in ids if doc_id not in found]
+        if missing:
+            raise RuntimeError(f"向量数据库缺少 {len(missing)} 个文本块的向量，如 {missing[0]}")
+        vectors = [found[doc_id] for doc_id in ids]
+    else:
+        raise RuntimeError(f"{vector_store.__class__.__name__} 不支持读取向量，无法导出索引快照")
+
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.shape != (len(ids), dimensions):
+        raise RuntimeError(f"向量形状 {vectors.shape} 与预期 ({len(ids)}, {dimensions}) 不一致")
+    return vectors
@@ -0,0 +1,100 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from src.document_store.base import DocumentStore
+from src.ingestion.base import Document
+
+
+class SnapshotVectorStore:
+    """
+    基于索引快照的只读向量库
+
+    向量矩阵以内存映射方式打开，查询时按块计算余弦相似度，只保留每块的 top-k 候选，
+    内存占用与向量总数无关；多个服务进程映射同一份文件时共享操作系统页缓存。
+    命中结果的文本和元数据从快照中的文档存储取回。
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        norms: np.ndarray,
+        ids: Sequence[str],
+        document_store: DocumentStore,
+        block_size: int = 65536,
+    ):
+        """
+        初始化向量库
+
+        Args:
+            vectors: 向量矩阵（N × 维度）
+            norms: 每个向量的 L2 范数
+            ids: 与矩阵行一一对应的文本块ID
+            document_store: 文档存储
+            block_size: 每次参与计算的向量数
+        """
+        self.vectors = vectors
+        self.norms = norms
+        self.ids = ids
+        self.document_store = document_store
+        self.block_size = block_size
+
+    def search_by_vector(self, query_vector: Sequence[float], top_k: int = 5) -> List[Tuple[Document, float]]:
+        """
+        按向量检索
+
+        Args:
+            query_vector: 查询向量
+            top_k: 返回数量
+
+        Returns:
+            List[Tuple[Document, float]]: (文档, 余弦相似度)，按相似度降序
+        """
+        total = self.vectors.shape[0]
+        if total == 0 or top_k <= 0:
+            return []
+
+        query = np.asarray(query_vector, dtype=np.float32)
+        query_norm = float(np.linalg.norm(query))
+        if query_norm == 0:
+            return []
+
+        candidate_rows: List[np.ndarray] = []
+        candidate_scores: List[np.ndarray] = []
+        for start in range(0, total, self.block_size):
+            block = self.vectors[start:start + self.block_size]
+            norms = np.asarray(self.norms[start:start + self.block_size], dtype=np.float32)
+            scores = block @ query
+            np.divide(scores, norms * query_norm, out=scores, where=norms > 0)
+            scores[norms == 0] = -1.0
+
+            if top_k < len(scores):
+                rows = np.argpartition(-scores, top_k - 1)[:top_k]
+            else:
+                rows = np.arange(len(scores))
+            candidate_rows.append(rows + start)
+            candidate_scores.append(scores[rows])
+
+        rows = np.concatenate(candidate_rows)
+        scores = np.concatenate(candidate_scores)
+        order = np.argsort(-scores, kind="stable")[:top_k]
+
+        documents = self.document_store.get_documents([str(self.ids[rows[i]]) for i in order])
+        return [
+            (document, float(scores[i]))
+            for i, document in zip(order, documents)
+            if document is not None
+        ]
+
+    def add_documents(self, documents: List[Document], embeddings=None) -> None:
+        raise RuntimeError("索引快照是只读的，请重新构建并导出快照")
+
+    def delete_collection(self) -> None:
+        raise RuntimeError("索引快照是只读的，请重新构建并导出快照")
+
+    def get_collection_size(self) -> int:
+        return int(self.vectors.shape[0])
+
+    def close(self) -> None:
+        """内存映射随对象释放，文档存储由创建者关闭"""
+        pass
@@ -0,0 +1,82 @@
+import asyncio
+import json
+
+import httpx
+
+from src.clients.llm_client import LLMClient
+from src.ingestion.base import Document
+from src.rag_pipeline.basic_rag import BasicRAGPipeline
+from src.rag_pipeline.cache import CompletionCache
+
+
+class _FakeRetriever:
+    def retrieve(self, query, k=4, **kwargs):
+        return [Document(text="RAG 把检索到的文档片段作为上下文交给大模型。", metadata={"file_name": "rag.md"}, id="doc-1")]
+
+
+def _sse(deltas, finish_reason):
+    events = [{"choices": [{"delta": {"content": text}, "finish_reason": None}]} for text in deltas]
+    events.append({"choices": [{"delta": {}, "finish_reason": finish_reason}]})
+    body = "".join(f"data: {json.dumps(event, ensure_ascii=False)}\n\n" for event in events) + "data: [DONE]\n\n"
+    return httpx.Response(200, text=body, headers={"Content-Type": "text/event-stream"})
+
+
+def _completion(content, finish_reason):
+    return httpx.Response(200, json={"choices": [{"message": {"content": content}, "finish_reason": finish_reason}]})
+
+
+def _pipeline(monkeypatch, handler, api_key="sk-test"):
+    client = LLMClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(client._settings, "openai_api_key", api_key)
+    return BasicRAGPipeline(retriever=_FakeRetriever(), llm_client=client, completion_cache=CompletionCache())
+
+
+def _run_stream(pipeline, query="什么是 RAG？"):
+    async def collect():
+        return [event async for event in pipeline.run_stream(query)]
+    return asyncio.run(collect())
+
+
+def _cached_count(pipeline):
+    return pipeline.completion_cache.get_stats()["size"]
+
+
+def test_stream_without_api_key_reports_error_and_is_not_cached(monkeypatch):
+    pipeline = _pipeline(monkeypatch, lambda request: _sse(["不应请求"], "stop"), api_key="")
+    events = _run_stream(pipeline)
+
+    assert [event["event"] for event in events] == ["sources", "error", "done"]
+    assert "OPENAI_API_KEY" in events[1]["message"]
+    assert _cached_count(pipeline) == 0
+
+
+def test_truncated_stream_is_not_cached(monkeypatch):
+    pipeline = _pipeline(monkeypatch, lambda request: _sse(["RAG 是", "检索增"], "length"))
+    events = _run_stream(pipeline)
+
+    assert "".join(event["text"] for event in events if event["event"] == "token") == "RAG 是检索增"
+    assert _cached_count(pipeline) == 0
+
+
+def test_complete_stream_is_cached(monkeypatch):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return _sse(["RAG 是", "检索增强生成。"], "stop")
+
+    pipeline = _pipeline(monkeypatch, handler)
+    _run_stream(pipeline)
+    events = _run_stream(pipeline)
+
+    assert len(calls) == 1
+    assert events[-1]["event"] == "done" and events[-1]["cache_hit"] is True
+    assert events[1]["text"] == "RAG 是检索增强生成。"
+
+
+def test_truncated_completion_is_returned_but_not_cached(monkeypatch):
+    pipeline = _pipeline(monkeypatch, lambda request: _completion("RAG 是检索增", "length"))
+    result = asyncio.run(pipeline.run("什么是 RAG？"))
+
+    assert result["response"] == "RAG 是检索增"
+    assert _cached_count(pipeline) == 0
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from src.retriever.bm25_index import BM25Index
+
+
+CORPUS = [
+    "the quick brown fox jumps over the lazy dog".split(),
+    "a quick brown dog outpaces a quick fox".split(),
+    "lazy afternoons are for sleeping".split(),
+    "the fox and the hound".split(),
+    "brown bread and butter".split(),
+]
+QUERIES = [["quick", "fox"], ["lazy"], ["brown", "brown", "bread"], ["hound", "missing"], ["sleeping"]]
+
+
+def _assert_same_scores(index, expected):
+    for query in QUERIES:
+        np.testing.assert_allclose(index.get_scores(query), expected.get_scores(query))
+
+
+def test_scores_match_rank_bm25():
+    rng = random.Random(0)
+    words = [f"w{i}" for i in range(30)]
+    for _ in range(20):
+        # 高频词在半数以上文档中出现，idf 为负，覆盖 epsilon 处理
+        corpus = [
+            rng.choices(words[:3], k=rng.randint(1, 3)) + rng.choices(words, k=rng.randint(0, 12))
+            for _ in range(rng.randint(1, 25))
+        ]
+        index = BM25Index.build(corpus)
+        expected = BM25Okapi(corpus)
+        for _ in range(10):
+            query = rng.choices(words + ["unknown"], k=rng.randint(1, 5))
+            np.testing.assert_allclose(index.get_scores(query), expected.get_scores(query))
+
+
+def test_save_and_memory_mapped_load(tmp_path):
+    index = BM25Index.build(CORPUS, k1=1.2, b=0.6)
+    files = index.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+
+    assert sorted(files) == sorted(path.name for path in tmp_path.iterdir())
+    assert isinstance(loaded.docs, np.memmap)
+    assert (loaded.k1, loaded.b, loaded.epsilon) == (1.2, 0.6, 0.25)
+    _assert_same_scores(loaded, index)
+
+
+def test_update_matches_rebuilt_index():
+    index = BM25Index.build(CORPUS)
+    added = ["a hound chases the quick fox".split(), "sleeping dogs lie".split()]
+    updated = index.update([1, 3], added)
+
+    expected = BM25Index.build([CORPUS[0], CORPUS[2], CORPUS[4], *added])
+    assert updated.corpus_size == expected.corpus_size
+    assert set(updated.vocab) == set(expected.vocab)
+    _assert_same_scores(updated, expected)
+    # 原索引不变
+    _assert_same_scores(index, BM25Index.build(CORPUS))
+
+
+def test_update_drops_terms_of_removed_documents():
+    updated = BM25Index.build(CORPUS).update([2], [])
+    assert "afternoons" not in updated.vocab
+    _assert_same_scores(updated, BM25Index.build([CORPUS[0], CORPUS[1], CORPUS[3], CORPUS[4]]))
+
+
+def test_update_of_saved_index(tmp_path):
+    BM25Index.build(CORPUS).save(str(tmp_path))
+    updated = BM25Index.load(str(tmp_path)).update([0], [["bread"]])
+    _assert_same_scores(updated, BM25Index.build([*CORPUS[1:], ["bread"]]))
@@ -0,0 +1,40 @@
+import numpy as np
+
+from src.document_store import create_document_store
+from src.ingestion.base import Document
+from src.retriever.bm25_retriever import BM25Retriever
+
+
+def _docs(texts):
+    return [Document(text=text, metadata={}, id=doc_id) for doc_id, text in texts.items()]
+
+
+def _scores(retriever, query):
+    return {item["document"].id: item["score"] for item in retriever.retrieve_with_score(query, k=10)}
+
+
+def test_apply_changes_matches_full_rebuild(tmp_path):
+    store = create_document_store(store_type="sqlite", db_path=str(tmp_path / "documents.sqlite3"))
+    store.add_documents(_docs({
+        "a": "the quick brown fox",
+        "b": "a lazy brown dog",
+        "c": "the fox and the hound",
+    }))
+    version = store.version
+    retriever = BM25Retriever(language="en", document_store=store)
+
+    store.add_documents(_docs({"b": "a quick lazy cat", "d": "brown bread and butter"}))
+    store.delete_documents(["c"])
+    _, upserted, deleted = store.changes_since(version)
+    updated = retriever.apply_changes(upserted, deleted)
+
+    rebuilt = BM25Retriever(language="en", document_store=store)
+    assert sorted(updated.doc_ids) == ["a", "b", "d"]
+    for query in ["quick fox", "brown", "hound", "lazy cat"]:
+        expected = _scores(rebuilt, query)
+        actual = _scores(updated, query)
+        assert actual.keys() == expected.keys()
+        np.testing.assert_allclose([actual[key] for key in expected], list(expected.values()))
+    # 原检索器仍使用旧索引
+    assert retriever.doc_ids == ["a", "b", "c"]
+    assert retriever.bm25.corpus_size == 3
@@ -0,0 +1,102 @@
+import argparse
+import importlib.util
+import json
+import os
+
+import numpy as np
+
+from src.config.settings import get_settings
+from src.ingestion.base import Document
+from src.ingestion.checkpoint import IngestionCheckpoint, default_checkpoint_dir
+from src.ingestion.manifest import IndexManifest, default_manifest_path
+
+
+def _load_script():
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "build_index.py")
+    spec = importlib.util.spec_from_file_location("build_index_script", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class _FakeEmbeddingClient:
+    def embed_text(self, text):
+        return [0.0] * 4
+
+    def embed_documents_array(self, texts, batch_size=64):
+        return np.ones((len(texts), 4), dtype=np.float32)
+
+
+class _FakeVectorStore:
+    # 按集合名称保存，模拟持久化的向量数据库
+    collections = {}
+
+    def __init__(self, collection_name):
+        self.collection_name = collection_name
+        self.ids = self.collections.setdefault(collection_name, set())
+
+    def add_documents(self, documents, vectors):
+        self.ids.update(doc.id for doc in documents)
+
+    def delete_documents(self, ids):
+        self.ids.difference_update(ids)
+
+    def delete_collection(self):
+        self.ids.clear()
+
+    def get_collection_size(self):
+        return len(self.ids)
+
+    def close(self):
+        pass
+
+
+def _args(**overrides):
+    values = dict(
+        document_dir=None, collection_name=None, chunk_size=None, chunk_overlap=None, chunk_unit=None,
+        no_dedup=True, parallel=False, workers=None, rebuild=False, resume=False,
+        import_path=None, import_format=None, export_snapshot=None
+    )
+    values.update(overrides)
+    return argparse.Namespace(**values)
+
+
+def test_rebuild_in_import_mode_resets_manifest_and_checkpoint(tmp_path, monkeypatch):
+    script = _load_script()
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "a.txt").write_text("第一个文件的内容。" * 30, encoding="utf-8")
+    (docs / "b.txt").write_text("第二个文件的内容。" * 30, encoding="utf-8")
+    imports = tmp_path / "import.jsonl"
+    imports.write_text(json.dumps({"id": "imported", "text": "导入的文本块", "embedding": [1, 0, 0, 0]}) + "\n", encoding="utf-8")
+
+    settings = get_settings().model_copy(update={
+        "document_dir": str(docs),
+        "vector_store_path": str(tmp_path / "vector_store"),
+        "vector_store_collection_name": "test",
+        "embedding_dimensions": 4,
+        "document_load_parallel": False,
+    })
+    monkeypatch.setattr(script, "get_settings", lambda: settings)
+    monkeypatch.setattr(script, "create_embedding_client", lambda **kwargs: _FakeEmbeddingClient())
+    monkeypatch.setattr(script, "create_vector_store", lambda **kwargs: _FakeVectorStore(kwargs["collection_name"]))
+    monkeypatch.setattr(_FakeVectorStore, "collections", {})
+
+    assert script.build_index(_args())
+    indexed = set(_FakeVectorStore.collections["test"])
+    assert len(indexed) == 2
+
+    # 上次构建遗留的检查点
+    checkpoint_dir = default_checkpoint_dir(settings.vector_store_path, "test")
+    checkpoint = IngestionCheckpoint(checkpoint_dir)
+    checkpoint.start()
+    checkpoint.write_batch([Document(text="旧批次", metadata={}, id="stale")], np.ones((1, 4), dtype=np.float32))
+
+    assert script.build_index(_args(rebuild=True, import_path=str(imports)))
+    assert _FakeVectorStore.collections["test"] == {"imported"}
+    assert len(IndexManifest(default_manifest_path(settings.vector_store_path, "test"))) == 0
+    assert not os.path.exists(checkpoint_dir)
+
+    # 之后的增量构建重新索引被清空的文件
+    assert script.build_index(_args())
+    assert _FakeVectorStore.collections["test"] == indexed | {"imported"}
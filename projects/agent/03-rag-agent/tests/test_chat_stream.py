@@ -0,0 +1,141 @@
+import asyncio
+import json
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.agent.rag_agent import RAGAgentService
+from src.api.routes import router
+from src.clients.llm_client import LLMClient
+from src.dependencies import get_rag_agent
+from src.ingestion.base import Document
+from src.rag_pipeline.basic_rag import BasicRAGPipeline
+from src.rag_pipeline.cache import CompletionCache
+
+
+class _FakeRetriever:
+    def retrieve(self, query, k=4, **kwargs):
+        return [
+            Document(text="RAG 先检索再生成。", metadata={"file_name": "rag.md"}, id="doc-1"),
+            Document(text="BM25 是关键词检索。", metadata={"file_name": "bm25.md"}, id="doc-2"),
+        ]
+
+
+def _client(monkeypatch, handler):
+    client = LLMClient(http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(client._settings, "openai_api_key", "sk-test")
+    return client
+
+
+def _sse_body(events):
+    return "".join(f"data: {json.dumps(event, ensure_ascii=False)}\n\n" for event in events) + "data: [DONE]\n\n"
+
+
+STREAM = [
+    {"choices": [{"delta": {"role": "assistant", "reasoning_content": "先想一想"}, "finish_reason": None}]},
+    {"choices": [{"delta": {"content": "RAG 是"}, "finish_reason": None}]},
+    {"choices": [{"delta": {"content": "检索增强生成。"}, "finish_reason": None}]},
+    {"choices": [{"delta": {}, "finish_reason": "stop"}]},
+    {"choices": [], "usage": {"total_tokens": 10}},
+]
+
+
+def _stream_response(request):
+    assert json.loads(request.content)["stream"] is True
+    # 注释行和空行被忽略
+    return httpx.Response(200, text=": keep-alive\n\n" + _sse_body(STREAM), headers={"Content-Type": "text/event-stream"})
+
+
+def _collect(client):
+    async def main():
+        return [item async for item in client.chat_stream("system", "问题")]
+    return asyncio.run(main())
+
+
+def test_chat_stream_parses_sse_chunks(monkeypatch):
+    assert _collect(_client(monkeypatch, _stream_response)) == [
+        ("reasoning", "先想一想"),
+        ("content", "RAG 是"),
+        ("content", "检索增强生成。"),
+        ("finish", "stop"),
+    ]
+
+
+def test_chat_stream_reports_http_and_format_errors(monkeypatch):
+    items = _collect(_client(monkeypatch, lambda request: httpx.Response(429, text="rate limited")))
+    assert len(items) == 1 and items[0][0] == "error" and "429" in items[0][1]
+
+    broken = lambda request: httpx.Response(200, text="data: {not json}\n\n")
+    assert [kind for kind, _ in _collect(_client(monkeypatch, broken))] == ["error"]
+
+
+def _parse_sse(text):
+    events = []
+    for block in text.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def _app(agent):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_rag_agent] = lambda: agent
+    return app
+
+
+def test_chat_stream_endpoint_event_order_and_done_details(monkeypatch):
+    llm = _client(monkeypatch, _stream_response)
+    pipeline = BasicRAGPipeline(retriever=_FakeRetriever(), llm_client=llm, completion_cache=CompletionCache())
+    client = TestClient(_app(RAGAgentService(rag_pipeline=pipeline, llm_client=llm)))
+
+    for cache_hit in (False, True):
+        response = client.post("/chat/stream", json={"message": "什么是 RAG？"})
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(response.text)
+        names = [name for name, _ in events]
+        tokens = "".join(data["text"] for name, data in events if name == "token")
+
+        assert names[0] == "sources" and names[-1] == "done"
+        assert len(events[0][1]["context_documents"]) == 2
+        assert tokens == "RAG 是检索增强生成。"
+        done = events[-1][1]
+        assert done["type"] == "rag"
+        # 与非流式接口相同的统计字段
+        assert done["details"] == {
+            "query": "什么是 RAG？", "retrieved_count": 2, "used_context_count": 2, "cache_hit": cache_hit
+        }
+        if not cache_hit:
+            assert names == ["sources", "reasoning", "token", "token", "done"]
+
+    assert client.post("/chat", json={"message": "什么是 RAG？"}).json()["details"]["cache_hit"] is True
+
+
+class _ClosingPipeline:
+    def __init__(self):
+        self.closed = False
+
+    async def run_stream(self, query):
+        try:
+            yield {"event": "sources", "query": query, "context_documents": []}
+            yield {"event": "token", "text": "答案"}
+            yield {"event": "done", "cache_hit": False}
+            yield {"event": "token", "text": "不应产出"}
+        finally:
+            self.closed = True
+
+
+def test_agent_closes_pipeline_stream_after_done():
+    pipeline = _ClosingPipeline()
+    agent = RAGAgentService(rag_pipeline=pipeline, coalesce_requests=False)
+
+    async def main():
+        events = [event async for event in agent.handle_message_stream("问题")]
+        await agent.aclose()
+        return events
+
+    events = asyncio.run(main())
+    assert [event["event"] for event in events] == ["sources", "token", "done"]
+    assert events[-1]["details"] == {"cache_hit": False}
+    assert pipeline.closed
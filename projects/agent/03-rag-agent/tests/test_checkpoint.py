@@ -0,0 +1,112 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.ingestion.checkpoint import IngestionCheckpoint
+from src.ingestion.base import Document
+from src.ingestion.document_loader import SimpleDocumentLoader
+from src.ingestion.manifest import IndexManifest
+from src.ingestion.pipeline import IngestionPipeline
+from src.ingestion.text_splitter import create_text_splitter
+
+
+def _batch(*ids):
+    documents = [Document(text=f"text {doc_id}", metadata={"file_path": "a.txt"}, id=doc_id) for doc_id in ids]
+    return documents, np.arange(len(ids) * 2, dtype=np.float32).reshape(len(ids), 2)
+
+
+def test_batches_round_trip_and_resume(tmp_path):
+    checkpoint = IngestionCheckpoint(str(tmp_path / "ckpt"), config={"chunk_size": 512})
+    assert checkpoint.start() == set()
+    checkpoint.write_batch(*_batch("a", "b"))
+    checkpoint.write_batch(*_batch("c"))
+    # 未写完的临时文件被忽略
+    (tmp_path / "ckpt" / "batch_00000002.npz.tmp").write_bytes(b"partial")
+
+    resumed = IngestionCheckpoint(str(tmp_path / "ckpt"), config={"chunk_size": 512})
+    assert resumed.start(resume=True) == {"a", "b", "c"}
+    batches = list(resumed.iter_batches())
+    assert [[doc.id for doc in documents] for documents, _ in batches] == [["a", "b"], ["c"]]
+    assert batches[0][0][1].metadata == {"file_path": "a.txt"}
+    np.testing.assert_array_equal(batches[0][1], _batch("a", "b")[1])
+
+    # 恢复后继续编号，不覆盖已有批次
+    resumed.write_batch(*_batch("d"))
+    assert len(list(resumed.iter_batches())) == 3
+
+
+def test_start_discards_checkpoint_without_resume_or_on_config_change(tmp_path):
+    checkpoint = IngestionCheckpoint(str(tmp_path / "ckpt"), config={"chunk_size": 512})
+    checkpoint.start()
+    checkpoint.write_batch(*_batch("a"))
+
+    assert IngestionCheckpoint(str(tmp_path / "ckpt"), config={"chunk_size": 256}).start(resume=True) == set()
+    checkpoint.start()
+    checkpoint.write_batch(*_batch("a"))
+    assert IngestionCheckpoint(str(tmp_path / "ckpt"), config={"chunk_size": 512}).start() == set()
+
+
+class _FlakyEmbeddingClient:
+    def __init__(self, fail_after=None, checkpoint_dir=None):
+        self.fail_after = fail_after
+        self.checkpoint_dir = checkpoint_dir
+        self.embedded = []
+
+    def embed_documents_array(self, texts, batch_size=64):
+        if self.fail_after is not None and len(self.embedded) >= self.fail_after:
+            # 等已完成的批次写入检查点后再失败，使结果与线程时序无关
+            deadline = time.monotonic() + 5
+            while len([name for name in os.listdir(self.checkpoint_dir) if name.endswith(".npz")]) < 2:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            raise RuntimeError("provider error")
+        self.embedded.extend(texts)
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+
+class _FakeVectorStore:
+    def __init__(self):
+        self.ids = set()
+
+    def add_documents(self, documents, vectors):
+        self.ids.update(doc.id for doc in documents)
+
+    def delete_documents(self, ids):
+        self.ids.difference_update(ids)
+
+
+def _pipeline(embedding_client, vector_store):
+    return IngestionPipeline(
+        document_loader=SimpleDocumentLoader(),
+        text_splitter=create_text_splitter(chunk_size=40, chunk_overlap=0),
+        embedding_client=embedding_client,
+        vector_store=vector_store,
+        batch_size=2,
+        queue_size=1
+    )
+
+
+def test_interrupted_build_resumes_without_reembedding(tmp_path):
+    path = tmp_path / "doc.txt"
+    path.write_text("".join(f"第{i}段内容，用于测试断点续建。\n\n" for i in range(10)), encoding="utf-8")
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    checkpoint = IngestionCheckpoint(str(tmp_path / "ckpt"))
+    vector_store = _FakeVectorStore()
+
+    with pytest.raises(RuntimeError, match="provider error"):
+        _pipeline(_FlakyEmbeddingClient(fail_after=4, checkpoint_dir=checkpoint.directory), vector_store).sync([str(path)], manifest, checkpoint=checkpoint)
+    # 失败时索引和清单保持不变，已完成的批次留在检查点中
+    assert vector_store.ids == set()
+    assert len(manifest) == 0
+    assert checkpoint.exists()
+
+    embedding_client = _FlakyEmbeddingClient()
+    stats = _pipeline(embedding_client, vector_store).sync([str(path)], manifest, checkpoint=checkpoint, resume=True)
+
+    chunk_ids = manifest.get_chunk_ids(str(path))
+    assert stats.resumed_chunk_count == 4
+    assert len(embedding_client.embedded) == len(chunk_ids) - 4
+    assert vector_store.ids == set(chunk_ids)
+    assert not checkpoint.exists()
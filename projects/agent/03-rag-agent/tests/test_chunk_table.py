@@ -0,0 +1,63 @@
+from src.ingestion.base import Document
+from src.ingestion.chunk_table import ChunkTable
+from src.ingestion.text_splitter import create_text_splitter
+from src.ingestion.tokenizer import EstimatedTokenCounter
+
+
+DOCUMENTS = [
+    Document(text="第一段内容。\n\n" + "第二段比较长，需要拆成多个文本块。" * 4 + "\n\nThe end.", metadata={"file_name": "a.md"}, id="a"),
+    Document(text="short text", metadata={"file_name": "b.txt", "page_number": 2}, id="b"),
+    Document(text="   ", metadata={"file_name": "empty.txt"}, id="empty"),
+    Document(text="no id " * 20, metadata={}, id=None),
+]
+
+
+def _as_tuple(document):
+    return document.id, document.text, document.metadata
+
+
+def test_table_materializes_same_documents_as_split_document():
+    for token_counter in (None, EstimatedTokenCounter()):
+        splitter = create_text_splitter(chunk_size=30, chunk_overlap=6, token_counter=token_counter)
+        expected = [chunk for document in DOCUMENTS for chunk in splitter.split_document(document).chunks]
+        table = splitter.split_to_table(DOCUMENTS)
+
+        assert len(table) == len(expected)
+        assert [_as_tuple(chunk) for chunk in table] == [_as_tuple(chunk) for chunk in expected]
+        assert _as_tuple(table[-1]) == _as_tuple(expected[-1])
+        assert [table.chunk_id(i) for i in range(len(table))] == [chunk.id for chunk in expected]
+
+
+def test_metadata_is_a_fresh_dict_and_parents_are_shared():
+    table = create_text_splitter(chunk_size=30, chunk_overlap=0).split_to_table(DOCUMENTS[:1])
+    first = table.document(0)
+    first.metadata["file_name"] = "changed"
+
+    assert table.document(0).metadata["file_name"] == "a.md"
+    assert DOCUMENTS[0].metadata == {"file_name": "a.md"}
+    assert table.parent(len(table) - 1) is DOCUMENTS[0]
+    assert table.parent_count == 1
+
+
+def test_append_to_existing_table_and_columns():
+    splitter = create_text_splitter(chunk_size=30, chunk_overlap=0)
+    table = splitter.split_to_table(DOCUMENTS[:1])
+    first_rows = len(table)
+    splitter.split_to_table(DOCUMENTS[1:2], table=table)
+
+    assert list(table.rows(1)) == [first_rows]
+    columns = table.columns()
+    assert columns["parent_index"].tolist() == [0] * first_rows + [1]
+    assert columns["ordinal"].tolist() == list(range(first_rows)) + [0]
+    assert (columns["token_count"] == -1).all()
+    # 返回的是副本，表仍可以继续追加
+    table.add_document(Document(text="x", metadata={}, id="x"), [(0, 1, 1, 1)])
+    assert table.chunk_id(len(table) - 1) == "x_chunk_0"
+    assert table.nbytes > 0
+
+
+def test_empty_table():
+    table = ChunkTable()
+    assert len(table) == 0
+    assert list(table) == []
+    assert all(column.size == 0 for column in table.columns().values())
@@ -0,0 +1,81 @@
+import os
+from types import SimpleNamespace
+
+from src import container as container_module
+from src.container import AppContainer
+from src.document_store import create_document_store
+from src.ingestion.base import Document
+from src.retriever.bm25_retriever import BM25Retriever
+
+
+class _FakeAgent:
+    def set_rag_pipeline(self, rag_pipeline):
+        self.rag_pipeline = rag_pipeline
+
+
+class _DeferredThread:
+    started = []
+
+    def __init__(self, target, args=(), **kwargs):
+        self.target, self.args = target, args
+
+    def start(self):
+        _DeferredThread.started.append(self)
+
+
+def _container(monkeypatch, tmp_path):
+    monkeypatch.setattr(container_module, "create_retriever", lambda **kwargs: kwargs["bm25_retriever"])
+    monkeypatch.setattr(container_module, "create_rag_pipeline", lambda **kwargs: SimpleNamespace(**kwargs))
+    monkeypatch.setattr(container_module.threading, "Thread", _DeferredThread)
+    _DeferredThread.started = []
+
+    app = AppContainer()
+    app.document_store = create_document_store(store_type="sqlite", db_path=str(tmp_path / "documents.sqlite3"))
+    app.document_store.add_documents([Document(text="the quick brown fox", metadata={}, id="a")])
+    app.rag_agent = _FakeAgent()
+    app._install_pipeline(app.document_store.version, BM25Retriever(language="en", document_store=app.document_store))
+    return app
+
+
+def _cache_version(app):
+    return f"{app.document_store.store_id}:{app.document_store.version}"
+
+
+def test_store_change_is_applied_incrementally(monkeypatch, tmp_path):
+    app = _container(monkeypatch, tmp_path)
+    monkeypatch.setattr(app, "_build_bm25_retriever", lambda track_progress=False: 1 / 0)
+    app.document_store.add_documents([Document(text="a lazy brown dog", metadata={}, id="b")])
+
+    app._refresh_in_background()
+    # 检测到变化后、更新完成前，答案缓存已经不再使用旧版本
+    assert app.rag_agent.rag_pipeline.index_version == f"{_cache_version(app)}:rebuilding"
+
+    thread, = _DeferredThread.started
+    thread.target(*thread.args)
+    assert app.rag_agent.rag_pipeline.index_version == _cache_version(app)
+    assert app.rag_agent.rag_pipeline.retriever.doc_ids == ["a", "b"]
+    assert not app._rebuilding
+
+
+def test_full_rebuild_when_changes_are_unknown(monkeypatch, tmp_path):
+    app = _container(monkeypatch, tmp_path)
+    app.document_store.clear()
+    app.document_store.add_documents([Document(text="brown bread", metadata={}, id="c")])
+
+    app._refresh_in_background()
+    thread, = _DeferredThread.started
+    thread.target(*thread.args)
+    assert app.rag_agent.rag_pipeline.retriever.doc_ids == ["c"]
+    assert app.rag_agent.rag_pipeline.index_version == _cache_version(app)
+
+
+def test_recreated_store_gets_a_new_cache_version(monkeypatch, tmp_path):
+    app = _container(monkeypatch, tmp_path)
+    old_version = app.rag_agent.rag_pipeline.index_version
+    app.document_store.close()
+    # 删除向量数据库目录后重新构建：user_version 从头计数，写入次数相同时版本号相同
+    os.remove(tmp_path / "documents.sqlite3")
+    app = _container(monkeypatch, tmp_path)
+
+    assert app.rag_agent.rag_pipeline.index_version.split(":")[1] == old_version.split(":")[1]
+    assert app.rag_agent.rag_pipeline.index_version != old_version
@@ -0,0 +1,102 @@
+import re
+
+import numpy as np
+
+from src.ingestion.base import Document
+from src.ingestion.text_splitter import create_text_splitter
+from src.ingestion.tokenizer import EstimatedTokenCounter
+from src.rag_pipeline.context_packer import ContextPacker, sentence_spans
+
+
+def _chunk(doc_id, text, start, end, parent_id="p"):
+    return Document(text=text, metadata={"parent_id": parent_id, "start": start, "end": end, "file_name": "a.md"}, id=doc_id)
+
+
+def test_sentence_spans():
+    text = "第一句。第二句！  Third one. Fourth\n\n最后"
+    assert [text[start:end] for start, end in sentence_spans(text)] == ["第一句。", "第二句！", "Third one.", "Fourth\n", "最后"]
+    assert sentence_spans("   ") == []
+
+
+def test_merge_overlapping_and_adjacent_chunks_keeps_rank_position():
+    parent = "ABCDEFGHIJKLMNOP"
+    documents = [
+        _chunk("other", "unrelated", 0, 9, parent_id="q"),
+        _chunk("c2", parent[3:10], 3, 10),
+        _chunk("c1", parent[0:6], 0, 6),
+        _chunk("c3", parent[10:13], 10, 13),
+        _chunk("far", parent[15:16], 15, 16),
+        _chunk("c1", parent[0:6], 0, 6),
+        Document(text="no position", metadata={"parent_id": "p"}, id="loose"),
+    ]
+    merged = ContextPacker.merge_overlaps(documents)
+
+    assert [doc.id for doc in merged] == ["other", "c1+c2+c3", "far", "loose"]
+    assert merged[1].text == parent[0:13]
+    assert merged[1].metadata["start"] == 0 and merged[1].metadata["end"] == 13
+    assert merged[1].metadata["merged_ids"] == ["c1", "c2", "c3"]
+    # 不修改输入
+    assert documents[1].id == "c2" and "merged_ids" not in documents[1].metadata
+
+
+def test_merging_split_chunks_restores_parent_text_without_duplicates():
+    parent = "".join(f"第{i}句用于测试重叠合并。" for i in range(12))
+    document = Document(text=parent, metadata={}, id="p")
+    chunks = create_text_splitter(chunk_size=30, chunk_overlap=10).split_document(document).chunks
+    assert len(chunks) > 3
+
+    merged, = ContextPacker.merge_overlaps(list(reversed(chunks)))
+    assert re.sub(r"\s", "", merged.text) == re.sub(r"\s", "", parent)
+
+
+def test_pack_respects_budget_and_truncates_at_sentence_boundary():
+    counter = EstimatedTokenCounter()
+    documents = [
+        Document(text="检索增强生成先检索再回答。" * 3, metadata={}, id="a"),
+        Document(text="第二段的第一句。第二段的第二句。第二段的第三句。" * 4, metadata={"token_count": 99}, id="b"),
+        Document(text="放不下的第三段。", metadata={}, id="c"),
+    ]
+    first_cost = int(np.ceil(counter.prefix_counts(documents[0].text)[-1])) + ContextPacker.PER_DOCUMENT_OVERHEAD
+    packer = ContextPacker(max_tokens=first_cost + 40, token_counter=counter)
+    packed = packer.pack(documents)
+
+    assert [doc.id for doc in packed] == ["a", "b"]
+    assert packed[0] is documents[0]
+    truncated = packed[1]
+    assert truncated.metadata["truncated"] is True and "token_count" not in truncated.metadata
+    assert documents[1].text.startswith(truncated.text) and truncated.text.endswith("。")
+    stats = packer.get_stats()
+    assert stats["tokens_out"] <= packer.max_tokens
+    assert stats["truncated_count"] == 1 and stats["documents_out"] == 2
+
+
+def test_zero_budget_only_merges():
+    documents = [Document(text="很长的内容。" * 200, metadata={}, id=str(i)) for i in range(3)]
+    packed = ContextPacker(max_tokens=0, token_counter=EstimatedTokenCounter()).pack(documents)
+    assert packed == documents
+
+
+class _CountingTokenCounter(EstimatedTokenCounter):
+    def __init__(self):
+        super().__init__()
+        self.prefix_texts = []
+
+    def prefix_counts(self, text):
+        self.prefix_texts.append(text)
+        return super().prefix_counts(text)
+
+
+def test_pack_reuses_token_count_from_chunk_metadata():
+    counter = _CountingTokenCounter()
+    documents = [
+        Document(text="已记录 token 数的文本块。" * 10, metadata={"token_count": 4}, id="cached"),
+        Document(text="需要截断的文本块第一句。需要截断的文本块第二句。" * 5, metadata={}, id="cut"),
+    ]
+    packer = ContextPacker(max_tokens=4 + ContextPacker.PER_DOCUMENT_OVERHEAD * 2 + 30, token_counter=counter)
+    packed = packer.pack(documents)
+
+    assert packed[0] is documents[0]
+    assert packed[1].metadata["truncated"] is True
+    # 只为截断的文本块计算前缀和
+    assert counter.prefix_texts.count(documents[0].text) == 0
+    assert packer.get_stats()["tokens_in"] == 4 + counter.count(documents[1].text) + ContextPacker.PER_DOCUMENT_OVERHEAD * 2
@@ -0,0 +1,72 @@
+from src.ingestion.dedup import ChunkDeduplicator, SimHashIndex, hamming_distance, simhash
+
+
+BASE = (
+    "检索增强生成把检索到的文档片段作为上下文交给大模型，回答因此可以基于知识库中的内容。"
+    "分块时相邻文本块之间保留一定的重叠，避免句子在边界处被截断后丢失语义。"
+    "向量检索按语义相似度召回文本块，BM25 按关键词召回，两者的分数归一化后加权融合。"
+    "构建索引时先加载文档，再分块、计算向量并写入向量数据库，整个过程按批次流式进行，内存占用与语料规模无关。"
+    "文件监听器在文档目录发生变化时增量更新索引，只处理新增、修改和删除的文件。"
+    "The pipeline streams documents through load, split, embed and upsert stages with bounded queues."
+)
+
+
+def test_simhash_is_deterministic():
+    assert simhash(BASE) == simhash(BASE)
+    assert simhash("") == 0
+
+
+def test_shared_filler_does_not_dominate_fingerprint():
+    # 目录点线：大量重复的 n-gram 不能让不相关的标题得到相同的指纹
+    a = "第一章 系统架构概述" + "." * 300
+    b = "附录B 财务报表说明" + "." * 300
+    assert hamming_distance(simhash(a), simhash(b)) > 3
+
+    dedup = ChunkDeduplicator()
+    assert dedup.check("a", a)[0] is None
+    assert dedup.check("b", b)[0] is None
+
+
+def test_shared_ruler_and_padding_keep_distinct_chunks():
+    dedup = ChunkDeduplicator()
+    texts = [
+        "#" * 200 + "\n安装说明：使用 pip install -r requirements.txt 安装依赖。",
+        "#" * 200 + "\n部署说明：使用 uvicorn 启动服务并配置反向代理。",
+        "| 名称 |" + " " * 200 + "| 数量 |\n" + "-" * 200,
+        "| 价格 |" + " " * 200 + "| 日期 |\n" + "-" * 200,
+    ]
+    for i, text in enumerate(texts):
+        assert dedup.check(f"c{i}", text)[0] is None
+    assert len(dedup.index) == len(texts)
+
+
+def test_near_duplicates_are_dropped():
+    dedup = ChunkDeduplicator()
+    assert dedup.check("a", BASE)[0] is None
+    # 只有空白和大小写不同
+    assert dedup.check("b", "  " + BASE.replace(" ", " \n\t").upper())[0] == "a"
+    # 末尾少了几个字符（如分块边界不同）
+    assert dedup.check("c", BASE[:-8])[0] == "a"
+
+
+def test_exact_mode_requires_identical_fingerprint():
+    dedup = ChunkDeduplicator()
+    dedup.check("a", BASE)
+    assert dedup.check("b", BASE + "!", exact=True)[0] is None
+    assert dedup.check("c", BASE, exact=True)[0] == "a"
+
+
+def test_same_key_is_not_its_own_duplicate():
+    dedup = ChunkDeduplicator()
+    dedup.check("a", BASE)
+    assert dedup.check("a", BASE)[0] is None
+
+
+def test_index_remove():
+    index = SimHashIndex(max_distance=3)
+    fingerprint = simhash(BASE)
+    index.add("a", fingerprint)
+    assert index.find(fingerprint ^ 0b101) == "a"
+    index.remove(["a"])
+    assert index.find(fingerprint) is None
+    assert len(index) == 0
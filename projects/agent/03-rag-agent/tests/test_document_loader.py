@@ -0,0 +1,207 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from src.ingestion import document_loader
+from src.ingestion.document_loader import SimpleDocumentLoader, _split_trailing_fragment
+
+
+class _FakePage:
+    def __init__(self, text):
+        self.text = text
+
+    def extract_text(self):
+        return self.text
+
+
+class _FakeReader:
+    opened = 0
+
+    def __init__(self, pages):
+        _FakeReader.opened += 1
+        self.pages = [_FakePage(text) for text in pages]
+
+
+def _patch_pdf(monkeypatch, tmp_path, pages):
+    path = tmp_path / "book.pdf"
+    path.write_bytes(b"%PDF-1.4")
+    _FakeReader.opened = 0
+    monkeypatch.setattr(document_loader, "_open_pdf", lambda file_path: _FakeReader(pages))
+    return str(path)
+
+
+def test_split_trailing_fragment():
+    assert _split_trailing_fragment("第一句。第二句没有结束", 100) == ("第一句。", "第二句没有结束")
+    assert _split_trailing_fragment("First. Second is cut", 100) == ("First.", "Second is cut")
+    assert _split_trailing_fragment("完整的句子。", 100) == ("完整的句子。", "")
+    # 末尾片段超过上限时不分离
+    assert _split_trailing_fragment("开头。" + "很长" * 100, 50) == ("开头。" + "很长" * 100, "")
+
+
+def test_pdf_sentence_split_across_pages_is_moved_to_next_page(monkeypatch, tmp_path):
+    path = _patch_pdf(monkeypatch, tmp_path, [
+        "第一页的内容。这句话跨越了",
+        "",
+        "两页才结束。第三页的内容。",
+        "Intro. The last sentence starts here and",
+        "ends on the next one.",
+    ])
+    pages = list(SimpleDocumentLoader().iter_pdf_pages(path))
+
+    assert _FakeReader.opened == 1
+    assert [page.metadata["page_number"] for page in pages] == [1, 3, 4, 5]
+    assert pages[0].text == "第一页的内容。"
+    assert pages[1].text == "这句话跨越了两页才结束。第三页的内容。"
+    assert pages[1].metadata["carried_chars"] == len("这句话跨越了")
+    assert pages[2].text == "Intro."
+    assert pages[3].text == "The last sentence starts here and ends on the next one."
+    assert all(page.metadata["total_pages"] == 5 for page in pages)
+
+
+class _TestLoader(SimpleDocumentLoader):
+    """按文件名模拟慢文件、卡死和崩溃的加载器（定义在模块级，可被子进程按名称反序列化）"""
+
+    def load(self, file_path, **kwargs):
+        name = os.path.basename(file_path)
+        if name.startswith("slow"):
+            time.sleep(0.5)
+        elif name.startswith("late"):
+            time.sleep(1.5)
+        elif name.startswith("hang"):
+            time.sleep(60)
+        elif name.startswith("crash"):
+            os._exit(1)
+        return super().load(file_path, **kwargs)
+
+
+class _TrackingExecutor(ProcessPoolExecutor):
+    # (文件名, 提交时该进程池中未完成的任务数)
+    submissions = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        in_flight = sum(not future.done() for future in self._futures) + 1
+        _TrackingExecutor.submissions.append((os.path.basename(args[2]), in_flight))
+        future = super().submit(fn, *args, **kwargs)
+        self._futures.append(future)
+        return future
+
+
+def _load_parallel(monkeypatch, tmp_path, names, **kwargs):
+    for name in names:
+        (tmp_path / name).write_text(f"{name} 的内容", encoding="utf-8")
+    monkeypatch.setattr(document_loader, "ProcessPoolExecutor", _TrackingExecutor)
+    monkeypatch.setattr(_TrackingExecutor, "submissions", [])
+    errors = {}
+    documents = list(_TestLoader().iter_documents(
+        [str(tmp_path / name) for name in names],
+        parallel=True,
+        on_error=lambda path, error: errors.setdefault(os.path.basename(path), error),
+        **kwargs
+    ))
+    return [document.metadata["file_name"] for document in documents], errors
+
+
+def test_parallel_loading_yields_in_completion_order_within_worker_bound(monkeypatch, tmp_path):
+    names = ["slow.txt"] + [f"f{i}.txt" for i in range(6)]
+    loaded, errors = _load_parallel(monkeypatch, tmp_path, names, max_workers=2)
+
+    assert errors == {}
+    assert sorted(loaded) == sorted(names)
+    # 慢文件不阻塞后面已完成的文件
+    assert loaded[-1] == "slow.txt"
+    assert max(in_flight for _, in_flight in _TrackingExecutor.submissions) <= 2
+    assert len(_TrackingExecutor.submissions) == len(names)
+
+
+def test_parallel_loading_abandons_timed_out_file_and_retries_others_alone(monkeypatch, tmp_path):
+    # hang 与 slow 同时开始；slow 完成后提交 late，hang 超时时 late 仍在运行，随进程池重建后重试
+    names = ["hang.txt", "slow.txt", "late.txt", "f0.txt"]
+    loaded, errors = _load_parallel(monkeypatch, tmp_path, names, max_workers=2, timeout=1.25)
+
+    assert list(errors) == ["hang.txt"] and isinstance(errors["hang.txt"], TimeoutError)
+    assert sorted(loaded) == ["f0.txt", "late.txt", "slow.txt"]
+    submitted = [name for name, _ in _TrackingExecutor.submissions]
+    assert submitted.count("hang.txt") == 1 and submitted.count("late.txt") == 2
+    # 重试的文件单独运行，之后才继续提交新文件
+    retry_index = len(submitted) - 1 - submitted[::-1].index("late.txt")
+    assert _TrackingExecutor.submissions[retry_index][1] == 1
+    assert submitted.index("f0.txt") > retry_index
+
+
+def test_parallel_loading_isolates_file_that_crashes_the_pool(monkeypatch, tmp_path):
+    names = ["f0.txt", "crash.txt", "f1.txt", "f2.txt", "f3.txt"]
+    loaded, errors = _load_parallel(monkeypatch, tmp_path, names, max_workers=2)
+
+    assert list(errors) == ["crash.txt"] and "异常退出" in str(errors["crash.txt"])
+    assert sorted(loaded) == ["f0.txt", "f1.txt", "f2.txt", "f3.txt"]
+    submitted = [name for name, _ in _TrackingExecutor.submissions]
+    assert submitted.count("crash.txt") == 2
+    # 崩溃文件的重试单独运行
+    retry_index = len(submitted) - 1 - submitted[::-1].index("crash.txt")
+    assert _TrackingExecutor.submissions[retry_index][1] == 1
+
+
+def _row_groups(path, **options):
+    parts = list(SimpleDocumentLoader(**options).iter_table_parts(str(path)))
+    return [(part.metadata.get("sheet_name"), part.metadata["row_start"], part.metadata["row_end"]) for part in parts], parts
+
+
+def test_csv_row_groups_repeat_header_and_keep_row_numbers(tmp_path):
+    path = tmp_path / "table.csv"
+    path.write_text("name,value\na,1\n\n\nb,2\n,\nc,3\n\"multi\nline\",4\nd,5\n", encoding="utf-8")
+
+    groups, parts = _row_groups(path, table_rows_per_part=2)
+    # 空行和全空的行被跳过，但仍计入行号
+    assert groups == [(None, 1, 4), (None, 6, 7), (None, 8, 8)]
+    head = "## CSV File: table.csv\n\n| name | value |\n| --- | --- |\n"
+    assert all(part.text.startswith(head) for part in parts)
+    assert parts[0].text == head + "| a | 1 |\n| b | 2 |"
+    assert parts[1].text.endswith("| multi line | 4 |")
+    assert [part.metadata["part_index"] for part in parts] == [1, 2, 3]
+
+
+def test_csv_row_groups_split_by_max_chars(tmp_path):
+    path = tmp_path / "wide.csv"
+    path.write_text("text\n" + "".join(f"{'x' * 20}{i}\n" for i in range(10)), encoding="utf-8")
+    head_size = len("## CSV File: wide.csv\n\n| text |\n| --- |\n")
+    max_chars = head_size + 2 * 27
+
+    groups, parts = _row_groups(path, table_rows_per_part=50, table_part_max_chars=max_chars)
+    assert groups == [(None, 1, 2), (None, 3, 4), (None, 5, 6), (None, 7, 8), (None, 9, 10)]
+    assert all(len(part.text) <= max_chars for part in parts)
+
+
+def test_excel_row_groups_open_the_workbook_once(monkeypatch, tmp_path):
+    import openpyxl
+
+    workbook = openpyxl.Workbook()
+    first = workbook.active
+    first.title = "Data"
+    # 表头不在第一行，数据中间有空行
+    first.append([])
+    first.append(["id", "name"])
+    for row in ([1, "a"], [], [2, "b"], [3, None], [None, None], [4, "d"]):
+        first.append(row)
+    workbook.create_sheet("Empty")
+    workbook.create_sheet("Other").append(["x"])
+    workbook["Other"].append(["y"])
+    path = tmp_path / "book.xlsx"
+    workbook.save(path)
+
+    opened = []
+    load_workbook = openpyxl.load_workbook
+    monkeypatch.setattr(openpyxl, "load_workbook", lambda *args, **kwargs: opened.append(args) or load_workbook(*args, **kwargs))
+
+    groups, parts = _row_groups(path, table_rows_per_part=2)
+    assert groups == [("Data", 1, 3), ("Data", 4, 6), ("Other", 1, 1)]
+    assert parts[1].text == "## Sheet: Data\n\n| id | name |\n| --- | --- |\n| 3 |  |\n| 4 | d |"
+
+    opened.clear()
+    document = SimpleDocumentLoader(table_rows_per_part=2).load(str(path))
+    assert len(opened) == 1
+    assert document.metadata["sheets"] == "Data, Empty, Other"
+    assert document.text.count("| id | name |") == 2
@@ -0,0 +1,59 @@
+from src.document_store import create_document_store
+from src.ingestion.base import Document
+
+
+def _store(tmp_path):
+    return create_document_store(store_type="sqlite", db_path=str(tmp_path / "documents.sqlite3"))
+
+
+def _docs(*ids):
+    return [Document(text=f"text of {doc_id}", metadata={}, id=doc_id) for doc_id in ids]
+
+
+def test_changes_since_reports_upserts_and_deletes(tmp_path):
+    store = _store(tmp_path)
+    store.add_documents(_docs("a", "b", "c"))
+    version = store.version
+
+    store.add_documents(_docs("b", "d"))
+    store.delete_documents(["c", "d"])
+    current, upserted, deleted = store.changes_since(version)
+
+    assert current == store.version
+    # 只记录每个ID最近一次的变化
+    assert sorted(upserted) == ["b"]
+    assert sorted(deleted) == ["c", "d"]
+    assert store.changes_since(current) == (current, [], [])
+
+
+def test_changes_since_requires_full_rebuild_after_clear(tmp_path):
+    store = _store(tmp_path)
+    store.add_documents(_docs("a"))
+    version = store.version
+    store.clear()
+    store.add_documents(_docs("b"))
+
+    assert store.changes_since(version) is None
+    assert store.changes_since(None) is None
+    assert store.changes_since(store.version)[1:] == ([], [])
+
+
+def test_changes_are_visible_to_other_connections(tmp_path):
+    writer = _store(tmp_path)
+    reader = _store(tmp_path)
+    version = reader.version
+    writer.add_documents(_docs("a"))
+
+    assert reader.changes_since(version) == (writer.version, ["a"], [])
+
+
+def test_store_id_is_stable_until_the_database_is_recreated(tmp_path):
+    store = _store(tmp_path)
+    store_id = store.store_id
+    store.add_documents(_docs("a"))
+    store.clear()
+    assert _store(tmp_path).store_id == store_id == store.store_id
+
+    store.close()
+    (tmp_path / "documents.sqlite3").unlink()
+    assert _store(tmp_path).store_id not in (None, store_id)
@@ -0,0 +1,48 @@
+import asyncio
+import threading
+
+from src.clients import http_pool
+
+
+def test_client_is_shared_within_one_event_loop():
+    async def get_twice():
+        return http_pool.get_http_client(), http_pool.get_http_client()
+
+    first, second = asyncio.run(get_twice())
+    assert first is second
+    asyncio.run(http_pool.close_http_clients())
+
+
+def test_client_replaced_on_another_loop_is_closed_on_its_own_loop():
+    old_loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=old_loop.run_forever, daemon=True)
+    thread.start()
+
+    async def get_client():
+        return http_pool.get_http_client()
+
+    try:
+        old_client = asyncio.run_coroutine_threadsafe(get_client(), old_loop).result(5)
+        new_client = asyncio.run(get_client())
+        assert new_client is not old_client
+
+        # 旧连接池在仍在运行的旧事件循环上关闭
+        asyncio.run_coroutine_threadsafe(asyncio.sleep(0.05), old_loop).result(5)
+        assert old_client.is_closed
+        assert not new_client.is_closed
+    finally:
+        old_loop.call_soon_threadsafe(old_loop.stop)
+        thread.join(5)
+        old_loop.close()
+        asyncio.run(http_pool.close_http_clients())
+
+
+def test_client_replaced_after_loop_ended_is_logged(caplog):
+    async def get_client():
+        return http_pool.get_http_client()
+
+    old_client = asyncio.run(get_client())
+    new_client = asyncio.run(get_client())
+    assert new_client is not old_client
+    assert "旧的 LLM 连接池" in caplog.text
+    asyncio.run(http_pool.close_http_clients())
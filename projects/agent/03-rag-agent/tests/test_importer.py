@@ -0,0 +1,113 @@
+import json
+
+import numpy as np
+import pytest
+
+from src.document_store import create_document_store
+from src.ingestion.importer import EmbeddingImporter, iter_embedding_batches, iter_import_files
+from src.ingestion.pipeline import make_document_id
+
+
+class _FakeVectorStore:
+    def __init__(self):
+        self.vectors = {}
+
+    def add_documents(self, documents, vectors):
+        for document, vector in zip(documents, vectors):
+            self.vectors[document.id] = np.asarray(vector)
+
+    def delete_documents(self, ids):
+        for doc_id in ids:
+            self.vectors.pop(doc_id, None)
+
+
+def _write_jsonl(path, records):
+    path.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records), encoding="utf-8")
+
+
+def _collect(path, **kwargs):
+    documents, vectors = [], []
+    for batch_documents, batch_vectors in iter_embedding_batches(str(path), **kwargs):
+        assert batch_vectors.dtype == np.float32
+        documents.extend(batch_documents)
+        vectors.append(batch_vectors)
+    return documents, np.concatenate(vectors)
+
+
+def test_jsonl_reader_generates_missing_ids_and_parses_metadata(tmp_path):
+    path = tmp_path / "chunks.jsonl"
+    _write_jsonl(path, [
+        {"id": "a", "text": "第一块", "metadata": {"file_name": "a.md"}, "embedding": [1, 0, 0]},
+        {"text": "第二块", "metadata": json.dumps({"page_number": 2}), "embedding": [0, 1, 0]},
+        {"id": 7, "text": "第三块", "embedding": [0, 0, 1]},
+    ])
+    documents, vectors = _collect(path, batch_size=2, dimensions=3)
+
+    assert [doc.id for doc in documents] == ["a", f"{make_document_id(str(path))}_row_1", "7"]
+    assert documents[0].metadata == {"file_name": "a.md"} and documents[1].metadata == {"page_number": 2}
+    np.testing.assert_array_equal(vectors, np.eye(3))
+
+
+def test_npy_reader_and_paired_jsonl_is_not_imported_alone(tmp_path):
+    np.save(tmp_path / "part.npy", np.arange(12, dtype=np.float64).reshape(4, 3))
+    _write_jsonl(tmp_path / "part.jsonl", [{"text": f"块{i}"} for i in range(4)])
+    _write_jsonl(tmp_path / "other.jsonl", [{"text": "单独", "embedding": [1, 1, 1]}])
+    (tmp_path / "notes.txt").write_text("ignored", encoding="utf-8")
+
+    assert iter_import_files(str(tmp_path)) == [str(tmp_path / "other.jsonl"), str(tmp_path / "part.npy")]
+    documents, vectors = _collect(tmp_path / "part.npy", batch_size=3)
+    assert [doc.text for doc in documents] == ["块0", "块1", "块2", "块3"]
+    np.testing.assert_array_equal(vectors, np.arange(12).reshape(4, 3))
+
+
+def test_parquet_reader(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    path = tmp_path / "chunks.parquet"
+    table = pa.table({
+        "id": ["a", None, "c"],
+        "text": ["一", "二", "三"],
+        "metadata": [json.dumps({"k": 1}), None, json.dumps({"k": 3})],
+        "embedding": pa.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], type=pa.list_(pa.float32(), 2)),
+    })
+    pq.write_table(table, path, row_group_size=2)
+    documents, vectors = _collect(path, batch_size=2, dimensions=2)
+
+    assert [doc.id for doc in documents] == ["a", f"{make_document_id(str(path))}_row_1", "c"]
+    assert documents[2].metadata == {"k": 3}
+    np.testing.assert_array_equal(vectors, [[1, 0], [0, 1], [1, 1]])
+    # 定长列表的维度不符时，读取第一批之前就失败
+    with pytest.raises(ValueError, match="向量维度"):
+        next(iter_embedding_batches(str(path), dimensions=3))
+
+
+def test_npy_count_mismatch_fails_before_writing(tmp_path):
+    np.save(tmp_path / "part.npy", np.zeros((3, 2), dtype=np.float32))
+    _write_jsonl(tmp_path / "part.jsonl", [{"text": f"块{i}"} for i in range(4)])
+    vector_store = _FakeVectorStore()
+    batches = []
+
+    stats = EmbeddingImporter(vector_store, batch_size=1).run(str(tmp_path), progress=batches.append)
+    assert stats.failed_files == [str(tmp_path / "part.npy")]
+    assert stats.chunk_count == 0 and batches == [] and vector_store.vectors == {}
+
+
+def test_failure_late_in_file_removes_written_chunks(tmp_path):
+    good = tmp_path / "a.jsonl"
+    _write_jsonl(good, [{"id": "ok", "text": "正常", "embedding": [1, 0]}])
+    bad = tmp_path / "b.jsonl"
+    _write_jsonl(bad, [
+        {"id": "b1", "text": "一", "embedding": [1, 0]},
+        {"id": "b2", "text": "二", "embedding": [0, 1]},
+        {"id": "b3", "text": "三", "embedding": [1, 0, 0]},
+    ])
+    vector_store = _FakeVectorStore()
+    document_store = create_document_store(store_type="sqlite", db_path=str(tmp_path / "documents.sqlite3"))
+
+    stats = EmbeddingImporter(vector_store, document_store, batch_size=2, dimensions=2).run(str(tmp_path))
+    assert stats.file_count == 2 and stats.failed_files == [str(bad)]
+    assert stats.chunk_count == 1
+    assert set(vector_store.vectors) == {"ok"}
+    assert document_store.count() == 1 and document_store.get_document("b1") is None
+    document_store.close()
@@ -0,0 +1,89 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.document_store import create_document_store
+from src.ingestion.base import Document
+from src.snapshot import IndexSnapshot, export_snapshot, load_index_snapshot
+
+
+TEXTS = {
+    "a": "the quick brown fox",
+    "b": "a lazy brown dog",
+    "c": "the fox and the hound",
+}
+
+
+class _FakeVectorStore:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def get_embeddings(self, ids):
+        return [self.vectors[doc_id] for doc_id in ids]
+
+
+def _export(tmp_path):
+    store = create_document_store(store_type="sqlite", db_path=str(tmp_path / "documents.sqlite3"))
+    store.add_documents([Document(text=text, metadata={"file_name": f"{doc_id}.txt"}, id=doc_id) for doc_id, text in TEXTS.items()])
+    vectors = {"a": [1.0, 0.0, 0.0], "b": [0.0, 1.0, 0.0], "c": [0.6, 0.8, 0.0]}
+    manifest_path = tmp_path / "manifest.json"
+    manifest_path.write_text("{}", encoding="utf-8")
+    output = str(tmp_path / "snapshot")
+    meta = export_snapshot(
+        output, _FakeVectorStore(vectors), store, "text-embedding-3-small", 3,
+        manifest_path=str(manifest_path), language="en", batch_size=2
+    )
+    store.close()
+    return output, meta
+
+
+def test_export_records_checksums_and_loads(tmp_path):
+    output, meta = _export(tmp_path)
+
+    assert meta["chunk_count"] == 3
+    assert "manifest.json" in meta["files"]
+    assert not os.path.exists(f"{output}.tmp")
+    with open(os.path.join(output, "snapshot.json"), encoding="utf-8") as f:
+        assert json.load(f)["files"] == meta["files"]
+
+    snapshot = load_index_snapshot(output, "text-embedding-3-small", 3)
+    document_store = snapshot.open_document_store()
+    vector_store = snapshot.create_vector_store(document_store)
+    (document, score), = vector_store.search_by_vector([0.0, 1.0, 0.0], top_k=1)
+    assert document.id == "b" and score == pytest.approx(1.0)
+
+    results = snapshot.create_bm25_retriever(document_store).retrieve("hound", k=1)
+    assert [doc.id for doc in results] == ["c"]
+    np.testing.assert_allclose(np.load(os.path.join(output, "vector_norms.npy")), [1.0, 1.0, 1.0])
+    document_store.close()
+
+
+def test_verify_detects_modified_and_missing_files(tmp_path):
+    output, _ = _export(tmp_path)
+    IndexSnapshot(output).verify()
+
+    vectors_path = os.path.join(output, "vectors.npy")
+    with open(vectors_path, "rb") as f:
+        original = f.read()
+    with open(vectors_path, "wb") as f:
+        f.write(original[:-1] + bytes([original[-1] ^ 0xFF]))
+    with pytest.raises(ValueError, match="vectors.npy"):
+        load_index_snapshot(output, "text-embedding-3-small", 3)
+    # 关闭校验时仍可加载
+    load_index_snapshot(output, "text-embedding-3-small", 3, verify=False)
+
+    with open(vectors_path, "wb") as f:
+        f.write(original)
+    os.remove(os.path.join(output, "bm25_docs.npy"))
+    with pytest.raises(ValueError, match="缺少文件"):
+        IndexSnapshot(output).verify()
+
+
+def test_embedding_config_mismatch_is_rejected(tmp_path):
+    output, _ = _export(tmp_path)
+    with pytest.raises(ValueError, match="不一致"):
+        load_index_snapshot(output, "text-embedding-3-large", 3)
+    with pytest.raises(ValueError, match="不是有效的索引快照目录"):
+        IndexSnapshot(str(tmp_path))
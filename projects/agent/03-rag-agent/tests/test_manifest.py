@@ -0,0 +1,77 @@
+import os
+
+from src.ingestion.manifest import IndexManifest, index_config
+
+
+def _write(path, text, mtime=None):
+    path.write_text(text, encoding="utf-8")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return os.path.normpath(str(path))
+
+
+def _indexed(tmp_path, config=None):
+    a = _write(tmp_path / "a.txt", "alpha", mtime=1_000_000)
+    b = _write(tmp_path / "b.txt", "beta", mtime=1_000_000)
+    manifest = IndexManifest(str(tmp_path / "manifest.json"), config=config)
+    manifest.update(a, ["a_chunk_0"])
+    manifest.update(b, ["b_chunk_0", "b_chunk_1"])
+    manifest.save()
+    return a, b
+
+
+def test_diff_detects_added_modified_removed_and_unchanged(tmp_path):
+    a, b = _indexed(tmp_path)
+    _write(tmp_path / "a.txt", "alpha v2", mtime=1_000_100)
+    c = _write(tmp_path / "c.txt", "gamma")
+    os.remove(b)
+
+    diff = IndexManifest(str(tmp_path / "manifest.json")).diff([a, c])
+    assert diff.added == [c]
+    assert diff.modified == [a]
+    assert diff.removed == [b]
+    assert diff.unchanged == []
+    assert diff.changed == [c, a]
+
+
+def test_touched_file_with_same_content_is_unchanged(tmp_path):
+    a, b = _indexed(tmp_path)
+    os.utime(a, (1_000_500, 1_000_500))
+
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    diff = manifest.diff([a, b])
+    assert diff.unchanged == [a, b]
+    # 记录的修改时间随之更新，下次不必再计算哈希
+    assert manifest.files[a].mtime == 1_000_500
+
+
+def test_config_change_marks_every_file_modified(tmp_path):
+    config = index_config(512, 64, "char", "text-embedding-3-small")
+    a, b = _indexed(tmp_path, config=config)
+
+    same = IndexManifest(str(tmp_path / "manifest.json"), config=config)
+    assert same.diff([a, b]).unchanged == [a, b]
+    changed = IndexManifest(str(tmp_path / "manifest.json"), config={**config, "chunk_size": 256})
+    assert changed.diff([a, b]).modified == [a, b]
+
+
+def test_chunk_ids_round_trip_and_remove(tmp_path):
+    a, b = _indexed(tmp_path)
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+
+    assert manifest.get_chunk_ids(b) == ["b_chunk_0", "b_chunk_1"]
+    assert manifest.remove(a) == ["a_chunk_0"]
+    assert manifest.get_chunk_ids(a) == []
+    assert len(manifest) == 1
+
+
+def test_find_dependents_is_transitive(tmp_path):
+    a, b = _indexed(tmp_path)
+    c = _write(tmp_path / "c.txt", "gamma")
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    # b 的内容与 a 重复被跳过，c 的内容又与 b 重复被跳过
+    manifest.update(b, ["b_chunk_0"], duplicate_of=["a_chunk_0"])
+    manifest.update(c, ["c_chunk_0"], duplicate_of=["b_chunk_0"])
+
+    assert manifest.find_dependents(["a_chunk_0"]) == [b, c]
+    assert manifest.find_dependents(["a_chunk_0"], exclude=[b]) == []
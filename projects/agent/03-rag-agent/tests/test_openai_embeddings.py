@@ -0,0 +1,72 @@
+import base64
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+import openai
+import pytest
+
+from src.embeddings.openai_embeddings import OpenAIEmbeddingClient
+
+
+def _bad_request(message):
+    response = httpx.Response(400, request=httpx.Request("POST", "http://test/v1/embeddings"))
+    return openai.BadRequestError(message, response=response, body=None)
+
+
+class _FakeEmbeddings:
+    def __init__(self, dimensions=4, errors=None, drop_last=False):
+        self.dimensions = dimensions
+        self.errors = list(errors or [])
+        self.drop_last = drop_last
+        self.formats = []
+
+    def create(self, model, input, encoding_format="float"):
+        self.formats.append(encoding_format)
+        if self.errors:
+            raise self.errors.pop(0)
+        data = []
+        for index, text in enumerate(input):
+            vector = np.full(self.dimensions, len(text), dtype="<f4")
+            embedding = base64.b64encode(vector.tobytes()).decode() if encoding_format == "base64" else vector.tolist()
+            data.append(SimpleNamespace(index=index, embedding=embedding))
+        if self.drop_last:
+            data.pop()
+        return SimpleNamespace(data=data)
+
+
+def _client(embeddings):
+    client = OpenAIEmbeddingClient(api_key="sk-test", base_url="http://127.0.0.1:1/v1", dimensions=4)
+    client.client = SimpleNamespace(embeddings=embeddings)
+    return client
+
+
+def test_base64_vectors_decode_to_float32_matrix():
+    embeddings = _FakeEmbeddings()
+    matrix = _client(embeddings).embed_documents_array(["a", "bb", "ccc"], batch_size=2)
+    assert matrix.dtype == np.float32
+    assert matrix[:, 0].tolist() == [1.0, 2.0, 3.0]
+    assert embeddings.formats == ["base64", "base64"]
+
+
+def test_falls_back_to_float_only_for_encoding_format_errors():
+    embeddings = _FakeEmbeddings(errors=[_bad_request("Unsupported value for encoding_format: base64")])
+    client = _client(embeddings)
+    matrix = client.embed_documents_array(["a", "bb"])
+    assert matrix[:, 0].tolist() == [1.0, 2.0]
+    assert client.encoding_format == "float"
+
+
+def test_other_bad_requests_do_not_change_encoding_format():
+    embeddings = _FakeEmbeddings(errors=[_bad_request("This model's maximum context length is 8192 tokens")])
+    client = _client(embeddings)
+    with pytest.raises(RuntimeError):
+        client.embed_documents_array(["a"])
+    assert client.encoding_format == "base64"
+    assert embeddings.formats == ["base64"]
+
+
+def test_short_response_raises_instead_of_leaving_garbage_rows():
+    client = _client(_FakeEmbeddings(drop_last=True))
+    with pytest.raises(RuntimeError, match="不一致"):
+        client.embed_documents_array(["a", "bb", "ccc"])
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+from src.ingestion.checkpoint import IngestionCheckpoint
+from src.ingestion.document_loader import SimpleDocumentLoader
+from src.ingestion.manifest import IndexManifest
+from src.ingestion.pipeline import IngestionPipeline
+from src.ingestion.text_splitter import create_text_splitter
+
+
+class _FakeEmbeddingClient:
+    def embed_documents_array(self, texts, batch_size=64):
+        return np.zeros((len(texts), 4), dtype=np.float32)
+
+
+class _FakeVectorStore:
+    def __init__(self):
+        self.ids = set()
+
+    def add_documents(self, documents, vectors):
+        self.ids.update(doc.id for doc in documents)
+
+    def delete_documents(self, ids):
+        self.ids.difference_update(ids)
+
+
+def _pipeline(vector_store, fail_marker="BOOM"):
+    splitter = create_text_splitter(chunk_size=40, chunk_overlap=0)
+    split_to_table = splitter.split_to_table
+
+    def failing_split(documents):
+        # 模拟分块失败的文件
+        if any(fail_marker in document.text for document in documents):
+            raise ValueError("split failed")
+        return split_to_table(documents)
+
+    splitter.split_to_table = failing_split
+    return IngestionPipeline(
+        document_loader=SimpleDocumentLoader(),
+        text_splitter=splitter,
+        embedding_client=_FakeEmbeddingClient(),
+        vector_store=vector_store,
+        batch_size=2
+    )
+
+
+def test_sync_with_checkpoint_publishes_only_successful_files(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "good.txt").write_text("第一段内容。" * 20, encoding="utf-8")
+    (docs / "bad.txt").write_text("BOOM " * 20, encoding="utf-8")
+    paths = sorted(str(path) for path in docs.iterdir())
+
+    vector_store = _FakeVectorStore()
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    checkpoint = IngestionCheckpoint(str(tmp_path / "checkpoint"))
+    stats = _pipeline(vector_store).sync(paths, manifest, checkpoint=checkpoint)
+
+    good = os.path.normpath(str(docs / "good.txt"))
+    assert stats.failed_files == [os.path.normpath(str(docs / "bad.txt"))]
+    assert list(manifest.files) == [good]
+    assert vector_store.ids == set(manifest.get_chunk_ids(good))
+    assert len(vector_store.ids) == stats.chunk_count > 1
+    assert not checkpoint.exists()
+
+
+def test_resume_does_not_publish_chunks_of_files_removed_since(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "kept.txt").write_text("保留的文件。" * 20, encoding="utf-8")
+    (docs / "gone.txt").write_text("随后被删除的文件。" * 20, encoding="utf-8")
+    checkpoint = IngestionCheckpoint(str(tmp_path / "checkpoint"))
+    # 上次构建在发布之前中断，检查点中已有两个文件的文本块
+    _pipeline(_FakeVectorStore()).run(sorted(str(path) for path in docs.iterdir()), checkpoint=checkpoint)
+    (docs / "gone.txt").unlink()
+
+    vector_store = _FakeVectorStore()
+    manifest = IndexManifest(str(tmp_path / "manifest.json"))
+    stats = _pipeline(vector_store).sync([str(docs / "kept.txt")], manifest, checkpoint=checkpoint, resume=True)
+
+    kept = os.path.normpath(str(docs / "kept.txt"))
+    assert stats.chunk_count == 0
+    assert stats.resumed_chunk_count == len(manifest.get_chunk_ids(kept))
+    assert vector_store.ids == set(manifest.get_chunk_ids(kept))
@@ -0,0 +1,153 @@
+import asyncio
+import gc
+
+import pytest
+
+from src.agent.rag_agent import RAGAgentService
+from src.agent.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def main():
+        flight = SingleFlight()
+        calls = []
+
+        async def fn(value):
+            calls.append(value)
+            await asyncio.sleep(0.05)
+            return {"value": value}
+
+        results = await asyncio.gather(*[flight.do("a", lambda: fn(1)) for _ in range(5)], flight.do("b", lambda: fn(2)))
+        # 完成后立即移除，之后的调用重新执行
+        again = await flight.do("a", lambda: fn(3))
+        return calls, results, again, flight.shared_count
+
+    calls, results, again, shared = asyncio.run(main())
+    assert calls == [1, 2, 3]
+    assert [result["value"] for result in results] == [1] * 5 + [2]
+    assert again == {"value": 3}
+    assert shared == 4
+
+
+def test_errors_reach_every_caller_and_cancellation_is_isolated():
+    async def main():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.02)
+            raise ValueError("boom")
+
+        errors = await asyncio.gather(*[flight.do("err", fail) for _ in range(3)], return_exceptions=True)
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            return "ok"
+
+        first = asyncio.ensure_future(flight.do("slow", slow))
+        second = asyncio.ensure_future(flight.do("slow", slow))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return errors, await second, first.cancelled()
+
+    errors, second, cancelled = asyncio.run(main())
+    assert all(isinstance(error, ValueError) for error in errors)
+    assert second == "ok" and cancelled
+
+
+def test_stream_is_broadcast_to_late_and_departing_subscribers():
+    async def main():
+        flight = SingleFlight()
+        produced = []
+
+        async def source():
+            for i in range(4):
+                await asyncio.sleep(0.02)
+                produced.append(i)
+                yield i
+
+        async def subscribe(delay, limit=None):
+            await asyncio.sleep(delay)
+            events = []
+            async for event in flight.stream("s", source):
+                events.append(event)
+                if limit is not None and len(events) >= limit:
+                    break
+            return events
+
+        results = await asyncio.gather(subscribe(0), subscribe(0.05), subscribe(0, limit=1))
+        await asyncio.sleep(0.1)
+        return results, produced
+
+    (full, late, early), produced = asyncio.run(main())
+    assert full == late == [0, 1, 2, 3]
+    assert early == [0]
+    # 订阅者提前离开不影响源被读完
+    assert produced == [0, 1, 2, 3]
+
+
+def test_stream_producer_survives_garbage_collection():
+    async def main():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def source():
+            yield "first"
+            await release.wait()
+            yield "second"
+
+        events = []
+        async for event in flight.stream("s", source):
+            events.append(event)
+            if event == "first":
+                # 只有 SingleFlight 持有广播任务的引用
+                assert len(flight._producers) == 1
+                gc.collect()
+                release.set()
+        await asyncio.sleep(0)
+        return events, len(flight._producers)
+
+    assert asyncio.run(main()) == (["first", "second"], 0)
+
+
+def test_stream_errors_reach_subscribers():
+    async def main():
+        flight = SingleFlight()
+
+        async def source():
+            yield "first"
+            raise RuntimeError("stream failed")
+
+        events = []
+        with pytest.raises(RuntimeError, match="stream failed"):
+            async for event in flight.stream("s", source):
+                events.append(event)
+        return events
+
+    assert asyncio.run(main()) == ["first"]
+
+
+class _SlowPipeline:
+    def __init__(self):
+        self.runs = 0
+
+    async def run(self, query):
+        self.runs += 1
+        await asyncio.sleep(0.05)
+        return {"response": f"answer: {query}"}
+
+
+def test_agent_coalesces_normalized_messages():
+    async def main(coalesce):
+        pipeline = _SlowPipeline()
+        agent = RAGAgentService(rag_pipeline=pipeline, coalesce_requests=coalesce)
+        results = await asyncio.gather(*[agent.handle_message(message) for message in ["Hello  World", " hello world", "HELLO WORLD"]])
+        await agent.aclose()
+        return pipeline.runs, results
+
+    runs, results = asyncio.run(main(True))
+    assert runs == 1
+    assert results[0] == results[1] and results[0] is not results[1]
+    assert asyncio.run(main(False))[0] == 3
+
+    assert RAGAgentService._coalesce_key("calc: 1+2", True) is None
+    assert RAGAgentService._coalesce_key("Hi  there", True) != RAGAgentService._coalesce_key("Hi  there", False)
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+from src.ingestion.base import Document
+from src.ingestion.text_splitter import RecursiveCharacterTextSplitter
+
+
+def _reference_split(text, chunk_size, chunk_overlap, separators):
+    """重写之前基于字符串拼接的实现，作为对照"""
+    def split_with_separator(text, separator):
+        if separator == "":
+            return list(text)
+        result, current = [], ""
+        for part in text.split(separator):
+            if len(current) + len(part) + len(separator) <= chunk_size:
+                current = current + separator + part if current else part
+            else:
+                if current:
+                    result.append(current)
+                current = part
+        if current:
+            result.append(current)
+        return result
+
+    chunks = [text]
+    for separator in separators:
+        chunks = [
+            piece
+            for chunk in chunks
+            for piece in (split_with_separator(chunk, separator) if len(chunk) > chunk_size else [chunk])
+        ]
+
+    if chunk_overlap > 0:
+        final_chunks = []
+        for i, chunk in enumerate(chunks):
+            final_chunks.append(chunk)
+            if i < len(chunks) - 1:
+                overlap_text = chunk[-chunk_overlap:] + chunks[i + 1][:chunk_overlap]
+                if len(overlap_text) > chunk_overlap:
+                    final_chunks[-1] = final_chunks[-1][:-chunk_overlap] + overlap_text
+    else:
+        final_chunks = chunks
+    return [chunk.strip() for chunk in final_chunks if chunk.strip()]
+
+
+def _random_text(rng):
+    words = ["检索", "增强", "生成", "RAG", "pipeline", "向量", "index", "a", "", "   "]
+    pieces = []
+    for _ in range(rng.randint(0, 80)):
+        pieces.append(rng.choice(words))
+        pieces.append(rng.choice([" ", " ", "\n", "\n\n", "。", "", "  \n"]))
+    return "".join(pieces)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_previous_implementation(seed):
+    rng = random.Random(seed)
+    for _ in range(400):
+        text = _random_text(rng)
+        chunk_size = rng.randint(1, 60)
+        chunk_overlap = rng.choice([0, 0, rng.randint(0, chunk_size)])
+        separators = rng.choice([["\n\n", "\n", " ", ""], ["\n", "。", ""], ["\n\n", " "]])
+        splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=separators)
+
+        assert splitter.split_text(text) == _reference_split(text, chunk_size, chunk_overlap, separators)
+
+
+def test_offsets_cover_chunk_text():
+    rng = random.Random(42)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=30, chunk_overlap=8)
+    for _ in range(200):
+        text = _random_text(rng)
+        for chunk, start, end in splitter.split_text_with_offsets(text):
+            assert 0 <= start < end <= len(text)
+            assert chunk.strip() == chunk
+            # 无重叠部分时文本块就是原文的连续片段
+            if len(chunk) == end - start:
+                assert text[start:end] == chunk
+
+
+def test_split_document_metadata():
+    text = "第一段。\n\n" + "第二段内容比较长，" * 6 + "\n\n第三段。"
+    document = Document(text=text, metadata={"file_name": "a.md"}, id="doc")
+    chunks = RecursiveCharacterTextSplitter(chunk_size=40, chunk_overlap=0).split_document(document).chunks
+
+    assert [chunk.id for chunk in chunks] == [f"doc_chunk_{i}" for i in range(len(chunks))]
+    for i, chunk in enumerate(chunks):
+        metadata = chunk.metadata
+        assert metadata["file_name"] == "a.md"
+        assert metadata["chunk_id"] == i and metadata["chunk_total"] == len(chunks)
+        assert metadata["chunk_size"] == len(chunk.text)
+        assert text[metadata["start"]:metadata["end"]] == chunk.text
@@ -0,0 +1,90 @@
+import math
+import random
+import sys
+
+import numpy as np
+import pytest
+
+from src.ingestion import tokenizer
+from src.ingestion.base import Document
+from src.ingestion.text_splitter import TokenTextSplitter, create_text_splitter
+from src.ingestion.tokenizer import EstimatedTokenCounter, create_token_counter
+
+
+def _random_text(rng, length):
+    pieces = ["检索增强生成", "token", "2024", " ", "\n\n", "。", ", ", "Hello world. ", "ｆｕｌｌ", "é"]
+    return "".join(rng.choice(pieces) for _ in range(length))
+
+
+def test_estimator_prefix_counts_and_calibrate_recovers_weights():
+    counter = EstimatedTokenCounter()
+    prefix = counter.prefix_counts("中a ,é")
+    np.testing.assert_allclose(prefix, np.cumsum([0.0, 0.7, 0.25, 0.05, 0.6, 0.5]))
+    assert counter.count("") == 0 and counter.count("中a") == 1
+
+    rng = random.Random(0)
+    texts = [_random_text(rng, rng.randint(5, 40)) for _ in range(50)]
+    weights = np.array([0.9, 0.3, 0.0, 0.8, 1.2])
+    token_counts = [float(EstimatedTokenCounter(weights).prefix_counts(text)[-1]) for text in texts]
+
+    np.testing.assert_allclose(counter.calibrate(texts, token_counts), weights, atol=1e-9)
+    np.testing.assert_allclose(counter.weights, weights, atol=1e-9)
+    # 校准后不复用旧权重下缓存的前缀和
+    np.testing.assert_allclose(counter.prefix_counts(texts[-1])[-1], token_counts[-1])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_token_splitter_respects_chunk_size_and_overlap(seed):
+    rng = random.Random(seed)
+    text = _random_text(rng, 400)
+    counter = EstimatedTokenCounter()
+    splitter = TokenTextSplitter(chunk_size=40, chunk_overlap=10, token_counter=counter)
+    prefix = counter.prefix_counts(text)
+    spans = splitter.split_spans(text)
+    assert len(spans) > 3
+
+    for i, (start, end, tail_start, tail_end) in enumerate(spans):
+        # 文本块主体不超过 chunk_size，追加的重叠部分不超过 chunk_overlap
+        assert prefix[end] - prefix[start] <= 40
+        assert prefix[tail_end] - prefix[tail_start] <= 10
+        if tail_start < tail_end:
+            # 重叠部分取自下一个文本块的开头
+            next_start, next_end = spans[i + 1][:2]
+            assert text[next_start:next_end].startswith(text[tail_start:tail_end].lstrip())
+
+    chunks = splitter.split_document(Document(text=text, metadata={}, id="doc")).chunks
+    assert len(chunks) == len(spans)
+    for chunk, (start, end, tail_start, tail_end) in zip(chunks, spans):
+        expected = math.ceil(prefix[end] - prefix[start] + prefix[tail_end] - prefix[tail_start])
+        assert chunk.metadata["token_count"] == expected
+        assert chunk.text == text[start:end] + text[tail_start:tail_end]
+
+
+def test_token_splitter_without_separators_cuts_long_runs():
+    counter = EstimatedTokenCounter()
+    text = "检" * 100
+    spans = TokenTextSplitter(chunk_size=7, chunk_overlap=0, token_counter=counter).split_spans(text)
+    prefix = counter.prefix_counts(text)
+    assert all(0 < prefix[end] - prefix[start] <= 7 for start, end, _, _ in spans)
+    assert "".join(text[start:end] for start, end, _, _ in spans) == text
+
+
+def test_token_splitter_falls_back_to_estimator_without_tiktoken(monkeypatch):
+    class _Settings:
+        tokenizer_encoding = "cl100k_base"
+
+    # 模拟未安装 tiktoken
+    monkeypatch.setitem(sys.modules, "tiktoken", None)
+    monkeypatch.setattr(tokenizer, "get_settings", lambda: _Settings())
+    tokenizer.get_token_counter.cache_clear()
+    try:
+        assert isinstance(create_token_counter("cl100k_base"), EstimatedTokenCounter)
+        splitter = create_text_splitter(chunk_size=20, chunk_overlap=5, chunk_unit="token")
+        assert isinstance(splitter, TokenTextSplitter)
+        assert isinstance(splitter.token_counter, EstimatedTokenCounter)
+        assert len(splitter.split_text("第一句话。" * 20)) > 1
+    finally:
+        tokenizer.get_token_counter.cache_clear()
+
+    with pytest.raises(ValueError):
+        create_text_splitter(chunk_size=20, chunk_overlap=5, chunk_unit="word")